@@ -48,6 +48,49 @@ PERMISSIONS = {
 }
 
 
+# ── COMPILED MAP ──────────────────────────────────────────
+# PERMISSIONS is compiled once at import: each permission gets a bit and
+# each role a mask of the bits it holds, so a check is a single AND.
+
+PERM_BITS = {perm: 1 << index for index, perm in enumerate(PERMISSIONS)}
+
+ROLE_MASKS = {}
+for _perm, _roles in PERMISSIONS.items():
+    for _role in _roles:
+        ROLE_MASKS[_role] = ROLE_MASKS.get(_role, 0) | PERM_BITS[_perm]
+
+
+class RolePerms:
+    """
+    Read-only mapping of permission name -> bool for one role.
+    Only the permissions a template actually references are evaluated.
+    """
+
+    __slots__ = ("mask",)
+
+    def __init__(self, role):
+        self.mask = ROLE_MASKS.get(role, 0)
+
+    def __getitem__(self, perm_name):
+        return bool(self.mask & PERM_BITS[perm_name])
+
+    def __contains__(self, perm_name):
+        return perm_name in PERM_BITS
+
+    def __iter__(self):
+        return iter(PERM_BITS)
+
+    def __len__(self):
+        return len(PERM_BITS)
+
+    def get(self, perm_name, default=False):
+        bit = PERM_BITS.get(perm_name)
+        return default if bit is None else bool(self.mask & bit)
+
+    def __bool__(self):
+        return bool(self.mask)
+
+
 # ── HELPER ────────────────────────────────────────────────
 
 def get_user_role(user):
@@ -58,18 +101,32 @@ def get_user_role(user):
         return None
 
 
+def get_request_role(request):
+    """Role from the per-request tenant context, falling back to the user row."""
+    tenant = getattr(request, "tenant", None)
+    if tenant is not None:
+        return tenant.role
+    return get_user_role(request.user)
+
+
+def role_has_perm(role, perm_name):
+    """Check if a role has a given permission."""
+    return bool(ROLE_MASKS.get(role, 0) & PERM_BITS.get(perm_name, 0))
+
+
 def user_has_perm(user, perm_name):
     """Check if a user has a given permission."""
-    role = get_user_role(user)
-    if not role:
-        return False
-    allowed_roles = PERMISSIONS.get(perm_name, [])
-    return role in allowed_roles
+    return role_has_perm(get_user_role(user), perm_name)
+
+
+def get_role_perms(role):
+    """Lazy permission mapping for a role — injected into templates."""
+    return RolePerms(role)
 
 
 def get_all_perms(user):
-    """Returns a dict of all permission booleans for a user — injected into templates."""
-    return {perm: user_has_perm(user, perm) for perm in PERMISSIONS}
+    """Lazy permission mapping for a user."""
+    return get_role_perms(get_user_role(user))
 
 
 # ── DECORATOR ─────────────────────────────────────────────
@@ -84,7 +141,7 @@ def role_required(*allowed_roles):
         @wraps(view_fn)
         @login_required
         def wrapper(request, *args, **kwargs):
-            role = get_user_role(request.user)
+            role = get_request_role(request)
             if role not in allowed_roles:
                 messages.error(request, "You don't have permission to access this page.")
                 return redirect("dashboard:home")
@@ -99,11 +156,13 @@ def perm_required(perm_name):
         @perm_required("can_upload_payroll")
         def my_view(request): ...
     """
+    bit = PERM_BITS[perm_name]
+
     def decorator(view_fn):
         @wraps(view_fn)
         @login_required
         def wrapper(request, *args, **kwargs):
-            if not user_has_perm(request.user, perm_name):
+            if not ROLE_MASKS.get(get_request_role(request), 0) & bit:
                 messages.error(request, "You don't have permission to access this page.")
                 return redirect("dashboard:home")
             return view_fn(request, *args, **kwargs)
@@ -1,18 +1,21 @@
-from .permissions import get_all_perms, get_user_role
+from .permissions import get_role_perms, get_request_role
 
 
 def user_permissions(request):
     """
-    Injects `perms` dict and `user_role` string into every template.
+    Injects a lazy `perms` mapping and `user_role` string into every template.
+    Reads the role from the request's tenant context (no queries).
 
     Template usage:
         {% if perms.can_upload_payroll %}...{% endif %}
         {% if user_role == "ADMIN" %}...{% endif %}
     """
     if not request.user.is_authenticated:
-        return {"perms": {}, "user_role": None}
+        return {"perms": get_role_perms(None), "user_role": None}
+
+    role = get_request_role(request)
 
     return {
-        "perms": get_all_perms(request.user),
-        "user_role": get_user_role(request.user),
-    }
\ No newline at end of file
+        "perms": get_role_perms(role),
+        "user_role": role,
+    }
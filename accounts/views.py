@@ -12,6 +12,7 @@ from .forms import ProfileForm
 from .permissions import role_required, perm_required
 from employees.models import AuditLog
 from companies.models import OrganisationUser, UserInvite
+from companies.utils import bump_tenant_version
 
 
 # ── helpers ──────────────────────────────────────────────
@@ -84,7 +85,7 @@ def profile_view(request):
 @role_required("ADMIN")
 def settings_view(request):
     org_user = get_org_user(request)
-    org      = org_user.organisation
+    org      = request.organisation
 
     members = OrganisationUser.objects.filter(
         organisation=org
@@ -109,7 +110,7 @@ def invite_user(request):
     if request.method != "POST":
         return redirect("accounts:settings")
 
-    org   = get_org_user(request).organisation
+    org   = request.organisation
     email = request.POST.get("email", "").strip().lower()
     role  = request.POST.get("role", "SUPERVISOR")
 
@@ -212,7 +213,7 @@ def change_role(request, member_id):
     if request.method != "POST":
         return redirect("accounts:settings")
 
-    org      = get_org_user(request).organisation
+    org      = request.organisation
     member   = get_object_or_404(OrganisationUser, id=member_id, organisation=org)
     new_role = request.POST.get("role")
 
@@ -224,6 +225,7 @@ def change_role(request, member_id):
         old_role    = member.role
         member.role = new_role
         member.save()
+        bump_tenant_version(org.id)
         AuditLog.objects.create(
             action="Role Changed",
             description=f"{request.user.username} changed {member.user.username} from {old_role} to {new_role}.",
@@ -243,7 +245,7 @@ def deactivate_user(request, member_id):
     if request.method != "POST":
         return redirect("accounts:settings")
 
-    org    = get_org_user(request).organisation
+    org    = request.organisation
     member = get_object_or_404(OrganisationUser, id=member_id, organisation=org)
 
     if member.user == request.user:
@@ -252,6 +254,7 @@ def deactivate_user(request, member_id):
 
     member.user.is_active = not member.user.is_active
     member.user.save()
+    bump_tenant_version(org.id)
 
     action = "activated" if member.user.is_active else "deactivated"
     AuditLog.objects.create(
@@ -270,7 +273,7 @@ def cancel_invite(request, invite_id):
     if request.method != "POST":
         return redirect("accounts:settings")
 
-    org    = get_org_user(request).organisation
+    org    = request.organisation
     invite = get_object_or_404(UserInvite, id=invite_id, organisation=org)
     email  = invite.email
     invite.delete()
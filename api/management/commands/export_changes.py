@@ -0,0 +1,39 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from api.utils import changes_since
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream change-feed events of an organisation after a cursor as JSON "
+        "lines. The last line is the cursor to pass next time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("organisation_id", type=int)
+        parser.add_argument("--since", type=int, default=0, help="Last sequence number already processed.")
+        parser.add_argument("--entity", help='e.g. "payroll.salarytransaction"')
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        cursor = options["since"]
+        total = 0
+
+        while True:
+            rows, next_cursor = changes_since(
+                options["organisation_id"],
+                cursor=cursor,
+                limit=options["batch_size"],
+                entity=options["entity"],
+            )
+            for row in rows:
+                self.stdout.write(json.dumps(row, cls=DjangoJSONEncoder))
+            total += len(rows)
+            cursor = next_cursor
+            if len(rows) < options["batch_size"]:
+                break
+
+        self.stdout.write(json.dumps({"next_cursor": cursor, "count": total}))
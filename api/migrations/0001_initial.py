@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('companies', '0004_organisationuser_notify_approval_request_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(max_length=100)),
+                ('entity_id', models.BigIntegerField()),
+                ('operation', models.CharField(choices=[('INSERT', 'Insert'), ('UPDATE', 'Update'), ('DELETE', 'Delete')], max_length=10)),
+                ('changed_fields', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('organisation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='change_events', to='companies.organisation')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['organisation', 'id'], name='api_changee_organis_a2f775_idx'), models.Index(fields=['entity', 'entity_id'], name='api_changee_entity_f8d5f6_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='changeevent',
+            index=models.Index(fields=['organisation', 'entity', 'id'], name='api_changee_organis_db6943_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:10
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def stamp_existing_events(apps, schema_editor):
+    # Events already written are committed: their sequence is their id, so
+    # cursors handed out before this migration stay valid.
+    ChangeEvent = apps.get_model("api", "ChangeEvent")
+    ChangeSequence = apps.get_model("api", "ChangeSequence")
+
+    ChangeEvent.objects.update(sequence=F("id"))
+    last = ChangeEvent.objects.aggregate(last=Max("id"))["last"] or 0
+    ChangeSequence.objects.update_or_create(pk=1, defaults={"last_sequence": last})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_changeevent_api_changee_organis_db6943_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_sequence', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='changeevent',
+            name='sequence',
+            field=models.BigIntegerField(blank=True, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='changeevent',
+            index=models.Index(fields=['organisation', 'sequence'], name='api_changee_organis_e6f174_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='changeevent',
+            index=models.Index(fields=['organisation', 'entity', 'sequence'], name='api_changee_organis_265977_idx'),
+        ),
+        migrations.RunPython(stamp_existing_events, migrations.RunPython.noop),
+    ]
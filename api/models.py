@@ -0,0 +1,62 @@
+from django.db import models
+from companies.models import Organisation
+
+
+# =========================
+# CHANGE FEED (OUTBOX)
+# =========================
+# Append-only log of row changes to SalaryTransaction, Employee,
+# EmployeeBankAccount and BankChangeRequest, written in the same transaction as the change
+# (see api.utils). Consumers remember the last `sequence` they processed and
+# ask for everything after it. The sequence is stamped after commit
+# (api.utils.sequence_changes), so it follows commit order: an event whose
+# transaction commits late gets a higher number than everything already
+# served, where its id might not.
+class ChangeEvent(models.Model):
+    OPERATION_CHOICES = [
+        ("INSERT", "Insert"),
+        ("UPDATE", "Update"),
+        ("DELETE", "Delete"),
+    ]
+
+    organisation = models.ForeignKey(
+        Organisation,
+        on_delete=models.CASCADE,
+        related_name="change_events"
+    )
+
+    # Model label, e.g. "payroll.salarytransaction"
+    entity = models.CharField(max_length=100)
+    entity_id = models.BigIntegerField()
+
+    operation = models.CharField(max_length=10, choices=OPERATION_CHOICES)
+
+    # Field names written by the change; null = whole row (full save)
+    changed_fields = models.JSONField(null=True, blank=True)
+
+    # Feed position, null until stamped
+    sequence = models.BigIntegerField(null=True, blank=True, unique=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["organisation", "id"]),
+            models.Index(fields=["organisation", "entity", "id"]),
+            models.Index(fields=["entity", "entity_id"]),
+            models.Index(fields=["organisation", "sequence"]),
+            models.Index(fields=["organisation", "entity", "sequence"]),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.operation} {self.entity}:{self.entity_id}"
+
+
+# Single row (pk=1): the highest sequence stamped so far. Locked while
+# stamping so concurrent stampers cannot hand out the same numbers.
+class ChangeSequence(models.Model):
+    last_sequence = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Change feed at #{self.last_sequence}"
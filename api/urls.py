@@ -0,0 +1,12 @@
+from django.urls import path
+from . import views
+
+app_name = "api"
+
+urlpatterns = [
+    path("batches/", views.batch_list, name="batches"),
+    path("transactions/", views.transaction_list, name="transactions"),
+    path("employees/", views.employee_list, name="employees"),
+    path("bank-accounts/", views.bank_account_list, name="bank_accounts"),
+    path("changes/", views.change_feed, name="changes"),
+]
@@ -0,0 +1,179 @@
+from django.db import transaction
+from django.db.models import F, Max, Min
+from django.db.models.signals import post_save, pre_delete
+
+from api.models import ChangeEvent, ChangeSequence
+
+
+# =========================
+# CHANGE CAPTURE
+# =========================
+# Single-row saves and deletes are captured by signals (deletes on
+# pre_delete, while the parent rows needed for the organisation still
+# exist); bulk code paths (queryset.update / bulk_update) call
+# record_queryset_changes() right before they write, inside the same
+# transaction.
+
+# Path from each tracked model to its organisation id
+TRACKED_MODELS = {
+    "payroll.salarytransaction": "batch__company__organisation_id",
+    "employees.employee": "company__organisation_id",
+    "banking.employeebankaccount": "employee__company__organisation_id",
+    "banking.bankchangerequest": "employee__company__organisation_id",
+}
+
+# Internal bookkeeping columns that are not published
+UNTRACKED_FIELDS = {
+    "employees.employee": {"pending_change_count", "pending_bank_change_count"},
+}
+
+
+def _organisation_id(instance):
+    # Follow the (usually already cached) relations of TRACKED_MODELS
+    value = instance
+    for attr in TRACKED_MODELS[instance._meta.label_lower].split("__"):
+        value = getattr(value, attr)
+    return value
+
+
+def _published_fields(label, fields):
+    if fields is None:
+        return None
+    fields = sorted(set(fields) - UNTRACKED_FIELDS.get(label, set()))
+    return fields
+
+
+def record_change(instance, operation, fields=None):
+    """
+    Append one event for `instance`. Returns the event, or None when only
+    untracked fields were written.
+    """
+    label = instance._meta.label_lower
+    fields = _published_fields(label, fields)
+    if fields == []:
+        return None
+
+    return ChangeEvent.objects.create(
+        organisation_id=_organisation_id(instance),
+        entity=label,
+        entity_id=instance.pk,
+        operation=operation,
+        changed_fields=fields,
+    )
+
+
+def record_queryset_changes(queryset, fields, operation="UPDATE"):
+    """
+    Append one event per row of `queryset` (one SELECT + one bulk INSERT).
+    Call before the bulk write, while the queryset still matches the rows.
+    """
+    label = queryset.model._meta.label_lower
+    fields = _published_fields(label, fields)
+    if fields == []:
+        return 0
+
+    rows = queryset.order_by().values_list("id", TRACKED_MODELS[label])
+    events = ChangeEvent.objects.bulk_create(
+        [
+            ChangeEvent(
+                organisation_id=organisation_id,
+                entity=label,
+                entity_id=pk,
+                operation=operation,
+                changed_fields=fields,
+            )
+            for pk, organisation_id in rows.iterator(chunk_size=2000)
+        ],
+        batch_size=1000,
+    )
+    return len(events)
+
+
+# =========================
+# FEED SEQUENCE
+# =========================
+# Ids are handed out at INSERT, so a transaction that commits late makes an
+# event appear below ids already served, and a consumer whose cursor is
+# past it would never see it. The feed is therefore read by `sequence`,
+# stamped here on committed events only: one UPDATE numbers every visible
+# unstamped event above the last stamped number, in id order. Events still
+# in flight are invisible to it and get a higher number on a later run.
+
+def sequence_changes():
+    """Stamp committed, unstamped events. Returns the number stamped."""
+    with transaction.atomic():
+        state, _ = ChangeSequence.objects.select_for_update().get_or_create(pk=1)
+
+        pending = ChangeEvent.objects.filter(sequence__isnull=True)
+        bounds = pending.aggregate(low=Min("id"), high=Max("id"))
+        if bounds["low"] is None:
+            return 0
+
+        # sequence = id + offset keeps id order and starts above the last one
+        offset = state.last_sequence - bounds["low"] + 1
+        stamped = pending.filter(id__gte=bounds["low"], id__lte=bounds["high"]).update(
+            sequence=F("id") + offset
+        )
+        state.last_sequence = bounds["high"] + offset
+        state.save(update_fields=["last_sequence"])
+
+    return stamped
+
+
+def latest_change_sequence(organisation_id, entities=None):
+    """
+    Feed sequence of the organisation's newest event (optionally only of
+    the given entity labels); 0 if none. Serves as a data version stamp:
+    unlike the newest id, it moves when a late-committing event appears.
+    """
+    sequence_changes()
+
+    events = ChangeEvent.objects.filter(organisation_id=organisation_id, sequence__isnull=False)
+    if entities:
+        events = events.filter(entity__in=entities)
+    return events.order_by("-sequence").values_list("sequence", flat=True).first() or 0
+
+
+def changes_since(organisation_id, cursor=0, limit=500, entity=None):
+    """
+    Events of an organisation with sequence > cursor, in sequence order.
+    Returns (rows, next_cursor); next_cursor equals cursor when caught up.
+    """
+    sequence_changes()
+
+    events = ChangeEvent.objects.filter(organisation_id=organisation_id, sequence__gt=cursor)
+    if entity:
+        events = events.filter(entity=entity)
+
+    rows = list(
+        events.order_by("sequence").values(
+            "id", "sequence", "entity", "entity_id", "operation", "changed_fields", "created_at"
+        )[:limit]
+    )
+    return rows, (rows[-1]["sequence"] if rows else cursor)
+
+
+# =========================
+# SIGNALS
+# =========================
+
+def _on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if created:
+        record_change(instance, "INSERT")
+    else:
+        record_change(instance, "UPDATE", update_fields)
+
+
+def _on_delete(sender, instance, **kwargs):
+    record_change(instance, "DELETE")
+
+
+def connect_change_capture():
+    from django.apps import apps
+
+    for label in TRACKED_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(_on_save, sender=model, dispatch_uid=f"cdc-save-{label}")
+        pre_delete.connect(_on_delete, sender=model, dispatch_uid=f"cdc-delete-{label}")
@@ -0,0 +1,227 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+from django.utils.http import parse_etags, quote_etag
+
+from accounts.permissions import get_request_role, role_has_perm
+from api.utils import changes_since
+from banking.models import EmployeeBankAccount
+from employees.models import Employee
+from payroll.models import SalaryBatch, SalaryTransaction
+from payroll.utils import InvalidCursor, keyset_page
+
+
+# =========================
+# READ-ONLY JSON API
+# =========================
+# Every list endpoint accepts:
+#   ?fields=a,b,c   sparse field selection (id is always returned)
+#   ?cursor=...     next_cursor of the previous page
+#   ?limit=n        page size (max MAX_PAGE_SIZE)
+# plus the per-resource filters below, and honours If-None-Match.
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def api_view(perm_name):
+    """
+    Login + permission check that answers with JSON instead of redirecting.
+    """
+    def decorator(view_fn):
+        @wraps(view_fn)
+        def wrapper(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return JsonResponse({"error": "Authentication required."}, status=401)
+            if request.method != "GET":
+                return JsonResponse({"error": "Method not allowed."}, status=405)
+            if not request.organisation:
+                return JsonResponse({"error": "No organisation."}, status=403)
+            if not role_has_perm(get_request_role(request), perm_name):
+                return JsonResponse({"error": "Permission denied."}, status=403)
+            try:
+                return view_fn(request, *args, **kwargs)
+            except ApiError as exc:
+                return JsonResponse({"error": str(exc)}, status=exc.status)
+        return wrapper
+    return decorator
+
+
+def _int_param(request, name):
+    value = request.GET.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ApiError(f"'{name}' must be an integer.")
+
+
+def _select_fields(request, allowed):
+    requested = request.GET.get("fields")
+    if not requested:
+        return allowed
+
+    fields = [f.strip() for f in requested.split(",") if f.strip()]
+    unknown = sorted(set(fields) - set(allowed))
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}")
+    return ("id",) + tuple(f for f in fields if f != "id")
+
+
+def _paginated_response(request, queryset, allowed_fields):
+    """
+    Serialise one keyset page of `queryset`, with ETag / If-None-Match.
+    """
+    fields = _select_fields(request, allowed_fields)
+
+    limit = _int_param(request, "limit") or DEFAULT_PAGE_SIZE
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    try:
+        rows, next_cursor = keyset_page(
+            queryset.values(*fields),
+            cursor=request.GET.get("cursor") or None,
+            page_size=limit,
+        )
+    except InvalidCursor as exc:
+        raise ApiError(str(exc))
+
+    body = json.dumps({"results": rows, "next_cursor": next_cursor}, cls=DjangoJSONEncoder)
+    etag = quote_etag(hashlib.md5(body.encode()).hexdigest())
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == "*"):
+        response = HttpResponse(status=304)
+    else:
+        response = HttpResponse(body, content_type="application/json")
+
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+# =========================
+# RESOURCES
+# =========================
+
+BATCH_FIELDS = (
+    "id", "company_id", "company__site_code", "month", "year", "status", "created_at",
+)
+
+TRANSACTION_FIELDS = (
+    "id", "batch_id", "employee_id", "employee__emp_code", "employee__name",
+    "salary_amount", "account_number", "ifsc", "status", "hold_reason",
+    "failure_reason", "utr", "bank_response_at", "created_at",
+)
+
+EMPLOYEE_FIELDS = (
+    "id", "company_id", "emp_code", "name", "father_name", "uan_number",
+    "esic_number", "default_salary", "joining_date", "exit_date",
+    "active_bank_account_id", "created_at",
+)
+
+BANK_ACCOUNT_FIELDS = (
+    "id", "employee_id", "employee__emp_code", "bank_name", "account_number",
+    "ifsc", "effective_from_month", "is_active", "approved_at",
+)
+
+
+@api_view("can_view_reports")
+def batch_list(request):
+    batches = SalaryBatch.objects.filter(company__organisation=request.organisation)
+
+    company_id = _int_param(request, "company")
+    if company_id:
+        batches = batches.filter(company_id=company_id)
+    if request.GET.get("status"):
+        batches = batches.filter(status=request.GET["status"])
+    year = _int_param(request, "year")
+    if year:
+        batches = batches.filter(year=year)
+    month = _int_param(request, "month")
+    if month:
+        batches = batches.filter(month=month)
+
+    return _paginated_response(request, batches, BATCH_FIELDS)
+
+
+@api_view("can_download_reports")
+def transaction_list(request):
+    transactions = SalaryTransaction.objects.filter(
+        batch__company__organisation=request.organisation
+    )
+
+    batch_id = _int_param(request, "batch")
+    if batch_id:
+        transactions = transactions.filter(batch_id=batch_id)
+    employee_id = _int_param(request, "employee")
+    if employee_id:
+        transactions = transactions.filter(employee_id=employee_id)
+    if request.GET.get("status"):
+        transactions = transactions.filter(status=request.GET["status"])
+
+    return _paginated_response(request, transactions, TRANSACTION_FIELDS)
+
+
+@api_view("can_view_employees")
+def employee_list(request):
+    employees = Employee.objects.filter(company__organisation=request.organisation)
+
+    company_id = _int_param(request, "company")
+    if company_id:
+        employees = employees.filter(company_id=company_id)
+    if request.GET.get("active") == "1":
+        employees = employees.filter(exit_date__isnull=True)
+    elif request.GET.get("active") == "0":
+        employees = employees.filter(exit_date__isnull=False)
+
+    return _paginated_response(request, employees, EMPLOYEE_FIELDS)
+
+
+@api_view("can_download_reports")
+def bank_account_list(request):
+    accounts = EmployeeBankAccount.objects.filter(
+        employee__company__organisation=request.organisation
+    )
+
+    employee_id = _int_param(request, "employee")
+    if employee_id:
+        accounts = accounts.filter(employee_id=employee_id)
+    if request.GET.get("active") == "1":
+        accounts = accounts.filter(is_active=True)
+
+    return _paginated_response(request, accounts, BANK_ACCOUNT_FIELDS)
+
+
+# =========================
+# CHANGE FEED
+# =========================
+
+@api_view("can_download_reports")
+def change_feed(request):
+    """
+    Events after ?cursor= (a sequence number, 0 for the beginning),
+    optionally limited to one ?entity= such as "payroll.salarytransaction".
+    """
+    cursor = _int_param(request, "cursor") or 0
+    limit = _int_param(request, "limit") or DEFAULT_PAGE_SIZE
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    rows, next_cursor = changes_since(
+        request.organisation.id,
+        cursor=cursor,
+        limit=limit,
+        entity=request.GET.get("entity") or None,
+    )
+
+    return JsonResponse({"results": rows, "next_cursor": next_cursor})
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banking', '0005_remove_employeebankaccount_unique_active_bank_account_per_employee_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employeebankaccount',
+            index=models.Index(fields=['employee', 'effective_from_month'], name='banking_emp_employe_9c5ceb_idx'),
+        ),
+    ]
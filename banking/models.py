@@ -43,6 +43,8 @@ class EmployeeBankAccount(models.Model):
 
         indexes = [
             models.Index(fields=["employee", "is_active"]),
+            # as-of-month account resolution (banking.utils)
+            models.Index(fields=["employee", "effective_from_month"]),
         ]
 
     def __str__(self):
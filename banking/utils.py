@@ -0,0 +1,135 @@
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Case, F, OuterRef, Q, Subquery, When, Window
+from django.db.models.functions import RowNumber
+from django.utils.timezone import now
+
+from banking.models import EmployeeBankAccount
+
+
+# =========================
+# AS-OF-MONTH ACCOUNT RESOLVER
+# =========================
+# The account that pays a payroll month is the employee's latest account
+# with effective_from_month on or before that month, whether or not it is
+# still active. An employee whose accounts all start later (e.g. the first
+# account was recorded after a back-dated joining) falls back to the active
+# account. Both forms below rank accounts the same way and read the
+# (employee, effective_from_month) index.
+
+def _candidates(accounts, day):
+    return accounts.filter(Q(effective_from_month__lte=day) | Q(is_active=True))
+
+
+def _ranking(day):
+    return [
+        Case(When(effective_from_month__lte=day, then=F("effective_from_month"))).desc(nulls_last=True),
+        F("is_active").desc(),
+        F("id").desc(),
+    ]
+
+
+def accounts_as_of(employees, month, year):
+    """
+    {employee_id: EmployeeBankAccount} paying the given payroll month for
+    `employees` (a queryset or ids), with one window-function query.
+    Employees without any usable account are absent.
+    """
+    day = date(year, month, 1)
+    ranked = (
+        _candidates(EmployeeBankAccount.objects.filter(employee__in=employees), day)
+        .annotate(rank=Window(RowNumber(), partition_by=F("employee_id"), order_by=_ranking(day)))
+        .filter(rank=1)
+    )
+    return {account.employee_id: account for account in ranked}
+
+
+def account_as_of(field, month, year, employee_ref="employee_id"):
+    """
+    Correlated subquery of `field` of the account paying the given payroll
+    month for the employee in OuterRef(employee_ref), for set-based UPDATEs.
+    """
+    day = date(year, month, 1)
+    return Subquery(
+        _candidates(EmployeeBankAccount.objects.filter(employee=OuterRef(employee_ref)), day)
+        .order_by(*_ranking(day))
+        .values(field)[:1]
+    )
+
+
+# =========================
+# BANK RESPONSE
+# =========================
+
+BANK_RESPONSE_COLUMNS = {"emp_code", "status"}
+
+
+def apply_bank_response(batch, df):
+    """
+    Apply a bank response sheet (emp_code, status SUCCESS / FAILED,
+    optional utr / reason) to the EXPORTED transactions of a batch, and
+    complete the batch once none are left.
+    Returns (processed, failed, skipped).
+    """
+    from payroll.models import SalaryTransaction
+    from payroll.utils import apply_summary_delta, new_summary_delta, record_status_move
+    from reports.utils import refresh_salary_facts
+
+    processed = 0
+    failed = 0
+    skipped = 0
+    deltas = new_summary_delta()
+
+    with transaction.atomic():
+        exported = {
+            txn.employee.emp_code: txn
+            for txn in SalaryTransaction.objects.filter(
+                batch=batch,
+                status="EXPORTED"
+            ).select_related("employee")
+        }
+
+        for _, row in df.iterrows():
+            emp_code = str(row["emp_code"]).strip()
+            status = str(row["status"]).upper().strip()
+            utr = str(row.get("utr", "")).strip()
+            reason = str(row.get("reason", "")).strip()
+
+            txn = exported.get(emp_code)
+
+            if not txn:
+                skipped += 1
+                continue
+
+            if status == "SUCCESS":
+                txn.status = "PROCESSED"
+                txn.utr = utr
+                txn.failure_reason = None
+                processed += 1
+
+            elif status == "FAILED":
+                txn.status = "FAILED"
+                txn.failure_reason = reason or "Bank processing failed"
+                failed += 1
+
+            else:
+                skipped += 1
+                continue
+
+            txn.bank_response_at = now()
+            txn.save()
+            del exported[emp_code]
+
+            record_status_move(deltas, "EXPORTED", txn.status, txn.salary_amount)
+
+        apply_summary_delta(batch.id, deltas)
+
+        # Auto-complete batch if no exported transactions remain
+        if not exported:
+            batch.status = "COMPLETED"
+            batch.save(update_fields=["status"])
+
+        refresh_salary_facts(batch)
+
+    return processed, failed, skipped
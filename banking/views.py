@@ -5,6 +5,8 @@ from django.http import HttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils.timezone import now
 from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
 from datetime import date
 import pandas as pd
 
@@ -14,7 +16,16 @@ from companies.models import Company
 from .forms import BankResponseUploadForm
 from .models import BankChangeRequest
 from banking.models import EmployeeBankAccount
-from payroll.utils import release_salary_holds
+from banking.utils import BANK_RESPONSE_COLUMNS, account_as_of, apply_bank_response
+from payroll.utils import (
+    release_salary_holds,
+    transition_transactions,
+)
+from employees.utils import refresh_pending_flags, set_active_bank_account
+from dashboard.utils import adjust_approval_badge
+from api.utils import record_queryset_changes
+from payroll.statutory import invalidate_contribution_totals
+from reports.utils import refresh_salary_facts
 
 
 # =====================================================
@@ -39,10 +50,12 @@ def approve_request(request, id):
     with transaction.atomic():
 
         # Deactivate old active account
-        EmployeeBankAccount.objects.filter(
+        old_accounts = EmployeeBankAccount.objects.filter(
             employee=req.employee,
             is_active=True
-        ).update(is_active=False)
+        )
+        record_queryset_changes(old_accounts, ["is_active"])
+        old_accounts.update(is_active=False)
 
         # Convert month/year → first day of month
         effective_date = date(
@@ -69,6 +82,9 @@ def approve_request(request, id):
         req.approved_at = now()
         req.save(update_fields=["status", "approved_by", "approved_at"])
 
+        refresh_pending_flags(Employee.objects.filter(id=req.employee_id))
+        adjust_approval_badge(req.employee.company.organisation_id, "bank_changes", -1)
+
         # Release salary holds
         release_salary_holds(req.employee)
 
@@ -81,7 +97,7 @@ def approve_request(request, id):
 @login_required
 def download_bank_template(request, company_id):
 
-    organisation = request.user.organisation_user.organisation
+    organisation = request.organisation
 
     company = get_object_or_404(
         Company,
@@ -129,7 +145,7 @@ from django.db.models import Q
 def bulk_bank_upload(request):
 
     companies = Company.objects.filter(
-        organisation=request.user.organisation_user.organisation
+        organisation=request.organisation
     )
 
     if request.method == "POST":
@@ -144,7 +160,7 @@ def bulk_bank_upload(request):
         company = get_object_or_404(
             Company,
             id=company_id,
-            organisation=request.user.organisation_user.organisation
+            organisation=request.organisation
         )
 
         try:
@@ -194,13 +210,15 @@ def bulk_bank_upload(request):
                     continue
 
                 # Deactivate old active accounts (enterprise-safe)
-                EmployeeBankAccount.objects.filter(
+                old_accounts = EmployeeBankAccount.objects.filter(
                     employee=employee,
                     is_active=True
-                ).update(is_active=False)
+                )
+                record_queryset_changes(old_accounts, ["is_active"])
+                old_accounts.update(is_active=False)
 
                 # Create new account
-                EmployeeBankAccount.objects.create(
+                account = EmployeeBankAccount.objects.create(
                     employee=employee,
                     bank_name="Bulk Upload",
                     account_number=account_number,
@@ -208,6 +226,7 @@ def bulk_bank_upload(request):
                     effective_from_month=effective_date,
                     is_active=True
                 )
+                set_active_bank_account(employee, account)
 
                 release_salary_holds(employee)
 
@@ -258,60 +277,14 @@ def upload_bank_response(request):
                 messages.error(request, "Invalid or corrupted Excel file.")
                 return redirect("banking:bank_response_upload")
 
-            required_columns = {"emp_code", "status"}
-            if not required_columns.issubset(df.columns):
+            if not BANK_RESPONSE_COLUMNS.issubset(df.columns):
                 messages.error(
                     request,
                     "Bank response must contain emp_code and status columns."
                 )
                 return redirect("banking:bank_response_upload")
 
-            processed = 0
-            failed = 0
-            skipped = 0
-
-            with transaction.atomic():
-                for _, row in df.iterrows():
-                    emp_code = str(row["emp_code"]).strip()
-                    status = str(row["status"]).upper().strip()
-                    utr = str(row.get("utr", "")).strip()
-                    reason = str(row.get("reason", "")).strip()
-
-                    txn = SalaryTransaction.objects.filter(
-                        batch=batch,
-                        employee__emp_code=emp_code,
-                        status="EXPORTED"  # ← FIXED: was "PENDING"
-                    ).first()
-
-                    if not txn:
-                        skipped += 1
-                        continue
-
-                    if status == "SUCCESS":
-                        txn.status = "PROCESSED"
-                        txn.utr = utr
-                        txn.failure_reason = None
-                        processed += 1
-
-                    elif status == "FAILED":
-                        txn.status = "FAILED"
-                        txn.failure_reason = reason or "Bank processing failed"
-                        failed += 1
-
-                    else:
-                        skipped += 1
-                        continue
-
-                    txn.bank_response_at = now()
-                    txn.save()
-
-                # Auto-complete batch if no exported transactions remain
-                if not SalaryTransaction.objects.filter(
-                    batch=batch,
-                    status="EXPORTED"  # ← FIXED: was "PENDING"
-                ).exists():
-                    batch.status = "COMPLETED"
-                    batch.save(update_fields=["status"])
+            processed, failed, skipped = apply_bank_response(batch, df)
 
             messages.success(
                 request,
@@ -356,23 +329,27 @@ def retry_failed_transactions(request, batch_id):
         messages.info(request, "No failed transactions found to retry.")
         return redirect("dashboard:salary_dashboard")
 
+    # Failed rows are retried in place against the account paying this
+    # month, which may have been corrected since the failure, and go back
+    # to EXPORTED: the batch's bank file lists exactly the EXPORTED rows,
+    # so downloading it again gives the retry file, and the bank's response
+    # is applied to them like the first time.
     with transaction.atomic():
-        for txn in failed_txns:
-            SalaryTransaction.objects.create(
-                batch=batch,
-                employee=txn.employee,
-                salary_amount=txn.salary_amount,
-                account_number=txn.account_number,
-                ifsc=txn.ifsc,
-                status="PENDING",
-            )
+        record_queryset_changes(failed_txns, ["account_number", "ifsc"])
+        failed_txns.update(
+            account_number=Coalesce(account_as_of("account_number", batch.month, batch.year), F("account_number")),
+            ifsc=Coalesce(account_as_of("ifsc", batch.month, batch.year), F("ifsc")),
+        )
+        transition_transactions(failed_txns, "EXPORTED", failure_reason=None)
+        invalidate_contribution_totals(batch.id)
 
         batch.status = "EXPORTED"
         batch.save(update_fields=["status"])
+        refresh_salary_facts(batch)
 
     messages.success(
         request,
-        "Failed transactions prepared for retry. Please export bank file again."
+        "Failed transactions queued for retry. Download the bank file again to send them."
     )
 
     return redirect("dashboard:salary_dashboard")
@@ -425,6 +402,7 @@ def export_bank_file(request, month, year):
     with transaction.atomic():
         batch.status = "EXPORTED"
         batch.save(update_fields=["status"])
+        refresh_salary_facts(batch)
 
     messages.success(request, f"Bank export completed for {month}/{year}")
 
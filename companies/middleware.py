@@ -1,5 +1,5 @@
 # middleware.py
-from companies.models import Company, OrganisationUser
+from companies.utils import TenantContext, get_tenant_context
 
 
 class CompanyContextMiddleware:
@@ -8,29 +8,15 @@ class CompanyContextMiddleware:
 
     def __call__(self, request):
         # SAFE DEFAULTS
-        request.role = None
-        request.organisation = None
-        request.available_companies = []
+        request.tenant = TenantContext()
 
         if request.user.is_authenticated:
-            org_user = (
-                OrganisationUser.objects
-                .select_related("organisation")
-                .filter(user=request.user)
-                .first()
-            )
+            # Cached snapshot — one version lookup on a warm cache
+            request.tenant = get_tenant_context(request.user)
 
-            if org_user:
-                request.role = org_user.role
-                request.organisation = org_user.organisation
-
-                request.available_companies = (
-                    Company.objects
-                    .filter(
-                        organisation=org_user.organisation,
-                        is_active=True
-                    )
-                    .order_by("site_code")
-                )
+        request.role = request.tenant.role
+        request.organisation = request.tenant.organisation
+        request.available_companies = request.tenant.available_companies
 
         return self.get_response(request)
+
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0004_organisationuser_notify_approval_request_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organisation',
+            name='tenant_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
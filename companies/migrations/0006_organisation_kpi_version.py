@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0005_organisation_tenant_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organisation',
+            name='kpi_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
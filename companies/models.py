@@ -8,6 +8,14 @@ class Organisation(models.Model):
     name = models.CharField(max_length=200)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Bumped whenever members' roles / access or the companies change, so
+    # cached tenant snapshots in every process go stale (companies.utils)
+    tenant_version = models.PositiveIntegerField(default=0)
+
+    # Bumped whenever employees or salary transactions change; part of the
+    # dashboard KPI snapshot key (dashboard.utils)
+    kpi_version = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return self.name
 
@@ -1,3 +1,8 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from companies.models import Company, Organisation, OrganisationUser
 
 
 def get_user_organisation(user):
@@ -6,3 +11,123 @@ def get_user_organisation(user):
     Assumes OrganisationUser exists.
     """
     return user.organisation_user.organisation
+
+
+# =========================
+# TENANT CONTEXT
+# =========================
+# Role, organisation and active companies of the logged-in user, resolved
+# once per request by CompanyContextMiddleware and exposed as
+# `request.tenant`. The underlying snapshot is cached per user and tagged
+# with the organisation's tenant version; bump_tenant_version() makes every
+# member's snapshot stale (role changes, company create/edit/delete, ...).
+#
+# The version lives on the Organisation row, not in the cache: the default
+# cache is per process (LocMemCache), and a bump must reach every worker at
+# once. Serving a cached snapshot therefore costs one primary-key lookup;
+# any cache backend works, a shared one only saves the rebuilds.
+
+TENANT_CACHE_TTL = getattr(settings, "TENANT_CONTEXT_TTL", 600)
+
+
+def _tenant_key(user_id):
+    return f"tenant:user:{user_id}"
+
+
+class TenantContext:
+    """
+    Read-only view of who the user is inside their organisation.
+    """
+
+    def __init__(self, role=None, organisation=None, org_user_id=None, company_ids=()):
+        self.role = role
+        self.organisation = organisation
+        self.org_user_id = org_user_id
+        self.company_ids = list(company_ids)
+
+    @property
+    def organisation_id(self):
+        return self.organisation.id if self.organisation else None
+
+    @property
+    def available_companies(self):
+        """Lazy queryset of the organisation's active companies."""
+        if not self.organisation:
+            return Company.objects.none()
+        return Company.objects.filter(id__in=self.company_ids).order_by("site_code")
+
+    def __bool__(self):
+        return self.organisation is not None
+
+
+def _tenant_version(organisation_id):
+    return (
+        Organisation.objects
+        .filter(id=organisation_id)
+        .values_list("tenant_version", flat=True)
+        .first()
+    )
+
+
+def bump_tenant_version(organisation_id):
+    """
+    Invalidate the cached tenant snapshot of every member of an organisation.
+    """
+    Organisation.objects.filter(id=organisation_id).update(tenant_version=F("tenant_version") + 1)
+
+
+def build_tenant_context(user):
+    """
+    Resolve the tenant context from the database (two queries).
+    """
+    org_user = (
+        OrganisationUser.objects
+        .select_related("organisation")
+        .filter(user=user)
+        .first()
+    )
+
+    if not org_user:
+        return TenantContext()
+
+    company_ids = (
+        Company.objects
+        .filter(organisation=org_user.organisation, is_active=True)
+        .order_by("site_code")
+        .values_list("id", flat=True)
+    )
+
+    return TenantContext(
+        role=org_user.role,
+        organisation=org_user.organisation,
+        org_user_id=org_user.id,
+        company_ids=company_ids,
+    )
+
+
+def get_tenant_context(user):
+    """
+    Cached tenant context for `user`; rebuilt when the organisation's
+    tenant version has moved on or the snapshot expired. Users without an
+    organisation are not cached, so joining one takes effect everywhere.
+    """
+    key = _tenant_key(user.id)
+    snapshot = cache.get(key)
+
+    if snapshot is not None:
+        tenant, version = snapshot
+        if version == _tenant_version(tenant.organisation_id):
+            return tenant
+
+    tenant = build_tenant_context(user)
+    if tenant:
+        # Read in the same query as the snapshot, so the two agree
+        cache.set(key, (tenant, tenant.organisation.tenant_version), TENANT_CACHE_TTL)
+    return tenant
+
+
+def invalidate_tenant_context(user_id):
+    """
+    Drop one user's cached snapshot (e.g. right after they join an organisation).
+    """
+    cache.delete(_tenant_key(user_id))
@@ -12,7 +12,8 @@ from django.views.decorators.http import require_POST
 from banking.models import BankChangeRequest
 from companies.forms import CompanyForm
 from companies.models import Organisation, OrganisationUser, Company
-from companies.utils import get_user_organisation
+from companies.utils import bump_tenant_version, invalidate_tenant_context
+from dashboard.utils import invalidate_org_kpis
 from django.conf import settings
 
 from employees.models import EmployeeDraft, Employee, EmployeeChangeRequest
@@ -48,6 +49,8 @@ def register(request):
                     role="ADMIN"
                 )
 
+            invalidate_tenant_context(user.id)
+
             # 4️⃣ Login user
             login(request, user)
 
@@ -69,15 +72,17 @@ def company_create(request):
     """
     Register a new company under the logged-in user's organisation
     """
-    org_user = OrganisationUser.objects.get(user=request.user)
+    organisation = request.organisation
 
     if request.method == "POST":
         form = CompanyForm(request.POST)
         if form.is_valid():
             Company.create_for_organisation(
-                organisation=org_user.organisation,
+                organisation=organisation,
                 **form.cleaned_data
             )
+            invalidate_org_kpis(organisation.id)
+            bump_tenant_version(organisation.id)
             messages.success(request, "Company registered successfully.")
             return redirect("companies:company_list")
     else:
@@ -96,9 +101,7 @@ def company_list(request):
     List all companies under the logged-in user's organisation
     """
 
-    org_user = OrganisationUser.objects.filter(user=request.user).first()
-
-    if not org_user:
+    if not request.organisation:
         # Safety: user exists but not linked to organisation
         return render(
             request,
@@ -107,7 +110,7 @@ def company_list(request):
         )
 
     companies = Company.objects.filter(
-        organisation=org_user.organisation
+        organisation=request.organisation
     ).order_by("site_code")
 
     return render(
@@ -119,12 +122,10 @@ def company_list(request):
 
 @login_required
 def company_detail(request, pk):
-    org_user = OrganisationUser.objects.filter(user=request.user).first()
-
     company = get_object_or_404(
         Company,
         pk=pk,
-        organisation=org_user.organisation
+        organisation=request.organisation
     )
 
     return render(
@@ -135,7 +136,7 @@ def company_detail(request, pk):
 
 @login_required
 def company_edit(request, pk):
-    organisation = get_user_organisation(request.user)
+    organisation = request.organisation
 
     company = get_object_or_404(
         Company,
@@ -147,6 +148,7 @@ def company_edit(request, pk):
         form = CompanyForm(request.POST, instance=company)
         if form.is_valid():
             form.save()
+            bump_tenant_version(organisation.id)
             messages.success(request, "Company updated successfully.")
             return redirect("companies:company_list")
     else:
@@ -168,7 +170,7 @@ if not settings.DEBUG:
 @login_required
 @require_POST
 def company_delete(request, pk):
-    organisation = get_user_organisation(request.user)
+    organisation = request.organisation
 
     company = get_object_or_404(
         Company,
@@ -201,6 +203,8 @@ def company_delete(request, pk):
 
     # 3️⃣ Finally delete company
     company.delete()
+    invalidate_org_kpis(organisation.id)
+    bump_tenant_version(organisation.id)
 
     messages.success(
         request,
@@ -1,14 +1,16 @@
-from employees.models import EmployeeDraft, EmployeeChangeRequest
-from banking.models import BankChangeRequest
+from .utils import get_approval_badges
+
 
 def approval_badges(request):
+    """
+    Pending approval counts of the user's organisation.
+    Served from the stored counters — one query.
+    """
     if not request.user.is_authenticated or not request.user.is_staff:
         return {}
 
-    return {
-        "approval_badges": {
-            "employee_drafts": EmployeeDraft.objects.filter(status="PENDING").count(),
-            "employee_changes": EmployeeChangeRequest.objects.filter(status="PENDING").count(),
-            "bank_changes": BankChangeRequest.objects.filter(status="PENDING").count(),
-        }
-    }
+    organisation = getattr(request, "organisation", None)
+    if organisation is None:
+        return {}
+
+    return {"approval_badges": get_approval_badges(organisation.id)}
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.utils import reconcile_approval_badges
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount pending drafts, profile changes and bank changes per "
+        "organisation and overwrite the stored badge counters. "
+        "Schedule periodically (e.g. every 15 minutes) to correct drift."
+    )
+
+    def handle(self, *args, **options):
+        drifted = reconcile_approval_badges()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled badge counters ({drifted} corrected)."))
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('companies', '0005_organisation_tenant_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApprovalBadgeCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=30)),
+                ('count', models.IntegerField(default=0)),
+                ('organisation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='approval_badges', to='companies.organisation')),
+            ],
+            options={
+                'unique_together': {('organisation', 'kind')},
+            },
+        ),
+    ]
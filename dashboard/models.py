@@ -1,3 +1,28 @@
 from django.db import models
 
-# Create your models here.
+from companies.models import Organisation
+
+
+# =========================
+# APPROVAL BADGE COUNTERS
+# =========================
+# Pending approval count per organisation and kind (see dashboard.utils).
+# Kept in the database so every worker reads the same numbers and a
+# reconcile fixes them everywhere.
+class ApprovalBadgeCounter(models.Model):
+    organisation = models.ForeignKey(
+        Organisation,
+        on_delete=models.CASCADE,
+        related_name="approval_badges"
+    )
+
+    # Key of dashboard.utils.BADGE_SOURCES, e.g. "employee_drafts"
+    kind = models.CharField(max_length=30)
+
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("organisation", "kind")
+
+    def __str__(self):
+        return f"{self.organisation_id} {self.kind}: {self.count}"
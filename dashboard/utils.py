@@ -1,2 +1,250 @@
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from banking.models import BankChangeRequest
+from companies.models import Company, Organisation
+from dashboard.models import ApprovalBadgeCounter
+from employees.models import Employee, EmployeeDraft, EmployeeChangeRequest
+from payroll.models import BatchStatusSummary, SalaryBatch
+
+
 def can_reverse_batch(user):
     return user.is_superuser or user.groups.filter(name="PAYROLL_ADMIN").exists()
+
+
+# =========================
+# ORGANISATION KPI SNAPSHOT
+# =========================
+# The dashboard home page renders from a cached per-organisation snapshot.
+# It is computed with one query and keyed on Organisation.kpi_version, which
+# is bumped whenever employees or salary transactions of the organisation
+# are written (see invalidate_org_kpis). The version lives in the database
+# because the default cache is per process: a bump is seen by every worker.
+
+KPI_CACHE_TTL = getattr(settings, "DASHBOARD_KPI_TTL", 300)
+
+
+def _kpi_cache_key(organisation_id, version):
+    return f"dashboard:kpis:{organisation_id}:{version}"
+
+
+def _org_aggregate(queryset, org_path, aggregate, output_field=None):
+    """
+    Scalar subquery returning `aggregate` over the rows of `queryset`
+    that belong to the outer organisation (0 when there are none).
+    """
+    output_field = output_field or IntegerField()
+    zero = Value(Decimal("0") if isinstance(output_field, DecimalField) else 0, output_field=output_field)
+
+    return Coalesce(
+        Subquery(
+            queryset
+            .filter(**{org_path: OuterRef("pk")})
+            .order_by()
+            .values(org_path)
+            .annotate(value=aggregate)
+            .values("value"),
+            output_field=output_field,
+        ),
+        zero,
+        output_field=output_field,
+    )
+
+
+def compute_org_kpis(organisation_id, month, year):
+    """
+    Build the dashboard KPI snapshot for one organisation with a single query.
+    Payroll figures come from BatchStatusSummary, not the transaction table.
+    """
+    amount = DecimalField(max_digits=14, decimal_places=2)
+    summaries = BatchStatusSummary.objects.filter(batch__month=month, batch__year=year)
+    org_path = "batch__company__organisation"
+
+    return (
+        Organisation.objects
+        .filter(pk=organisation_id)
+        .annotate(
+            total_companies=_org_aggregate(Company.objects.all(), "organisation", Count("id")),
+            total_employees=_org_aggregate(
+                Employee.objects.all(), "company__organisation", Count("id")
+            ),
+            active_employees=_org_aggregate(
+                Employee.objects.all(), "company__organisation",
+                Count("id", filter=Q(exit_date__isnull=True)),
+            ),
+            payroll_total=_org_aggregate(summaries, org_path, Sum("total_amount"), amount),
+            payroll_processed=_org_aggregate(
+                summaries, org_path, Sum("total_amount", filter=Q(status="PROCESSED")), amount
+            ),
+            payroll_pending=_org_aggregate(
+                summaries, org_path, Sum("txn_count", filter=Q(status="PENDING"))
+            ),
+            payroll_hold=_org_aggregate(
+                summaries, org_path, Sum("total_amount", filter=Q(status="HOLD")), amount
+            ),
+            payroll_failed=_org_aggregate(
+                summaries, org_path, Sum("total_amount", filter=Q(status="FAILED")), amount
+            ),
+        )
+        .values(
+            "total_companies", "total_employees", "active_employees",
+            "payroll_total", "payroll_processed", "payroll_pending",
+            "payroll_hold", "payroll_failed",
+        )
+        .get()
+    )
+
+
+def get_org_kpis(organisation_id):
+    """
+    Cached KPI snapshot for the current month (TTL = DASHBOARD_KPI_TTL seconds).
+    """
+    today = date.today()
+    version = (
+        Organisation.objects
+        .filter(pk=organisation_id)
+        .values_list("kpi_version", flat=True)
+        .first()
+    )
+    key = _kpi_cache_key(organisation_id, version)
+
+    snapshot = cache.get(key)
+    if snapshot and (snapshot["month"], snapshot["year"]) == (today.month, today.year):
+        return snapshot
+
+    snapshot = compute_org_kpis(organisation_id, today.month, today.year)
+    snapshot.update(month=today.month, year=today.year)
+    cache.set(key, snapshot, KPI_CACHE_TTL)
+    return snapshot
+
+
+def invalidate_org_kpis(organisation_id):
+    """
+    Make every worker's cached snapshot stale, in the current transaction
+    (readers see the new version once it commits).
+    """
+    if organisation_id is None:
+        return
+    Organisation.objects.filter(pk=organisation_id).update(kpi_version=F("kpi_version") + 1)
+
+
+def invalidate_batch_kpis(batch_id):
+    invalidate_org_kpis(
+        SalaryBatch.objects
+        .filter(id=batch_id)
+        .values_list("company__organisation_id", flat=True)
+        .first()
+    )
+
+
+# =========================
+# APPROVAL BADGE COUNTERS
+# =========================
+# Per-organisation pending counts for the navigation badges, stored in
+# ApprovalBadgeCounter and moved by the draft / change-request / bank-change
+# code paths inside their own transaction. Reads are one indexed query;
+# missing counters are recounted. Drift is corrected by
+#   python manage.py reconcile_approval_badges
+
+BADGE_SOURCES = {
+    "employee_drafts": (EmployeeDraft, "company__organisation"),
+    "employee_changes": (EmployeeChangeRequest, "employee__company__organisation"),
+    "bank_changes": (BankChangeRequest, "employee__company__organisation"),
+}
+
+
+def adjust_approval_badge(organisation_id, kind, delta):
+    """
+    Move one badge counter by `delta`, in the current transaction.
+    A missing counter is left missing; the next read recomputes it.
+    """
+    if organisation_id is None or not delta:
+        return
+
+    ApprovalBadgeCounter.objects.filter(
+        organisation_id=organisation_id, kind=kind
+    ).update(count=F("count") + delta)
+
+
+def count_pending_approvals(organisation_ids):
+    """
+    Count pending approvals per organisation with one GROUP BY per kind.
+    Returns {organisation_id: {kind: n}}.
+    """
+    counts = {org_id: dict.fromkeys(BADGE_SOURCES, 0) for org_id in organisation_ids}
+
+    for kind, (model, org_path) in BADGE_SOURCES.items():
+        rows = (
+            model.objects
+            .filter(status="PENDING", **{f"{org_path}__in": organisation_ids})
+            .values(org_path)
+            .annotate(n=Count("id"))
+            .order_by()
+        )
+        for row in rows:
+            counts[row[org_path]][kind] = row["n"]
+
+    return counts
+
+
+def _store_badge_counts(counts):
+    ApprovalBadgeCounter.objects.bulk_create(
+        [
+            ApprovalBadgeCounter(organisation_id=org_id, kind=kind, count=n)
+            for org_id, kinds in counts.items()
+            for kind, n in kinds.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["organisation", "kind"],
+        update_fields=["count"],
+    )
+
+
+def get_approval_badges(organisation_id):
+    """
+    Pending approval counts for one organisation, from the stored counters.
+    """
+    stored = dict(
+        ApprovalBadgeCounter.objects
+        .filter(organisation_id=organisation_id)
+        .values_list("kind", "count")
+    )
+
+    if len(stored) == len(BADGE_SOURCES):
+        return {kind: max(stored[kind], 0) for kind in BADGE_SOURCES}
+
+    counts = count_pending_approvals([organisation_id])
+    _store_badge_counts(counts)
+    return counts[organisation_id]
+
+
+def reconcile_approval_badges(organisation_ids=None):
+    """
+    Recount every badge and overwrite the stored counters.
+    Returns the number of counters that had drifted (or were missing).
+    """
+    if organisation_ids is None:
+        organisation_ids = list(Organisation.objects.values_list("id", flat=True))
+
+    counts = count_pending_approvals(organisation_ids)
+
+    stored = {
+        (org_id, kind): n
+        for org_id, kind, n in ApprovalBadgeCounter.objects
+        .filter(organisation_id__in=organisation_ids)
+        .values_list("organisation_id", "kind", "count")
+    }
+    drifted = sum(
+        1
+        for org_id, kinds in counts.items()
+        for kind, n in kinds.items()
+        if stored.get((org_id, kind)) != n
+    )
+
+    _store_badge_counts(counts)
+    return drifted
@@ -1,10 +1,9 @@
 from datetime import date
+from decimal import Decimal
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied
-from django.db import models
-from django.db.models import Sum
 from django.shortcuts import get_object_or_404, redirect, render
 
 from companies.models import Company
@@ -20,7 +19,16 @@ from payroll.models import (
     SalaryTransaction,
 )
 
-from .utils import can_reverse_batch
+from payroll.utils import (
+    InvalidCursor,
+    employee_ledger_page,
+    employee_yearly_summary,
+    get_batch_summary,
+)
+from reports.cache import batches_versions, cached_summary, data_version
+from reports.utils import refresh_salary_facts
+
+from .utils import can_reverse_batch, get_org_kpis, get_approval_badges
 
 
 # -------------------------------------------------
@@ -28,66 +36,37 @@ from .utils import can_reverse_batch
 # -------------------------------------------------
 @login_required
 def home(request):
-    from datetime import date
-    from django.db.models import Sum
-
-    today = date.today()
-    current_month = today.month
-    current_year = today.year
-
     # =========================================
-    # ORGANISATION LEVEL DATA
+    # ORGANISATION KPI SNAPSHOT (cached)
     # =========================================
 
-    organisation = request.user.organisation_user.organisation
-
-    companies = Company.objects.filter(organisation=organisation)
-    employees = Employee.objects.filter(company__organisation=organisation)
+    organisation = request.organisation
 
-    total_companies = companies.count()
-    total_employees = employees.count()
-    active_employees = employees.filter(exit_date__isnull=True).count()
-
-    # =========================================
-    # CURRENT MONTH PAYROLL SUMMARY
-    # =========================================
-
-    batches = SalaryBatch.objects.filter(
-        company__organisation=organisation,
-        month=current_month,
-        year=current_year
-    )
-
-    transactions = SalaryTransaction.objects.filter(batch__in=batches)
+    kpis = get_org_kpis(organisation.id)
 
     payroll_summary = {
-        "total": transactions.aggregate(total=Sum("salary_amount"))["total"] or 0,
-        "processed": transactions.filter(status="PROCESSED").aggregate(
-            total=Sum("salary_amount")
-        )["total"] or 0,
-        "pending": transactions.filter(status="PENDING").count(),
-        "hold": transactions.filter(status="HOLD").aggregate(
-            total=Sum("salary_amount")
-        )["total"] or 0,
-        "failed": transactions.filter(status="FAILED").aggregate(
-            total=Sum("salary_amount")
-        )["total"] or 0,
+        "total": kpis["payroll_total"],
+        "processed": kpis["payroll_processed"],
+        "pending": kpis["payroll_pending"],
+        "hold": kpis["payroll_hold"],
+        "failed": kpis["payroll_failed"],
     }
 
     context = {
-        "total_companies": total_companies,
-        "total_employees": total_employees,
-        "active_employees": active_employees,
+        "total_companies": kpis["total_companies"],
+        "total_employees": kpis["total_employees"],
+        "active_employees": kpis["active_employees"],
         "payroll_summary": payroll_summary,
-        "month": current_month,
-        "year": current_year,
+        "month": kpis["month"],
+        "year": kpis["year"],
     }
 
     if request.user.is_staff:
+        badges = get_approval_badges(organisation.id)
         context.update({
-            "pending_employee_drafts": EmployeeDraft.objects.filter(status="PENDING").count(),
-            "pending_profile_changes": EmployeeChangeRequest.objects.filter(status="PENDING").count(),
-            "pending_bank_changes": BankChangeRequest.objects.filter(status="PENDING").count(),
+            "pending_employee_drafts": badges["employee_drafts"],
+            "pending_profile_changes": badges["employee_changes"],
+            "pending_bank_changes": badges["bank_changes"],
         })
 
     return render(request, "dashboard/home.html", context)
@@ -119,22 +98,17 @@ def salary_dashboard(request):
     if not batch:
         return render(request, "dashboard/salary_dashboard.html", context)
 
-    qs = SalaryTransaction.objects.filter(batch=batch)
+    summary = get_batch_summary(batch)
+    counts, amounts = summary["counts"], summary["amounts"]
 
     context["stats"] = {
-        "pending": qs.filter(status="PENDING").count(),
-        "hold": qs.filter(status="HOLD").count(),
-        "processed": qs.filter(status="PROCESSED").count(),
-        "failed": qs.filter(status="FAILED").count(),
-        "total_amount": qs.aggregate(
-            total=Sum("salary_amount")
-        )["total"] or 0,
-        "processed_amount": qs.filter(
-            status="PROCESSED"
-        ).aggregate(total=Sum("salary_amount"))["total"] or 0,
-        "hold_amount": qs.filter(
-            status="HOLD"
-        ).aggregate(total=Sum("salary_amount"))["total"] or 0,
+        "pending": counts["PENDING"],
+        "hold": counts["HOLD"],
+        "processed": counts["PROCESSED"],
+        "failed": counts["FAILED"],
+        "total_amount": summary["total_amount"],
+        "processed_amount": amounts["PROCESSED"],
+        "hold_amount": amounts["HOLD"],
     }
 
     return render(request, "dashboard/salary_dashboard.html", context)
@@ -178,41 +152,41 @@ def salary_status_list(request, status):
 # -------------------------------------------------
 @login_required
 def employee_salary_ledger(request, employee_id):
-    employee = get_object_or_404(Employee, id=employee_id)
-
-    transactions = SalaryTransaction.objects.filter(
-        employee=employee
-    ).select_related(
-        "batch"
-    ).order_by(
-        "-batch__year", "-batch__month"
+    employee = get_object_or_404(
+        Employee.objects.select_related("company"),
+        id=employee_id
     )
 
-    totals = transactions.aggregate(
-        total_amount=Sum("salary_amount"),
-        processed_amount=Sum(
-            "salary_amount",
-            filter=models.Q(status="PROCESSED")
-        ),
-        pending_amount=Sum(
-            "salary_amount",
-            filter=models.Q(status="PENDING")
-        ),
-        hold_amount=Sum(
-            "salary_amount",
-            filter=models.Q(status="HOLD")
-        ),
-        failed_amount=Sum(
-            "salary_amount",
-            filter=models.Q(status="FAILED")
-        ),
+    cursor = request.GET.get("cursor") or None
+    try:
+        transactions, next_cursor = employee_ledger_page(employee, cursor=cursor)
+    except InvalidCursor:
+        cursor = None
+        transactions, next_cursor = employee_ledger_page(employee)
+
+    # Per-year totals, cached until the organisation's transactions or the
+    # employee's batches (e.g. a reversal) change
+    yearly = cached_summary(
+        "employee_ledger",
+        {"employee": employee.id},
+        [
+            data_version(employee.company.organisation_id, "payroll.salarytransaction"),
+            batches_versions(SalaryBatch.objects.filter(transactions__employee=employee)),
+        ],
+        lambda: employee_yearly_summary(employee),
     )
 
-    totals = {k: v or 0 for k, v in totals.items()}
+    totals = {
+        f"{key}_amount": sum((year[key] for year in yearly), Decimal("0"))
+        for key in ("total", "effective_total", "processed", "pending", "hold", "failed")
+    }
 
     context = {
         "employee": employee,
         "transactions": transactions,
+        "next_cursor": next_cursor,
+        "cursor": cursor,
+        "yearly": yearly,
         "totals": totals,
     }
 
@@ -245,6 +219,7 @@ def reverse_batch_confirm(request, batch_id):
 
         batch.status = "REVERSED"
         batch.save(update_fields=["status"])
+        refresh_salary_facts(batch)
 
         SalaryBatchReversal.objects.create(
             batch=batch,
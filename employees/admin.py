@@ -1,4 +1,11 @@
 from django.contrib import admin
 from .models import Employee
+from .utils import record_employee_history
 
-admin.site.register(Employee)
+
+@admin.register(Employee)
+class EmployeeAdmin(admin.ModelAdmin):
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Hand edits are versioned like approved changes
+        record_employee_history([obj])
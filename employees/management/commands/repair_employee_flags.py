@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+
+from employees.models import Employee
+from employees.utils import actual_pending_flags, refresh_pending_flags
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the denormalised pending-request counters and active bank "
+        "account on Employee from the request / bank account tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many employees have drifted.",
+        )
+
+    def handle(self, *args, **options):
+        flags = actual_pending_flags()
+
+        drifted = (
+            Employee.objects
+            .annotate(
+                actual_profile=flags["pending_change_count"],
+                actual_bank=flags["pending_bank_change_count"],
+                # 0 stands in for "no account" so NULLs compare equal
+                current_account=Coalesce("active_bank_account", 0),
+                actual_account=Coalesce(flags["active_bank_account"], 0),
+            )
+            .filter(
+                ~Q(pending_change_count=F("actual_profile"))
+                | ~Q(pending_bank_change_count=F("actual_bank"))
+                | ~Q(current_account=F("actual_account"))
+            )
+            .count()
+        )
+
+        if options["dry_run"]:
+            self.stdout.write(f"{drifted} employees have inconsistent flags.")
+            return
+
+        with transaction.atomic():
+            refresh_pending_flags(Employee.objects.all())
+
+        self.stdout.write(self.style.SUCCESS(f"Repaired {drifted} employees."))
@@ -0,0 +1,63 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_pending_flags(apps, schema_editor):
+    Employee = apps.get_model("employees", "Employee")
+    EmployeeChangeRequest = apps.get_model("employees", "EmployeeChangeRequest")
+    BankChangeRequest = apps.get_model("banking", "BankChangeRequest")
+    EmployeeBankAccount = apps.get_model("banking", "EmployeeBankAccount")
+
+    def pending(model):
+        return Coalesce(
+            Subquery(
+                model.objects
+                .filter(employee=OuterRef("pk"), status="PENDING")
+                .values("employee")
+                .annotate(c=Count("id"))
+                .values("c")
+            ),
+            0,
+        )
+
+    Employee.objects.update(
+        pending_change_count=pending(EmployeeChangeRequest),
+        pending_bank_change_count=pending(BankChangeRequest),
+        active_bank_account=Subquery(
+            EmployeeBankAccount.objects
+            .filter(employee=OuterRef("pk"), is_active=True)
+            .order_by("-effective_from_month", "-id")
+            .values("id")[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banking', '0005_remove_employeebankaccount_unique_active_bank_account_per_employee_and_more'),
+        ('employees', '0004_employeemovement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='active_bank_account',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='banking.employeebankaccount'),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='pending_bank_change_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='pending_change_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_pending_flags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def seed_history(apps, schema_editor):
+    Employee = apps.get_model("employees", "Employee")
+    EmployeeHistory = apps.get_model("employees", "EmployeeHistory")
+
+    EmployeeHistory.objects.bulk_create(
+        (
+            EmployeeHistory(
+                employee_id=employee.id,
+                company_id=employee.company_id,
+                emp_code=employee.emp_code,
+                name=employee.name,
+                joining_date=employee.joining_date,
+                exit_date=employee.exit_date,
+                valid_from=employee.joining_date,
+            )
+            for employee in Employee.objects.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0004_organisationuser_notify_approval_request_and_more'),
+        ('employees', '0005_employee_active_bank_account_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('emp_code', models.CharField(max_length=50)),
+                ('name', models.CharField(max_length=200)),
+                ('joining_date', models.DateField()),
+                ('exit_date', models.DateField(blank=True, null=True)),
+                ('valid_from', models.DateField()),
+                ('valid_to', models.DateField(blank=True, null=True)),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='employee_history', to='companies.company')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='history', to='employees.employee')),
+            ],
+            options={
+                'ordering': ['employee', 'valid_from'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='employeehistory',
+            index=models.Index(fields=['company', 'valid_from', 'valid_to'], name='employees_e_company_6ba239_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeehistory',
+            index=models.Index(fields=['valid_from', 'valid_to'], name='employees_e_valid_f_3fd04d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeehistory',
+            index=models.Index(fields=['employee', 'valid_from'], name='employees_e_employe_c333c3_idx'),
+        ),
+        migrations.RunPython(seed_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:40
+
+import re
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Words of a description, without surrounding punctuation ("E1:" -> "E1")
+TOKEN = re.compile(r"[^\s:;,()'\"]+")
+
+
+def link_audit_logs(apps, schema_editor):
+    # Existing entries name the employee by emp_code in the description but
+    # not the company, and emp_code is only unique per company. An entry is
+    # linked only when a whole word of it is the code of exactly one employee
+    # of the organisation of the user who performed it; anything else
+    # (system entries, ambiguous or unknown codes) stays unlinked.
+    # One pass over the table.
+    Employee = apps.get_model("employees", "Employee")
+    AuditLog = apps.get_model("employees", "AuditLog")
+    OrganisationUser = apps.get_model("companies", "OrganisationUser")
+
+    user_organisation = dict(OrganisationUser.objects.values_list("user_id", "organisation_id"))
+
+    owners = defaultdict(list)
+    for employee_id, organisation_id, emp_code in Employee.objects.values_list(
+        "id", "company__organisation_id", "emp_code"
+    ):
+        owners[organisation_id, emp_code].append(employee_id)
+
+    linked = defaultdict(list)
+    entries = AuditLog.objects.filter(
+        employee__isnull=True, performed_by__isnull=False
+    ).values_list("id", "performed_by_id", "description")
+
+    for log_id, user_id, description in entries.iterator(chunk_size=2000):
+        organisation_id = user_organisation.get(user_id)
+        if organisation_id is None:
+            continue
+        matches = set()
+        for word in TOKEN.findall(description):
+            for candidate in (word, word.rstrip(".")):
+                ids = owners.get((organisation_id, candidate))
+                if ids and len(ids) == 1:
+                    matches.add(ids[0])
+        if len(matches) == 1:
+            linked[matches.pop()].append(log_id)
+
+    for employee_id, log_ids in linked.items():
+        for start in range(0, len(log_ids), 500):
+            AuditLog.objects.filter(id__in=log_ids[start:start + 500]).update(employee_id=employee_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0004_organisationuser_notify_approval_request_and_more'),
+        ('employees', '0006_employeehistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditlog',
+            name='employee',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='audit_logs', to='employees.employee'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['employee', 'created_at'], name='employees_a_employe_21830e_idx'),
+        ),
+        migrations.RunPython(link_audit_logs, migrations.RunPython.noop),
+    ]
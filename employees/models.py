@@ -36,6 +36,19 @@ class Employee(models.Model):
     approved_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL,
                                     related_name="approved_employees")
 
+    # Denormalised approval state, kept in sync by the request / approval
+    # code paths (see employees.utils) so hold checks need no extra queries.
+    # Repair with: python manage.py repair_employee_flags
+    pending_change_count = models.PositiveIntegerField(default=0)
+    pending_bank_change_count = models.PositiveIntegerField(default=0)
+    active_bank_account = models.ForeignKey(
+        "banking.EmployeeBankAccount",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+"
+    )
+
     class Meta:
         unique_together = ("company", "emp_code")
         ordering = ["emp_code"]
@@ -48,6 +61,50 @@ class Employee(models.Model):
         return f"{self.emp_code} - {self.name}"
 
 
+# =========================
+# EFFECTIVE-DATED EMPLOYEE HISTORY
+# =========================
+# One row per version of an employee's company / code / name, valid over
+# [valid_from, valid_to) (valid_to NULL = current). Versions are written by
+# the approval paths (employees.utils.record_employee_history) and take
+# effect from the approval date, so approving a change never rewrites
+# earlier months. Joining / exit dates are effective dates themselves and
+# are kept current on every version.
+class EmployeeHistory(models.Model):
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name="history"
+    )
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.PROTECT,
+        related_name="employee_history"
+    )
+
+    emp_code = models.CharField(max_length=50)
+    name = models.CharField(max_length=200)
+
+    joining_date = models.DateField()
+    exit_date = models.DateField(null=True, blank=True)
+
+    valid_from = models.DateField()
+    valid_to = models.DateField(null=True, blank=True)
+
+    recorded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["employee", "valid_from"]
+        indexes = [
+            models.Index(fields=["company", "valid_from", "valid_to"]),
+            models.Index(fields=["valid_from", "valid_to"]),
+            models.Index(fields=["employee", "valid_from"]),
+        ]
+
+    def __str__(self):
+        return f"{self.emp_code} {self.valid_from} - {self.valid_to or '...'}"
+
+
 # =========================
 # EMPLOYEE DRAFT (ONBOARDING)
 # =========================
@@ -113,8 +170,22 @@ class AuditLog(models.Model):
         null=True
     )
 
+    # Employee the entry is about, when there is one (profile activity)
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="audit_logs"
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["employee", "created_at"]),
+        ]
+
     def __str__(self):
         return f"{self.action} @ {self.created_at}"
 
@@ -19,6 +19,7 @@ urlpatterns = [
     path("<int:employee_id>/change/approve/", views.approve_employee_change, name="approve_employee_change"),
     path("<int:employee_id>/change/reject/", views.reject_employee_change, name="reject_employee_change"),
     path("changes/approval/", views.employee_change_approval_list, name="employee_change_approval_list"),
+    path("changes/approval/bulk/", views.bulk_approve_employee_changes, name="bulk_approve_employee_changes"),
 
     # =========================
     # BANK CHANGE REQUEST
@@ -1,14 +1,219 @@
-from employees.models import Employee, AuditLog
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import transaction, IntegrityError
+from django.db.models import Count, F, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from api.utils import record_queryset_changes
+from dashboard.utils import adjust_approval_badge, invalidate_org_kpis
+from employees.models import Employee, AuditLog, EmployeeChangeRequest, EmployeeHistory
+
+
+# Employee fields that carry a UNIQUE constraint and may be edited via change requests
+UNIQUE_EMPLOYEE_FIELDS = ("uan_number", "esic_number", "document_number")
+
+
+class ChangeConflictError(Exception):
+    """
+    Raised when a set of change requests cannot be approved together.
+    `conflicts` is a list of human readable messages.
+    """
+
+    def __init__(self, conflicts):
+        self.conflicts = conflicts
+        super().__init__("; ".join(conflicts))
+
+
+# =========================
+# DENORMALISED PENDING FLAGS
+# =========================
+# Employee.pending_change_count / pending_bank_change_count / active_bank_account
+# mirror the request tables so hold checks can be answered from the row itself.
+# Every code path that creates or resolves a request must call one of these
+# inside the same transaction.
+
+def bump_pending_counts(employee, profile=0, bank=0):
+    """
+    Atomically add `profile` / `bank` (may be negative) to the pending counters
+    and move the organisation's approval badges by the same amounts.
+    """
+    Employee.objects.filter(id=employee.id).update(
+        pending_change_count=Greatest(F("pending_change_count") + profile, 0),
+        pending_bank_change_count=Greatest(F("pending_bank_change_count") + bank, 0),
+    )
+
+    organisation_id = employee.company.organisation_id
+    invalidate_org_kpis(organisation_id)
+    adjust_approval_badge(organisation_id, "employee_changes", profile)
+    adjust_approval_badge(organisation_id, "bank_changes", bank)
+
+
+def set_active_bank_account(employee, account):
+    """
+    Point the employee at their (new) active bank account.
+    """
+    employees = Employee.objects.filter(id=employee.id)
+    record_queryset_changes(employees, ["active_bank_account"])
+    employees.update(active_bank_account=account)
+    employee.active_bank_account = account
+
+
+def _pending_count(model):
+    return Coalesce(
+        Subquery(
+            model.objects
+            .filter(employee=OuterRef("pk"), status="PENDING")
+            .values("employee")
+            .annotate(c=Count("id"))
+            .values("c")
+        ),
+        0,
+    )
+
+
+def actual_pending_flags():
+    """
+    Expressions computing the true value of every denormalised flag.
+    """
+    from banking.models import BankChangeRequest, EmployeeBankAccount
+
+    return {
+        "pending_change_count": _pending_count(EmployeeChangeRequest),
+        "pending_bank_change_count": _pending_count(BankChangeRequest),
+        "active_bank_account": Subquery(
+            EmployeeBankAccount.objects
+            .filter(employee=OuterRef("pk"), is_active=True)
+            .order_by("-effective_from_month", "-id")
+            .values("id")[:1]
+        ),
+    }
+
+
+def refresh_pending_flags(employees):
+    """
+    Recompute the flags for an Employee queryset with a single UPDATE.
+    Also drops the KPI snapshot of the organisations involved, since every
+    caller has just resolved a request or changed employee data.
+    Returns the number of rows written.
+    """
+    for organisation_id in (
+        employees.order_by().values_list("company__organisation_id", flat=True).distinct()
+    ):
+        invalidate_org_kpis(organisation_id)
+
+    flags = actual_pending_flags()
+
+    # Only the active bank account is published on the change feed
+    record_queryset_changes(
+        employees
+        .annotate(
+            _current=Coalesce("active_bank_account_id", 0),
+            _actual=Coalesce(flags["active_bank_account"], 0),
+        )
+        .exclude(_current=F("_actual")),
+        ["active_bank_account"],
+    )
+
+    return employees.update(**flags)
+
+
+# =========================
+# EFFECTIVE-DATED HISTORY
+# =========================
+# Every approval path that creates or edits an Employee calls
+# record_employee_history in the same transaction.
+
+# Versioned attributes: a change starts a new version from the approval date
+HISTORY_FIELDS = ("company_id", "emp_code", "name")
+
+
+def _history_version(employee, valid_from):
+    return EmployeeHistory(
+        employee_id=employee.id,
+        company_id=employee.company_id,
+        emp_code=employee.emp_code,
+        name=employee.name,
+        joining_date=employee.joining_date,
+        exit_date=employee.exit_date,
+        valid_from=valid_from,
+    )
+
+
+def record_employee_history(employees, effective_date=None):
+    """
+    Bring EmployeeHistory in line with the current state of `employees`
+    (instances or a queryset). A changed company / code / name closes the
+    current version at `effective_date` (default today) and opens a new one;
+    earlier versions are never rewritten. Joining / exit dates are copied
+    onto every version. Uses a fixed number of queries for any batch size.
+    """
+    effective_date = effective_date or timezone.localdate()
+    employees = list(employees)
+
+    versions = defaultdict(list)
+    for row in EmployeeHistory.objects.filter(
+        employee_id__in=[employee.id for employee in employees]
+    ).order_by("valid_from"):
+        versions[row.employee_id].append(row)
+
+    created, updated, deleted = [], {}, []
+
+    for employee in employees:
+        rows = versions[employee.id]
+        if not rows:
+            created.append(_history_version(employee, employee.joining_date))
+            continue
+
+        for row in rows:
+            if (row.joining_date, row.exit_date) != (employee.joining_date, employee.exit_date):
+                row.joining_date, row.exit_date = employee.joining_date, employee.exit_date
+                updated[row.id] = row
+        if rows[0].valid_from > employee.joining_date:
+            # joining date corrected backwards: the first version covers it
+            rows[0].valid_from = employee.joining_date
+            updated[rows[0].id] = rows[0]
+
+        current = rows[-1]
+        if all(getattr(current, field) == getattr(employee, field) for field in HISTORY_FIELDS):
+            continue
+
+        start = max(effective_date, rows[0].valid_from)
+        # versions starting on or after the effective date are superseded
+        while rows and rows[-1].valid_from >= start:
+            row = rows.pop()
+            updated.pop(row.id, None)
+            deleted.append(row.id)
+        if rows:
+            rows[-1].valid_to = start
+            updated[rows[-1].id] = rows[-1]
+        created.append(_history_version(employee, start))
+
+    with transaction.atomic():
+        if deleted:
+            EmployeeHistory.objects.filter(id__in=deleted).delete()
+        if updated:
+            EmployeeHistory.objects.bulk_update(
+                updated.values(),
+                ["joining_date", "exit_date", "valid_from", "valid_to"],
+                batch_size=500,
+            )
+        EmployeeHistory.objects.bulk_create(created, batch_size=500)
+
+    return len(created)
 
 
 def approve_employee(draft, admin_user):
-    Employee.objects.create(
+    employee = Employee.objects.create(
         company=draft.company,
         emp_code=draft.emp_code,
         name=draft.name,
         uan_number=draft.uan_number,
         esic_number=draft.esic_number,
     )
+    record_employee_history([employee])
 
     draft.status = "APPROVED"
     draft.save()
@@ -16,5 +221,231 @@ def approve_employee(draft, admin_user):
     AuditLog.objects.create(
         action="EMPLOYEE_CREATED",
         performed_by=admin_user,
+        employee=employee,
         description=f"Employee {draft.emp_code} approved"
-    )
\ No newline at end of file
+    )
+
+    invalidate_org_kpis(draft.company.organisation_id)
+
+
+def _coerce_change_value(field, value):
+    """
+    Convert a JSON diff value (always a string or None) back into
+    the Python type of the Employee field. An empty value clears the field:
+    None where the column is nullable, "" where it may be blank; a required
+    field raises ValidationError.
+    """
+    model_field = Employee._meta.get_field(field)
+    if value in (None, ""):
+        if model_field.null:
+            return None
+        if model_field.blank and value == "":
+            return ""
+        raise ValidationError(f"{model_field.verbose_name} cannot be empty")
+    return model_field.to_python(value)
+
+
+def _find_unique_conflicts(employees, changed_fields):
+    """
+    Check the final state of every affected employee against each other
+    and against the rest of the table, for all UNIQUE fields.
+    """
+    conflicts = []
+
+    for field in UNIQUE_EMPLOYEE_FIELDS:
+        changed = [
+            emp for emp in employees
+            if field in changed_fields[emp.id] and getattr(emp, field)
+        ]
+        if not changed:
+            continue
+
+        values = Counter(getattr(emp, field) for emp in changed)
+
+        for value, count in values.items():
+            if count > 1:
+                codes = ", ".join(
+                    emp.emp_code for emp in changed if getattr(emp, field) == value
+                )
+                conflicts.append(f"{field} {value} requested for multiple employees ({codes})")
+
+        # Rows that keep their current value: everyone except the employees
+        # whose value for this field is being replaced.
+        taken = (
+            Employee.objects
+            .filter(**{f"{field}__in": list(values)})
+            .exclude(id__in=[emp.id for emp in changed])
+            .values_list(field, "emp_code")
+        )
+        for value, emp_code in taken:
+            conflicts.append(f"{field} {value} already belongs to {emp_code}")
+
+    return conflicts
+
+
+def bulk_approve_change_requests(change_requests, admin_user):
+    """
+    Approve many pending EmployeeChangeRequests in one pass.
+
+    Diffs are applied in request order, employees are written with one
+    bulk_update per distinct field set, requests are marked approved with a
+    single UPDATE and audit rows are batched. Uniqueness conflicts across
+    the whole set are detected up-front; if any exist, ChangeConflictError
+    is raised and nothing is written.
+
+    Returns the number of approved requests.
+    """
+    with transaction.atomic():
+        requests = list(
+            change_requests
+            .filter(status="PENDING")
+            .select_related("employee__company")
+            .select_for_update(of=("self",))
+            .order_by("requested_at", "id")
+        )
+
+        if not requests:
+            return 0
+
+        employees = {}
+        changed_fields = defaultdict(set)
+        conflicts = []
+
+        for req in requests:
+            employee = employees.setdefault(req.employee_id, req.employee)
+
+            for field, values in req.changes.items():
+                try:
+                    new_val = _coerce_change_value(field, values["new"])
+                except ValidationError as exc:
+                    conflicts.append(f"{employee.emp_code}: {'; '.join(exc.messages)}")
+                    continue
+                except (FieldDoesNotExist, KeyError, TypeError):
+                    conflicts.append(f"{employee.emp_code}: invalid value for {field}")
+                    continue
+
+                setattr(employee, field, new_val)
+                changed_fields[employee.id].add(field)
+
+        conflicts += _find_unique_conflicts(employees.values(), changed_fields)
+
+        if conflicts:
+            raise ChangeConflictError(conflicts)
+
+        # Group employees by the exact set of fields they change
+        groups = defaultdict(list)
+        for employee_id, fields in changed_fields.items():
+            groups[tuple(sorted(fields))].append(employees[employee_id])
+
+        try:
+            for fields, objs in groups.items():
+                record_queryset_changes(
+                    Employee.objects.filter(id__in=[obj.id for obj in objs]), fields
+                )
+                Employee.objects.bulk_update(objs, fields, batch_size=500)
+        except IntegrityError:
+            # e.g. two employees swapping an identifier within the same set
+            raise ChangeConflictError(["Approval failed due to a uniqueness conflict."])
+
+        record_employee_history(employees.values())
+
+        EmployeeChangeRequest.objects.filter(
+            id__in=[req.id for req in requests]
+        ).update(
+            status="APPROVED",
+            reviewed_by=admin_user,
+            reviewed_at=timezone.now(),
+        )
+
+        refresh_pending_flags(Employee.objects.filter(id__in=list(employees)))
+
+        for organisation_id, approved in Counter(
+            req.employee.company.organisation_id for req in requests
+        ).items():
+            adjust_approval_badge(organisation_id, "employee_changes", -approved)
+
+        AuditLog.objects.bulk_create(
+            [
+                AuditLog(
+                    action="EMPLOYEE_PROFILE_UPDATED",
+                    performed_by=admin_user,
+                    employee_id=req.employee_id,
+                    description=(
+                        f"Approved profile changes for "
+                        f"{employees[req.employee_id].emp_code}: {req.changes}"
+                    ),
+                )
+                for req in requests
+            ],
+            batch_size=500,
+        )
+
+    return len(requests)
+
+
+# =========================
+# EMPLOYEE PROFILE READ MODEL
+# =========================
+# The profile page reads a bounded slice of each related list, so it costs
+# the same handful of queries however long the employee's history is.
+
+PROFILE_BANK_ACCOUNTS = 10
+PROFILE_AUDIT_LOGS = 20
+
+
+def employee_profile_queryset(organisation):
+    """
+    Employees of the organisation with everything the profile page shows:
+    company and active account joined in; the latest bank accounts and
+    audit entries prefetched as sliced lists (recent_bank_accounts,
+    recent_audit_logs).
+    """
+    from banking.models import EmployeeBankAccount
+
+    return (
+        Employee.objects
+        .filter(company__organisation=organisation)
+        .select_related("company", "active_bank_account__approved_by")
+        .prefetch_related(
+            Prefetch(
+                "bank_accounts",
+                queryset=EmployeeBankAccount.objects
+                .select_related("approved_by")
+                .order_by("-is_active", "-approved_at", "-id")[:PROFILE_BANK_ACCOUNTS],
+                to_attr="recent_bank_accounts",
+            ),
+            Prefetch(
+                "audit_logs",
+                queryset=AuditLog.objects
+                .select_related("performed_by")
+                .order_by("-created_at", "-id")[:PROFILE_AUDIT_LOGS],
+                to_attr="recent_audit_logs",
+            ),
+        )
+    )
+
+
+def employee_profile_summary(employee):
+    """
+    Header figures of the profile: the latest salary and the effective
+    totals (reversed / cancelled left out) from
+    payroll.utils.employee_yearly_summary.
+    """
+    from payroll.models import SalaryTransaction
+    from payroll.utils import employee_yearly_summary
+
+    yearly = employee_yearly_summary(employee)
+    latest = (
+        SalaryTransaction.objects
+        .filter(employee=employee)
+        .order_by("-batch__year", "-batch__month", "-id")
+        .values("salary_amount", "status", month=F("batch__month"), year=F("batch__year"))
+        .first()
+    )
+
+    return {
+        "latest_salary": latest,
+        "salary_months": sum(year["count"] for year in yearly),
+        "total_salary": sum((year["effective_total"] for year in yearly), Decimal("0")),
+        "current_year": yearly[0] if yearly else None,
+    }
@@ -8,14 +8,25 @@ from django.template.defaulttags import now
 from django.db.models import Q
 
 from companies.models import Company
-from payroll.models import SalaryTransaction
+from payroll.models import SalaryBatch, SalaryTransaction
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 
 from banking.forms import BankChangeRequestForm
 from .forms import EmployeeDraftForm
 from .models import Employee, EmployeeDraft, AuditLog, EmployeeChangeRequest
+from .utils import (
+    bulk_approve_change_requests,
+    bump_pending_counts,
+    employee_profile_queryset,
+    employee_profile_summary,
+    record_employee_history,
+    refresh_pending_flags,
+    ChangeConflictError,
+)
 from banking.models import EmployeeBankAccount, BankChangeRequest
+from dashboard.utils import adjust_approval_badge, invalidate_org_kpis
+from reports.cache import batches_versions, cached_summary, data_version
 
 from django.contrib.admin.views.decorators import staff_member_required
 from django.utils import timezone
@@ -35,7 +46,10 @@ def request_bank_change(request, employee_id):
             req.employee = employee
             req.submitted_by = request.user
             req.status = "PENDING"
-            req.save()
+
+            with transaction.atomic():
+                req.save()
+                bump_pending_counts(employee, bank=1)
 
             messages.success(request, "Bank change request submitted.")
             return redirect("employees:employee_profile", employee_id=employee.id)
@@ -85,12 +99,11 @@ def employee_list(request):
 
 @login_required
 def employee_profile(request, employee_id):
-    organisation = request.user.organisation_user.organisation
+    organisation = request.organisation
 
     employee = get_object_or_404(
-        Employee,
+        employee_profile_queryset(organisation),  # ← users can only access their org's employees
         id=employee_id,
-        company__organisation=organisation  # ← users can only access their org's employees
     )
 
     bank_form = BankChangeRequestForm()
@@ -112,7 +125,10 @@ def employee_profile(request, employee_id):
                 bank_request.employee = employee
                 bank_request.submitted_by = request.user
                 bank_request.status = "PENDING"
-                bank_request.save()
+
+                with transaction.atomic():
+                    bank_request.save()
+                    bump_pending_counts(employee, bank=1)
 
                 messages.success(request, "Bank change request submitted.")
                 return redirect(request.path)
@@ -120,28 +136,32 @@ def employee_profile(request, employee_id):
     # --------------------------
     # LOAD EXISTING DATA
     # --------------------------
-    latest_salary = SalaryTransaction.objects.filter(
-        employee=employee
-    ).order_by("-created_at").first()
-
-    bank_accounts = EmployeeBankAccount.objects.filter(
-        employee=employee
-    ).order_by("-is_active", "-approved_at")
-
-    active_account = bank_accounts.filter(is_active=True).first()
-
-    audit_logs = AuditLog.objects.filter(
-        description__icontains=employee.emp_code
-    ).order_by("-created_at")
+    # Header figures are cached until the organisation's salary
+    # transactions or the employee's batches (e.g. a reversal) change
+    summary = cached_summary(
+        "employee_profile",
+        {"employee": employee.id},
+        [
+            data_version(organisation.id, "payroll.salarytransaction"),
+            batches_versions(SalaryBatch.objects.filter(transactions__employee=employee)),
+        ],
+        lambda: employee_profile_summary(employee),
+    )
 
-    pending_changes = employee.change_requests.filter(status="PENDING")
+    # The flag is denormalised on the row, so the common case costs nothing
+    pending_changes = []
+    if employee.pending_change_count:
+        pending_changes = employee.change_requests.filter(
+            status="PENDING"
+        ).select_related("requested_by")
 
     context = {
         "employee": employee,
-        "latest_salary": latest_salary,
-        "bank_accounts": bank_accounts,
-        "active_account": active_account,
-        "audit_logs": audit_logs,
+        "summary": summary,
+        "latest_salary": summary["latest_salary"],
+        "bank_accounts": employee.recent_bank_accounts,
+        "active_account": employee.active_bank_account,
+        "audit_logs": employee.recent_audit_logs,
         "pending_changes": pending_changes,
         "bank_form": bank_form,
     }
@@ -154,7 +174,7 @@ def employee_profile(request, employee_id):
 
 @login_required
 def employee_draft_create(request):
-    organisation = request.user.organisation_user.organisation  # ← get org once
+    organisation = request.organisation  # ← get org once
 
     if request.method == "POST":
         form = EmployeeDraftForm(request.POST)
@@ -188,6 +208,8 @@ def employee_draft_create(request):
             draft.esic_number = draft.esic_number or None
             draft.document_number = draft.document_number or None
             draft.save()
+            invalidate_org_kpis(organisation.id)
+            adjust_approval_badge(organisation.id, "employee_drafts", 1)
 
             messages.success(request, "Employee draft submitted for approval.")
             return redirect("employees:employee_draft_list")
@@ -216,7 +238,7 @@ def download_employee_draft_template(request):
     if not company_id:
         return HttpResponse("Company required", status=400)
 
-    org = request.user.organisation_user.organisation  # ← add this
+    org = request.organisation  # ← add this
     company = get_object_or_404(Company, id=company_id, organisation=org)
 
     last = (
@@ -288,7 +310,7 @@ def upload_employee_drafts(request):
             )
             return redirect("employees:upload_employee_drafts")
 
-        org = request.user.organisation_user.organisation
+        org = request.organisation
 
         created = 0
         skipped = 0
@@ -418,6 +440,10 @@ def upload_employee_drafts(request):
                         "warnings": warnings,
                     })
 
+        if created:
+            invalidate_org_kpis(org.id)
+            adjust_approval_badge(org.id, "employee_drafts", created)
+
         if error_rows:
             request.session["employee_draft_upload_errors"] = error_rows
             messages.warning(request, "Some rows were skipped.")
@@ -486,22 +512,27 @@ def approve_employee_draft(request, draft_id):
             )
         )
 
+        invalidate_org_kpis(draft.company.organisation_id)
+        adjust_approval_badge(draft.company.organisation_id, "employee_drafts", -1)
+
         messages.error(request, f"Draft rejected: {', '.join(conflicts)}")
         return redirect("employees:employee_draft_approval_list")
 
     try:
-        employee = Employee.objects.create(
-            company=draft.company,
-            emp_code=draft.emp_code,
-            name=draft.name,
-            father_name=draft.father_name,
-            uan_number=uan,      # ✅ cleaned value
-            esic_number=esic,    # ✅ cleaned value
-            document_number=doc, # ✅ cleaned value
-            default_salary=draft.default_salary,
-            joining_date=draft.joining_date,
-            approved_by=request.user,
-        )
+        with transaction.atomic():
+            employee = Employee.objects.create(
+                company=draft.company,
+                emp_code=draft.emp_code,
+                name=draft.name,
+                father_name=draft.father_name,
+                uan_number=uan,      # ✅ cleaned value
+                esic_number=esic,    # ✅ cleaned value
+                document_number=doc, # ✅ cleaned value
+                default_salary=draft.default_salary,
+                joining_date=draft.joining_date,
+                approved_by=request.user,
+            )
+            record_employee_history([employee])
     except IntegrityError:
         messages.error(request, "Approval failed due to a uniqueness conflict.")
         return redirect("employees:employee_draft_approval_list")
@@ -512,9 +543,13 @@ def approve_employee_draft(request, draft_id):
     AuditLog.objects.create(
         action="EMPLOYEE_APPROVED",
         performed_by=request.user,
+        employee=employee,
         description=f"Employee {employee.emp_code} approved from draft"
     )
 
+    invalidate_org_kpis(draft.company.organisation_id)
+    adjust_approval_badge(draft.company.organisation_id, "employee_drafts", -1)
+
     messages.success(request, f"Employee {employee.emp_code} approved successfully")
     return redirect("employees:employee_draft_approval_list")
 
@@ -532,6 +567,9 @@ def reject_employee_draft(request, draft_id):
         description=f"Employee draft {draft.emp_code} rejected"
     )
 
+    invalidate_org_kpis(draft.company.organisation_id)
+    adjust_approval_badge(draft.company.organisation_id, "employee_drafts", -1)
+
     messages.error(request, f"Employee draft {draft.emp_code} rejected")
     return redirect("employees:employee_draft_approval_list")
 
@@ -592,16 +630,19 @@ def request_employee_change(request, employee_id):
                     }
 
             if changes:
-                EmployeeChangeRequest.objects.create(
-                    employee=employee,
-                    changes=changes,
-                    requested_by=request.user
-                )
+                with transaction.atomic():
+                    EmployeeChangeRequest.objects.create(
+                        employee=employee,
+                        changes=changes,
+                        requested_by=request.user
+                    )
+                    bump_pending_counts(employee, profile=1)
 
                 AuditLog.objects.create(
                     action="EMPLOYEE_PROFILE_CHANGE_REQUESTED",
                     description=f"{employee.emp_code}: {changes}",
-                    performed_by=request.user
+                    performed_by=request.user,
+                    employee=employee
                 )
 
                 messages.success(request, "Profile change request submitted.")
@@ -621,12 +662,16 @@ def request_employee_change(request, employee_id):
                 req.employee = employee
                 req.submitted_by = request.user
                 req.status = "PENDING"
-                req.save()
+
+                with transaction.atomic():
+                    req.save()
+                    bump_pending_counts(employee, bank=1)
 
                 AuditLog.objects.create(
                     action="BANK_CHANGE_REQUESTED",
                     description=f"{employee.emp_code}: {req.new_bank_name}",
-                    performed_by=request.user
+                    performed_by=request.user,
+                    employee=employee
                 )
 
                 messages.success(request, "Bank change request submitted.")
@@ -666,6 +711,7 @@ def apply_employee_change(request, request_id):
         setattr(employee, field, values["new"])
 
     employee.save()
+    record_employee_history([employee])
 
     change_req.status = "APPLIED"
     change_req.applied_by = request.user
@@ -675,7 +721,8 @@ def apply_employee_change(request, request_id):
     AuditLog.objects.create(
         action="EMPLOYEE_CHANGE_APPLIED",
         description=f"Applied changes to {employee.emp_code}: {change_req.changes}",
-        performed_by=request.user
+        performed_by=request.user,
+        employee=employee
     )
 
     return redirect("employees:employee_profile", employee_id=employee.id)
@@ -705,7 +752,7 @@ def approve_employee_change(request, employee_id):
 
                 setattr(employee, field, new_val)
 
-            employee.save()
+            employee.save(update_fields=list(req.changes))
 
             req.status = "APPROVED"
             req.reviewed_by = request.user
@@ -715,9 +762,16 @@ def approve_employee_change(request, employee_id):
             AuditLog.objects.create(
                 action="EMPLOYEE_PROFILE_UPDATED",
                 performed_by=request.user,
+                employee=employee,
                 description=f"Approved profile changes for {employee.emp_code}: {req.changes}"
             )
 
+        record_employee_history([employee])
+        refresh_pending_flags(Employee.objects.filter(id=employee.id))
+        adjust_approval_badge(
+            employee.company.organisation_id, "employee_changes", -len(change_requests)
+        )
+
     messages.success(request, f"Profile changes approved for {employee.name}.")
     return redirect("employees:employee_profile", employee.id)
 
@@ -738,12 +792,18 @@ def reject_employee_change(request, employee_id):
             AuditLog.objects.create(
                 action="EMPLOYEE_PROFILE_CHANGE_REJECTED",
                 performed_by=request.user,
+                employee=employee,
                 description=(
                     f"Rejected profile change for "
                     f"{employee.emp_code}: {req.changes}"
                 )
             )
 
+        refresh_pending_flags(Employee.objects.filter(id=employee.id))
+        adjust_approval_badge(
+            employee.company.organisation_id, "employee_changes", -len(change_requests)
+        )
+
     return redirect("employees:employee_profile", employee.id)
 
 
@@ -820,6 +880,42 @@ def employee_change_approval_list(request):
     })
 
 
+@login_required
+def bulk_approve_employee_changes(request):
+    """
+    Approve the selected pending change requests (or every pending request
+    of the organisation when `select_all` is posted) in one pass.
+    """
+    if request.method != "POST":
+        return redirect("employees:employee_change_approval_list")
+
+    organisation = request.organisation
+
+    change_requests = EmployeeChangeRequest.objects.filter(
+        employee__company__organisation=organisation
+    )
+
+    if not request.POST.get("select_all"):
+        change_ids = request.POST.getlist("change_ids")
+        if not change_ids:
+            messages.info(request, "No change requests selected.")
+            return redirect("employees:employee_change_approval_list")
+        change_requests = change_requests.filter(id__in=change_ids)
+
+    try:
+        approved = bulk_approve_change_requests(change_requests, request.user)
+    except ChangeConflictError as exc:
+        messages.error(
+            request,
+            "Nothing was approved. Resolve these conflicts first: "
+            + "; ".join(exc.conflicts[:20])
+        )
+        return redirect("employees:employee_change_approval_list")
+
+    messages.success(request, f"{approved} profile change requests approved.")
+    return redirect("employees:employee_change_approval_list")
+
+
 @login_required
 def download_employee_draft_errors(request):
     errors = request.session.get("employee_draft_upload_errors")
@@ -873,7 +969,9 @@ def merge_employee_draft(request, draft_id):
             setattr(employee, field, draft_value)
             merged_fields.append(field)
 
-    employee.save()
+    employee.save(update_fields=merged_fields)
+    if "exit_date" in merged_fields:
+        record_employee_history([employee])
 
     # Mark draft as approved (merged)
     draft.status = "APPROVED"
@@ -883,6 +981,7 @@ def merge_employee_draft(request, draft_id):
     AuditLog.objects.create(
         action="EMPLOYEE_DRAFT_MERGED",
         performed_by=request.user,
+        employee=employee,
         description=(
             f"Draft {draft.emp_code} merged into "
             f"employee {employee.emp_code}. "
@@ -890,6 +989,9 @@ def merge_employee_draft(request, draft_id):
         )
     )
 
+    invalidate_org_kpis(draft.company.organisation_id)
+    adjust_approval_badge(draft.company.organisation_id, "employee_drafts", -1)
+
     messages.success(
         request,
         f"Draft {draft.emp_code} merged into employee {employee.emp_code}."
@@ -918,6 +1020,7 @@ def delete_employee(request, employee_id):
         )
 
         employee.delete()
+        invalidate_org_kpis(employee.company.organisation_id)
         messages.success(request, "Employee deleted permanently.")
         return redirect("employees:employee_list")
 
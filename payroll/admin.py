@@ -3,7 +3,9 @@ from django.db import transaction
 from django.shortcuts import redirect, render
 from django.utils import timezone
 from django.urls import path
-from payroll.models import (SalaryBatch, SalaryTransaction, SalaryBatchReversal)
+from payroll.models import (SalaryBatch, SalaryTransaction, SalaryBatchReversal, StatutoryRate)
+from payroll.utils import rebuild_batch_summary
+from reports.utils import refresh_salary_facts
 
 
 @admin.register(SalaryBatch)
@@ -49,6 +51,7 @@ class SalaryBatchAdmin(admin.ModelAdmin):
 
                 batch.status = "REVERSED"
                 batch.save(update_fields=["status"])
+                refresh_salary_facts(batch)
 
                 SalaryBatchReversal.objects.create(
                     batch=batch,
@@ -94,6 +97,12 @@ class SalaryTransactionAdmin(admin.ModelAdmin):
         "created_at",
     )
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Status / amount may have been edited by hand
+        rebuild_batch_summary(obj.batch)
+        refresh_salary_facts(obj.batch)
+
     def get_readonly_fields(self, request, obj=None):
         """
         Salary fields are ALWAYS locked.
@@ -107,3 +116,16 @@ class SalaryTransactionAdmin(admin.ModelAdmin):
                 "hold_reason",
             )
         return self.readonly_fields
+
+
+@admin.register(StatutoryRate)
+class StatutoryRateAdmin(admin.ModelAdmin):
+    list_display = (
+        "effective_from",
+        "employee_pf_rate",
+        "employer_pf_rate",
+        "pf_wage_ceiling",
+        "employee_esic_rate",
+        "employer_esic_rate",
+        "esic_wage_threshold",
+    )
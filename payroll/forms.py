@@ -45,3 +45,31 @@ class SalaryUploadForm(forms.Form):
         ]
 
         self.fields["year"].initial = current_year
+
+
+class MonthCloseForm(forms.Form):
+
+    month = forms.TypedChoiceField(
+        choices=SalaryUploadForm.MONTH_CHOICES,
+        coerce=int,
+        widget=forms.Select(attrs={"class": "form-select"})
+    )
+
+    year = forms.TypedChoiceField(
+        choices=[],
+        coerce=int,
+        widget=forms.Select(attrs={"class": "form-select"})
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        now = datetime.now()
+
+        self.fields["year"].choices = [
+            (now.year - 1, now.year - 1),
+            (now.year, now.year),
+        ]
+
+        self.fields["month"].initial = now.month
+        self.fields["year"].initial = now.year
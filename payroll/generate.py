@@ -0,0 +1,187 @@
+"""
+Salary batch generator.
+
+Builds a month's SalaryTransactions straight from Employee.default_salary,
+without an uploaded sheet. Salaries are prorated by the days of the month
+between joining and exit, with NumPy date arithmetic on integer paise (as in
+payroll.statutory), hold rules are applied to whole arrays, and rows are
+written with bulk_create.
+"""
+
+from calendar import monthrange
+from datetime import date
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+
+from api.utils import record_queryset_changes
+from banking.utils import accounts_as_of
+from companies.models import Company
+from employees.models import Employee
+from payroll.models import SalaryBatch, SalaryTransaction
+from payroll.statutory import from_paise, to_paise
+from payroll.utils import BatchValidationError, rebuild_batch_summary
+
+
+EMPLOYEE_FIELDS = (
+    "id",
+    "joining_date",
+    "exit_date",
+    "default_salary",
+    "pending_change_count",
+    "pending_bank_change_count",
+    "active_bank_account_id",
+)
+
+
+def month_bounds(month, year):
+    """(first day, last day, number of days) of a payroll month."""
+    days = monthrange(year, month)[1]
+    return date(year, month, 1), date(year, month, days), days
+
+
+def prorate(salary_paise, joining, exit, month, year):
+    """
+    Vectorised proration of monthly salaries (int64 paise) by the days
+    worked between `joining` and `exit` (datetime64[D] arrays, exit NaT
+    when still employed) within the month, rounded half-up to the paisa.
+    Returns (amounts, days_worked).
+    """
+    first, last, days = month_bounds(month, year)
+    first, last = np.datetime64(first, "D"), np.datetime64(last, "D")
+
+    start = np.maximum(joining, first)
+    end = np.where(np.isnat(exit), last, np.minimum(exit, last))
+    worked = np.clip((end - start).astype(np.int64) + 1, 0, days)
+
+    amounts = (np.asarray(salary_paise, dtype=np.int64) * worked + days // 2) // days
+    return amounts, worked
+
+
+def hold_reasons(columns, month, year):
+    """
+    payroll.utils.should_hold_salary for the batch month over whole arrays:
+    the first matching reason per employee, or "" when the salary is not
+    held. Rules and their order must stay in step with it.
+    """
+    first, last, _ = month_bounds(month, year)
+    joining, exit = columns["joining_date"], columns["exit_date"]
+
+    rules = [
+        (exit < np.datetime64(first, "D"), "Employee has exited"),
+        (joining > np.datetime64(date.today(), "D"), "Employee joining date is in future"),
+        (joining > np.datetime64(last, "D"), "Employee joined after payroll month"),
+        (columns["pending_change_count"] > 0, "Pending profile change request"),
+        (columns["pending_bank_change_count"] > 0, "Pending bank change request"),
+        (~columns["has_bank_account"], "No active bank account"),
+    ]
+    return np.select([rule for rule, _ in rules], [reason for _, reason in rules], default="")
+
+
+def _employee_columns(rows):
+    ids, joining, exit, salary, pending, pending_bank, account = zip(*rows)
+    return {
+        "id": np.array(ids, dtype=np.int64),
+        "joining_date": np.array(joining, dtype="datetime64[D]"),
+        "exit_date": np.array(exit, dtype="datetime64[D]"),
+        "salary": to_paise(salary),
+        "pending_change_count": np.array(pending, dtype=np.int64),
+        "pending_bank_change_count": np.array(pending_bank, dtype=np.int64),
+        "has_bank_account": np.array([a is not None for a in account], dtype=bool),
+    }
+
+
+def generate_salary_batch(company, month, year):
+    """
+    Create the month's transactions of `company` from default salaries.
+
+    Every employee employed for at least one day of the month and with a
+    positive default_salary gets a prorated transaction; employees already
+    in the batch (uploaded or generated earlier) are left as they are.
+    Raises BatchValidationError unless the batch is DRAFT.
+    Returns {"batch", "created", "held", "existing", "skipped"}.
+    """
+    first, last, _ = month_bounds(month, year)
+
+    batch = SalaryBatch.objects.filter(company=company, month=month, year=year).first()
+    if batch is not None and batch.status != "DRAFT":
+        raise BatchValidationError(f"The {month}/{year} batch is {batch.status}; only DRAFT batches can be generated into.")
+
+    employed = Employee.objects.filter(
+        Q(exit_date__isnull=True) | Q(exit_date__gte=first),
+        company=company,
+        joining_date__lte=last,
+    )
+    existing = batch.transactions.count() if batch else 0
+    if batch is not None:
+        employed = employed.exclude(salary_transactions__batch=batch)
+
+    candidates = employed.filter(default_salary__gt=0)
+    result = {"batch": batch, "created": 0, "held": 0, "existing": existing,
+              "skipped": employed.exclude(default_salary__gt=0).count()}
+
+    rows = list(candidates.order_by().values_list(*EMPLOYEE_FIELDS))
+    if not rows:
+        return result
+
+    columns = _employee_columns(rows)
+    amounts, worked = prorate(columns["salary"], columns["joining_date"], columns["exit_date"], month, year)
+    reasons = hold_reasons(columns, month, year)
+    accounts = accounts_as_of(candidates, month, year)
+
+    with transaction.atomic():
+        if batch is None:
+            batch, _ = SalaryBatch.objects.get_or_create(company=company, month=month, year=year)
+        last_id = SalaryTransaction.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+        transactions = []
+        for employee_id, amount, days, reason in zip(
+            columns["id"].tolist(), amounts.tolist(), worked.tolist(), reasons.tolist()
+        ):
+            if not days:
+                result["skipped"] += 1
+                continue
+            bank = accounts.get(employee_id)
+            transactions.append(SalaryTransaction(
+                batch=batch,
+                employee_id=employee_id,
+                salary_amount=from_paise(amount),
+                account_number=bank.account_number if bank else None,
+                ifsc=bank.ifsc if bank else None,
+                status="HOLD" if reason else "PENDING",
+                hold_reason=reason or None,
+            ))
+            result["held"] += bool(reason)
+
+        SalaryTransaction.objects.bulk_create(transactions, batch_size=2000)
+
+        # bulk_create sends no post_save, so publish the inserts here
+        record_queryset_changes(
+            SalaryTransaction.objects.filter(batch=batch, id__gt=last_id), None, operation="INSERT"
+        )
+        rebuild_batch_summary(batch)
+
+    result["batch"] = batch
+    result["created"] = len(transactions)
+    return result
+
+
+def generate_salary_batches(organisation, month, year, company_ids=None):
+    """
+    generate_salary_batch for every company of the organisation (or only
+    `company_ids`). A company whose batch cannot be generated into is
+    reported with its error and does not stop the others.
+    Returns [{"company", **result} or {"company", "error"}], by company name.
+    """
+    companies = Company.objects.filter(organisation=organisation).order_by("name", "id")
+    if company_ids:
+        companies = companies.filter(id__in=company_ids)
+
+    results = []
+    for company in companies:
+        try:
+            results.append({"company": company, **generate_salary_batch(company, month, year)})
+        except BatchValidationError as exc:
+            results.append({"company": company, "error": str(exc)})
+    return results
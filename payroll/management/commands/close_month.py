@@ -0,0 +1,86 @@
+import json
+import os
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from companies.models import Company, Organisation
+from payroll.month_close import close_month
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the month-close pipeline (batch, holds, finalize, export, bank "
+        "response) for every company of an organisation and print the report."
+    )
+
+    def add_arguments(self, parser):
+        today = date.today()
+        parser.add_argument("--organisation", type=int, required=True, help="Organisation id.")
+        parser.add_argument("--month", type=int, default=today.month)
+        parser.add_argument("--year", type=int, default=today.year)
+        parser.add_argument(
+            "--company",
+            type=int,
+            action="append",
+            dest="company_ids",
+            help="Only close this company id (may be repeated).",
+        )
+        parser.add_argument("--workers", type=int, help="Companies closed in parallel.")
+        parser.add_argument("--export-dir", help="Directory for the bank files.")
+        parser.add_argument(
+            "--bank-responses",
+            help="Directory of bank response sheets named <site_code>.xlsx.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        try:
+            organisation = Organisation.objects.get(id=options["organisation"])
+        except Organisation.DoesNotExist:
+            raise CommandError(f"Organisation {options['organisation']} does not exist.")
+
+        if not 1 <= options["month"] <= 12:
+            raise CommandError("--month must be between 1 and 12.")
+
+        bank_responses = {}
+        if options["bank_responses"]:
+            for company_id, site_code in Company.objects.filter(
+                organisation=organisation
+            ).values_list("id", "site_code"):
+                path = os.path.join(options["bank_responses"], f"{site_code}.xlsx")
+                if os.path.exists(path):
+                    bank_responses[company_id] = path
+
+        report = close_month(
+            organisation,
+            options["month"],
+            options["year"],
+            bank_responses=bank_responses,
+            export_dir=options["export_dir"],
+            workers=options["workers"],
+            company_ids=options["company_ids"],
+        )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, cls=DjangoJSONEncoder, indent=2))
+            return
+
+        for company in report["companies"]:
+            self.stdout.write(
+                f"{company['company']} (site {company['site_code']}): "
+                f"{company['status']} in {company['seconds']}s"
+            )
+            for stage in company["stages"]:
+                self.stdout.write(
+                    f"  {stage['stage']:<14} {stage['status']:<8} {stage['seconds']:>8.3f}s  {stage['detail']}"
+                )
+
+        counts = ", ".join(f"{status}={n}" for status, n in report["counts"].items())
+        summary = (
+            f"Month close {report['month']}/{report['year']}: {counts} "
+            f"({report['seconds']}s, {report['workers']} workers)"
+        )
+        style = self.style.ERROR if report["counts"]["failed"] else self.style.SUCCESS
+        self.stdout.write(style(summary))
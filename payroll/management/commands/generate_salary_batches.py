@@ -0,0 +1,60 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from companies.models import Organisation
+from payroll.generate import generate_salary_batches
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a month's salary batches from Employee.default_salary "
+        "(prorated by joining / exit dates) for every company of an organisation."
+    )
+
+    def add_arguments(self, parser):
+        today = date.today()
+        parser.add_argument("--organisation", type=int, required=True, help="Organisation id.")
+        parser.add_argument("--month", type=int, default=today.month)
+        parser.add_argument("--year", type=int, default=today.year)
+        parser.add_argument(
+            "--company",
+            type=int,
+            action="append",
+            dest="company_ids",
+            help="Only generate for this company id (may be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            organisation = Organisation.objects.get(id=options["organisation"])
+        except Organisation.DoesNotExist:
+            raise CommandError(f"Organisation {options['organisation']} does not exist.")
+
+        if not 1 <= options["month"] <= 12:
+            raise CommandError("--month must be between 1 and 12.")
+
+        started = time.perf_counter()
+        results = generate_salary_batches(
+            organisation,
+            options["month"],
+            options["year"],
+            company_ids=options["company_ids"],
+        )
+
+        created = 0
+        for result in results:
+            company = result["company"]
+            if "error" in result:
+                self.stdout.write(self.style.ERROR(f"{company.name}: {result['error']}"))
+                continue
+            created += result["created"]
+            self.stdout.write(
+                f"{company.name}: created {result['created']}, on hold {result['held']}, "
+                f"already in batch {result['existing']}, skipped {result['skipped']}"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {created} transactions in {time.perf_counter() - started:.2f}s."
+        ))
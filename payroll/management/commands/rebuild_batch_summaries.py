@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from payroll.models import SalaryBatch
+from payroll.utils import rebuild_batch_summary
+
+
+class Command(BaseCommand):
+    help = "Rebuild BatchStatusSummary rows from SalaryTransaction."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch",
+            type=int,
+            action="append",
+            dest="batch_ids",
+            help="Only rebuild this batch id (may be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        batches = SalaryBatch.objects.all()
+        if options["batch_ids"]:
+            batches = batches.filter(id__in=options["batch_ids"])
+
+        rebuilt = 0
+        for batch in batches.iterator():
+            rebuild_batch_summary(batch)
+            rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt summaries for {rebuilt} batches."))
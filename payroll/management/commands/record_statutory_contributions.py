@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from payroll.models import SalaryBatch
+from payroll.statutory import REPORT_STATUSES, record_batch_contributions
+
+
+class Command(BaseCommand):
+    help = (
+        "Record PF / ESIC contributions for finalized batches that have none "
+        "(e.g. batches finalized before contributions were stored)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch",
+            type=int,
+            action="append",
+            dest="batch_ids",
+            help="Recompute this batch id even if it already has records (may be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_ids"]:
+            batches = SalaryBatch.objects.filter(id__in=options["batch_ids"])
+        else:
+            batches = SalaryBatch.objects.exclude(status="DRAFT").filter(contributions__isnull=True)
+
+        recorded = 0
+        for batch in batches.distinct().iterator():
+            recorded += record_batch_contributions(
+                batch, batch.transactions.filter(status__in=REPORT_STATUSES)
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Recorded {recorded} contributions."))
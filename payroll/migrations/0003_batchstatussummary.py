@@ -0,0 +1,54 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def build_summaries(apps, schema_editor):
+    SalaryTransaction = apps.get_model("payroll", "SalaryTransaction")
+    BatchStatusSummary = apps.get_model("payroll", "BatchStatusSummary")
+
+    rows = (
+        SalaryTransaction.objects
+        .values("batch_id", "status")
+        .annotate(n=Count("id"), amount=Sum("salary_amount"))
+        .order_by()
+    )
+
+    BatchStatusSummary.objects.bulk_create(
+        [
+            BatchStatusSummary(
+                batch_id=row["batch_id"],
+                status=row["status"],
+                txn_count=row["n"],
+                total_amount=row["amount"] or 0,
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0002_alter_salarytransaction_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchStatusSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('DRAFT', 'Draft'), ('READY', 'Ready for Export'), ('EXPORTED', 'Exported to Bank'), ('COMPLETED', 'Completed'), ('REVERSED', 'Reversed'), ('PENDING', 'Pending'), ('HOLD', 'Hold'), ('PROCESSED', 'Processed'), ('FAILED', 'Failed'), ('CANCELLED', 'Cancelled')], max_length=20)),
+                ('txn_count', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_summaries', to='payroll.salarybatch')),
+            ],
+            options={
+                'unique_together': {('batch', 'status')},
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
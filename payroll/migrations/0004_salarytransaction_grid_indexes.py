@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0003_batchstatussummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='salarytransaction',
+            index=models.Index(fields=['batch', 'status', 'id'], name='payroll_sal_batch_i_f1c7e6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salarytransaction',
+            index=models.Index(fields=['batch', 'salary_amount', 'id'], name='payroll_sal_batch_i_ceddd6_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:12
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0004_salarytransaction_grid_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatutoryRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('effective_from', models.DateField(unique=True)),
+                ('employee_pf_rate', models.DecimalField(decimal_places=4, default=Decimal('0.1200'), max_digits=6)),
+                ('employer_pf_rate', models.DecimalField(decimal_places=4, default=Decimal('0.1200'), max_digits=6)),
+                ('pf_wage_ceiling', models.DecimalField(blank=True, decimal_places=2, default=Decimal('15000.00'), max_digits=10, null=True)),
+                ('employee_esic_rate', models.DecimalField(decimal_places=4, default=Decimal('0.0075'), max_digits=6)),
+                ('employer_esic_rate', models.DecimalField(decimal_places=4, default=Decimal('0.0325'), max_digits=6)),
+                ('esic_wage_threshold', models.DecimalField(decimal_places=2, default=Decimal('21000.00'), max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-effective_from'],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0005_statutoryrate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatutoryContribution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gross_salary', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('pf_wage', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('employee_pf', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('employer_pf', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('esic_eligible', models.BooleanField()),
+                ('employee_esic', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('employer_esic', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contributions', to='payroll.salarybatch')),
+                ('rate', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='contributions', to='payroll.statutoryrate')),
+                ('transaction', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='contribution', to='payroll.salarytransaction')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['batch'], name='payroll_sta_batch_i_1cd41f_idx')],
+            },
+        ),
+    ]
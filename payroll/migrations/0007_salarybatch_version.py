@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payroll', '0006_statutorycontribution'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salarybatch',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
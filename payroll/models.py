@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from django.contrib.auth.models import User
 from django.db import models
 from companies.models import Company
@@ -32,6 +34,10 @@ class SalaryBatch(models.Model):
         help_text="Reason for reversing this batch (admin only)"
     )
 
+    # Bumped whenever the batch's transactions change (see payroll.utils);
+    # part of report cache keys
+    version = models.PositiveIntegerField(default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -131,12 +137,48 @@ class SalaryTransaction(models.Model):
             models.Index(fields=["employee"]),
             models.Index(fields=["batch"]),
             models.Index(fields=["status"]),
+            models.Index(fields=["batch", "status", "id"]),
+            models.Index(fields=["batch", "salary_amount", "id"]),
         ]
         ordering = ["-created_at"]
 
     def __str__(self):
         return f"{self.employee.emp_code} | {self.batch.month}/{self.batch.year} | {self.status}"
 
+# =========================
+# Batch status summary (materialised)
+# =========================
+# One row per (batch, status) with the transaction count and amount.
+# Kept up to date by the helpers in payroll.utils whenever transactions
+# are created or change status. Rebuild with:
+#   python manage.py rebuild_batch_summaries
+class BatchStatusSummary(models.Model):
+    batch = models.ForeignKey(
+        SalaryBatch,
+        on_delete=models.CASCADE,
+        related_name="status_summaries"
+    )
+
+    status = models.CharField(
+        max_length=20,
+        choices=SalaryTransaction.STATUS_CHOICES
+    )
+
+    txn_count = models.IntegerField(default=0)
+
+    total_amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0
+    )
+
+    class Meta:
+        unique_together = ("batch", "status")
+
+    def __str__(self):
+        return f"{self.batch} | {self.status}: {self.txn_count}"
+
+
 # =========================
 # Salary Batch reversal by admin
 # =========================
@@ -152,3 +194,80 @@ class SalaryBatchReversal(models.Model):
 
     def __str__(self):
         return f"Reversal: {self.batch}"
+
+
+# =========================
+# Statutory (PF / ESIC) rates
+# =========================
+# Effective-dated: the row with the latest effective_from on or before the
+# payroll month applies. Rates are fractions (0.1200 = 12%); amounts in rupees.
+# Used by payroll.statutory.
+class StatutoryRate(models.Model):
+    effective_from = models.DateField(unique=True)
+
+    employee_pf_rate = models.DecimalField(max_digits=6, decimal_places=4, default=Decimal("0.1200"))
+    employer_pf_rate = models.DecimalField(max_digits=6, decimal_places=4, default=Decimal("0.1200"))
+
+    # PF is computed on min(gross, ceiling); blank = no ceiling
+    pf_wage_ceiling = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True, default=Decimal("15000.00")
+    )
+
+    employee_esic_rate = models.DecimalField(max_digits=6, decimal_places=4, default=Decimal("0.0075"))
+    employer_esic_rate = models.DecimalField(max_digits=6, decimal_places=4, default=Decimal("0.0325"))
+
+    # ESIC applies only when gross <= threshold
+    esic_wage_threshold = models.DecimalField(
+        max_digits=10, decimal_places=2, default=Decimal("21000.00")
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-effective_from"]
+
+    def __str__(self):
+        return f"Statutory rates from {self.effective_from:%b %Y}"
+
+
+# =========================
+# Statutory contributions (recorded at finalize)
+# =========================
+# PF / ESIC of one transaction as computed when its batch was finalized,
+# stamped with the StatutoryRate row that was applied.
+class StatutoryContribution(models.Model):
+    transaction = models.OneToOneField(
+        SalaryTransaction,
+        on_delete=models.CASCADE,
+        related_name="contribution"
+    )
+
+    batch = models.ForeignKey(
+        SalaryBatch,
+        on_delete=models.CASCADE,
+        related_name="contributions"
+    )
+
+    rate = models.ForeignKey(
+        StatutoryRate,
+        on_delete=models.PROTECT,
+        related_name="contributions"
+    )
+
+    gross_salary = models.DecimalField(max_digits=10, decimal_places=2)
+    pf_wage = models.DecimalField(max_digits=10, decimal_places=2)
+    employee_pf = models.DecimalField(max_digits=10, decimal_places=2)
+    employer_pf = models.DecimalField(max_digits=10, decimal_places=2)
+    esic_eligible = models.BooleanField()
+    employee_esic = models.DecimalField(max_digits=10, decimal_places=2)
+    employer_esic = models.DecimalField(max_digits=10, decimal_places=2)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["batch"]),
+        ]
+
+    def __str__(self):
+        return f"{self.transaction} | PF {self.employee_pf} | ESIC {self.employee_esic}"
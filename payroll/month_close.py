@@ -0,0 +1,284 @@
+"""
+Month-close pipeline.
+
+Closes one payroll month for every company of an organisation by running
+the same steps as the batch screens, in order:
+
+  batch          the month's salary batch has been uploaded
+  holds          bank details refreshed and holds re-checked; none may remain
+  finalize       finalize_salary_batch (DRAFT -> EXPORTED, PF / ESIC recorded)
+  export         bank file written under MONTH_CLOSE_EXPORT_DIR
+  bank_response  the bank's response applied, when one is supplied
+
+Companies are independent and run in a thread pool. A stage that finds the
+batch not ready stops that company only. Stages already done (by an earlier
+run or by hand) are skipped, so a close can simply be run again once the
+problems are fixed or the bank has replied.
+"""
+
+import os
+import tempfile
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from django.conf import settings
+from django.db import connection, connections
+from django.utils import timezone
+
+from banking.utils import BANK_RESPONSE_COLUMNS, apply_bank_response
+from companies.models import Company
+from payroll.models import SalaryBatch
+from payroll.utils import (
+    BatchValidationError,
+    finalize_salary_batch,
+    get_batch_summary,
+    reevaluate_batch_holds,
+    refresh_bank_snapshot,
+    write_bank_file,
+)
+
+
+MONTH_CLOSE_WORKERS = getattr(settings, "MONTH_CLOSE_WORKERS", 4)
+MONTH_CLOSE_EXPORT_DIR = getattr(
+    settings, "MONTH_CLOSE_EXPORT_DIR", os.path.join(tempfile.gettempdir(), "salarycore_bank_files")
+)
+
+STAGES = ("batch", "holds", "finalize", "export", "bank_response")
+
+# Stage outcomes
+DONE, SKIPPED, WAITING, FAILED, ERROR = "done", "skipped", "waiting", "failed", "error"
+
+# Company outcomes
+COMPLETED, AWAITING_BANK = "completed", "awaiting_bank"
+
+
+class StageSkipped(Exception):
+    """Nothing to do: the stage was already done."""
+
+
+class StageWaiting(Exception):
+    """The stage needs input that is not there yet (the bank response)."""
+
+
+# =========================
+# STAGES
+# =========================
+# Each stage takes the company's run state and returns a detail string, or
+# raises StageSkipped / StageWaiting / BatchValidationError.
+
+def _stage_batch(run):
+    batch = SalaryBatch.objects.filter(
+        company_id=run["company_id"], month=run["month"], year=run["year"]
+    ).first()
+    if batch is None:
+        raise BatchValidationError(f"No salary batch uploaded for {run['month']}/{run['year']}.")
+    if batch.status == "REVERSED":
+        raise BatchValidationError("The batch was reversed.")
+
+    run["batch"] = batch
+    run["batch_id"] = batch.id
+    count = get_batch_summary(batch)["total_count"]
+    if not count:
+        raise BatchValidationError("The batch has no transactions.")
+    return f"{count} transactions, {batch.status}"
+
+
+def _stage_holds(run):
+    batch = run["batch"]
+    if batch.status != "DRAFT":
+        raise StageSkipped(f"Batch already {batch.status}")
+
+    refreshed = refresh_bank_snapshot(batch)["updated"]
+    held, released = reevaluate_batch_holds(batch)
+    detail = f"{refreshed} bank details refreshed, {held} held, {released} released"
+
+    on_hold = get_batch_summary(batch)["counts"]["HOLD"]
+    if on_hold:
+        raise BatchValidationError(f"{on_hold} transactions on HOLD ({detail}).")
+    return detail
+
+
+def _stage_finalize(run):
+    batch = run["batch"]
+    if batch.status != "DRAFT":
+        raise StageSkipped(f"Batch already {batch.status}")
+
+    finalize_salary_batch(batch)
+    return "Batch finalized and marked as exported"
+
+
+def _stage_export(run):
+    batch = run["batch"]
+    if batch.status != "EXPORTED":
+        raise StageSkipped(f"Batch already {batch.status}")
+
+    directory = os.path.join(run["export_dir"], f"{run['year']}-{run['month']:02d}")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"bank_file_{run['site_code']}.xlsx")
+
+    with open(path, "wb") as out:
+        write_bank_file(out, batch)
+    run["bank_file"] = path
+    return path
+
+
+def _stage_bank_response(run):
+    batch = run["batch"]
+    if batch.status == "COMPLETED":
+        raise StageSkipped("Batch already COMPLETED")
+
+    response = run["bank_response"]
+    if response is None:
+        raise StageWaiting("Waiting for the bank response")
+
+    try:
+        df = pd.read_excel(response)
+    except Exception:
+        raise BatchValidationError("Invalid or corrupted bank response file.")
+    if not BANK_RESPONSE_COLUMNS.issubset(df.columns):
+        raise BatchValidationError("Bank response must contain emp_code and status columns.")
+
+    processed, failed, skipped = apply_bank_response(batch, df)
+    detail = f"Processed: {processed}, Failed: {failed}, Skipped: {skipped}"
+    if batch.status != "COMPLETED":
+        raise StageWaiting(f"{detail}; transactions still awaiting the bank")
+    return detail
+
+
+STAGE_FUNCTIONS = {
+    "batch": _stage_batch,
+    "holds": _stage_holds,
+    "finalize": _stage_finalize,
+    "export": _stage_export,
+    "bank_response": _stage_bank_response,
+}
+
+
+# =========================
+# PIPELINE
+# =========================
+
+def close_company(company, month, year, export_dir=None, bank_response=None):
+    """
+    Run every stage for one company, stopping at the first failure.
+
+    `bank_response` is a path or file object of the bank's response sheet.
+    Returns the company's report: {"company_id", "company", "site_code",
+    "batch_id", "status", "seconds", "stages": [{"stage", "status",
+    "seconds", "detail"}]}.
+    """
+    run = {
+        "company_id": company.id,
+        "site_code": company.site_code,
+        "month": month,
+        "year": year,
+        "export_dir": export_dir or os.path.join(MONTH_CLOSE_EXPORT_DIR, str(company.organisation_id)),
+        "bank_response": bank_response,
+        "batch_id": None,
+    }
+    report = {
+        "company_id": company.id,
+        "company": company.name,
+        "site_code": company.site_code,
+        "batch_id": None,
+        "status": COMPLETED,
+        "stages": [],
+    }
+    started = time.perf_counter()
+
+    for stage in STAGES:
+        stage_started = time.perf_counter()
+        try:
+            status, detail = DONE, STAGE_FUNCTIONS[stage](run)
+        except StageSkipped as exc:
+            status, detail = SKIPPED, str(exc)
+        except StageWaiting as exc:
+            status, detail = WAITING, str(exc)
+        except BatchValidationError as exc:
+            status, detail = FAILED, str(exc)
+        except Exception:
+            status, detail = ERROR, traceback.format_exc(limit=3)
+
+        report["stages"].append({
+            "stage": stage,
+            "status": status,
+            "seconds": round(time.perf_counter() - stage_started, 3),
+            "detail": detail,
+        })
+
+        if status in (FAILED, ERROR):
+            report["status"] = FAILED
+            break
+        if status == WAITING:
+            report["status"] = AWAITING_BANK
+
+    report["batch_id"] = run["batch_id"]
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def _close_in_worker(company, month, year, export_dir, bank_response):
+    try:
+        return close_company(company, month, year, export_dir, bank_response)
+    finally:
+        # Worker threads open their own connections
+        connections.close_all()
+
+
+def close_month(organisation, month, year, bank_responses=None, export_dir=None,
+                workers=None, company_ids=None):
+    """
+    Close a payroll month for every company of the organisation (or only
+    `company_ids`). `bank_responses` maps company id -> bank response file.
+
+    Returns the consolidated report: {"organisation_id", "month", "year",
+    "started_at", "seconds", "workers", "counts": {status: n},
+    "companies": [close_company reports, by company name]}.
+    """
+    bank_responses = bank_responses or {}
+    companies = list(
+        Company.objects.filter(organisation=organisation).order_by("name", "id")
+    )
+    if company_ids:
+        companies = [company for company in companies if company.id in company_ids]
+
+    workers = workers or MONTH_CLOSE_WORKERS
+    if connection.vendor == "sqlite":
+        # SQLite allows one writer at a time; threads would only contend
+        workers = 1
+    workers = max(1, min(workers, len(companies) or 1))
+
+    started_at = timezone.now()
+    started = time.perf_counter()
+
+    if workers == 1:
+        reports = [
+            close_company(company, month, year, export_dir, bank_responses.get(company.id))
+            for company in companies
+        ]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    _close_in_worker, company, month, year, export_dir, bank_responses.get(company.id)
+                )
+                for company in companies
+            ]
+            reports = [future.result() for future in futures]
+
+    counts = {COMPLETED: 0, AWAITING_BANK: 0, FAILED: 0}
+    for report in reports:
+        counts[report["status"]] += 1
+
+    return {
+        "organisation_id": organisation.id,
+        "month": month,
+        "year": year,
+        "started_at": started_at,
+        "seconds": round(time.perf_counter() - started, 3),
+        "workers": workers,
+        "counts": counts,
+        "companies": reports,
+    }
@@ -0,0 +1,267 @@
+"""
+PF / ESIC calculator.
+
+All arithmetic is done on integer paise in NumPy arrays, so a whole batch is
+computed in one pass and every amount is rounded exactly (half-up to the
+paisa). Rates come from the effective-dated StatutoryRate table.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from payroll.models import SalaryTransaction, StatutoryContribution, StatutoryRate
+
+
+# Used when no StatutoryRate row covers the period
+DEFAULT_RATES = StatutoryRate(
+    effective_from=date(2000, 1, 1),
+    employee_pf_rate=Decimal("0.1200"),
+    employer_pf_rate=Decimal("0.1200"),
+    pf_wage_ceiling=Decimal("15000.00"),
+    employee_esic_rate=Decimal("0.0075"),
+    employer_esic_rate=Decimal("0.0325"),
+    esic_wage_threshold=Decimal("21000.00"),
+)
+
+PAISA = Decimal("0.01")
+
+# Rates are stored with 4 decimals -> integer units of 1/10000
+RATE_SCALE = 10000
+
+CONTRIBUTION_FIELDS = (
+    "employee_pf",
+    "employer_pf",
+    "employee_esic",
+    "employer_esic",
+)
+
+
+def rates_for_period(month, year):
+    """
+    StatutoryRate in force for a payroll month (unsaved DEFAULT_RATES if none).
+    """
+    rate = (
+        StatutoryRate.objects
+        .filter(effective_from__lte=date(year, month, 1))
+        .order_by("-effective_from")
+        .first()
+    )
+    return rate or DEFAULT_RATES
+
+
+def to_paise(amounts):
+    """Decimal / numeric rupee amounts -> int64 array of paise (exact)."""
+    return np.fromiter(
+        (int((Decimal(a or 0) * 100).to_integral_value()) for a in amounts),
+        dtype=np.int64,
+    )
+
+
+def from_paise(paise):
+    """Integer paise -> Decimal rupees."""
+    return Decimal(int(paise)).scaleb(-2)
+
+
+def _rate_units(rate):
+    return int(Decimal(rate) * RATE_SCALE)
+
+
+def _apply_rate(wages, rate):
+    # half-up rounding to the paisa on non-negative integers
+    return (wages * _rate_units(rate) + RATE_SCALE // 2) // RATE_SCALE
+
+
+def compute_contributions(gross_paise, rates):
+    """
+    Vectorised PF / ESIC for an array of gross salaries in paise.
+
+    Returns a dict of int64 arrays (paise): pf_wage, employee_pf, employer_pf,
+    employee_esic, employer_esic, total_pf, total_esic; plus the boolean
+    array esic_eligible.
+    """
+    gross = np.asarray(gross_paise, dtype=np.int64)
+
+    pf_wage = gross
+    if rates.pf_wage_ceiling is not None:
+        pf_wage = np.minimum(gross, int(rates.pf_wage_ceiling * 100))
+
+    esic_eligible = gross <= int(rates.esic_wage_threshold * 100)
+    esic_wage = np.where(esic_eligible, gross, 0)
+
+    result = {
+        "pf_wage": pf_wage,
+        "employee_pf": _apply_rate(pf_wage, rates.employee_pf_rate),
+        "employer_pf": _apply_rate(pf_wage, rates.employer_pf_rate),
+        "employee_esic": _apply_rate(esic_wage, rates.employee_esic_rate),
+        "employer_esic": _apply_rate(esic_wage, rates.employer_esic_rate),
+        "esic_eligible": esic_eligible,
+    }
+    result["total_pf"] = result["employee_pf"] + result["employer_pf"]
+    result["total_esic"] = result["employee_esic"] + result["employer_esic"]
+    return result
+
+
+def annotate_contributions(rows, rates, amount_key="salary_amount"):
+    """
+    Add PF / ESIC amounts (Decimal rupees) to each row dict in place and
+    return the totals over all rows, computed once from the same arrays.
+    """
+    gross = to_paise(row[amount_key] for row in rows)
+    result = compute_contributions(gross, rates)
+
+    amount_keys = ("pf_wage",) + CONTRIBUTION_FIELDS + ("total_pf", "total_esic")
+    columns = {key: result[key].tolist() for key in amount_keys}
+    eligible = result["esic_eligible"].tolist()
+
+    for index, row in enumerate(rows):
+        for key in amount_keys:
+            row[key] = from_paise(columns[key][index])
+        row["esic_eligible"] = eligible[index]
+
+    totals = {key: from_paise(result[key].sum()) for key in amount_keys}
+    totals["total_salary"] = from_paise(gross.sum())
+    totals["count"] = len(rows)
+    return totals
+
+
+# =========================
+# RECORDED CONTRIBUTIONS
+# =========================
+# finalize_batch stores each transaction's PF / ESIC once; reports then read
+# indexed SUMs. Totals of COMPLETED batches are cached without expiry and
+# dropped whenever the batch's contributions are rewritten or it reopens.
+
+REPORT_STATUSES = ("COMPLETED", "PROCESSED", "EXPORTED", "READY")
+
+
+def _totals_key(batch_id):
+    return f"payroll:statutory_totals:{batch_id}"
+
+
+def invalidate_contribution_totals(batch_id):
+    transaction.on_commit(lambda: cache.delete(_totals_key(batch_id)))
+
+
+def _saved_rate(rates):
+    """The StatutoryRate row to stamp on records (persists the defaults once)."""
+    if rates.pk:
+        return rates
+    rate, _ = StatutoryRate.objects.get_or_create(
+        effective_from=rates.effective_from,
+        defaults={
+            field: getattr(rates, field)
+            for field in (
+                "employee_pf_rate", "employer_pf_rate", "pf_wage_ceiling",
+                "employee_esic_rate", "employer_esic_rate", "esic_wage_threshold",
+            )
+        },
+    )
+    return rate
+
+
+def record_batch_contributions(batch, transactions=None):
+    """
+    Compute and store PF / ESIC for `transactions` (default: every
+    transaction of the batch) in one vectorised pass and one bulk insert,
+    replacing earlier records of the same transactions.
+    Returns the number of records written.
+    """
+    if transactions is None:
+        transactions = SalaryTransaction.objects.filter(batch=batch)
+
+    rate = _saved_rate(rates_for_period(batch.month, batch.year))
+    rows = list(transactions.order_by().values("id", "salary_amount"))
+    annotate_contributions(rows, rate)
+
+    with transaction.atomic():
+        StatutoryContribution.objects.filter(
+            transaction_id__in=[row["id"] for row in rows]
+        ).delete()
+        StatutoryContribution.objects.bulk_create(
+            [
+                StatutoryContribution(
+                    transaction_id=row["id"],
+                    batch_id=batch.id,
+                    rate=rate,
+                    gross_salary=row["salary_amount"],
+                    pf_wage=row["pf_wage"],
+                    employee_pf=row["employee_pf"],
+                    employer_pf=row["employer_pf"],
+                    esic_eligible=row["esic_eligible"],
+                    employee_esic=row["employee_esic"],
+                    employer_esic=row["employer_esic"],
+                )
+                for row in rows
+            ],
+            batch_size=1000,
+        )
+        invalidate_contribution_totals(batch.id)
+
+    return len(rows)
+
+
+def recorded_contributions(batch):
+    """Recorded contributions of the batch's reportable transactions."""
+    return StatutoryContribution.objects.filter(
+        batch=batch, transaction__status__in=REPORT_STATUSES
+    )
+
+
+def recorded_contribution_rows(batch):
+    """
+    Row dicts of the recorded contributions, shaped like the rows produced
+    by annotate_contributions (plus employee details), by emp_code.
+    """
+    rows = list(
+        recorded_contributions(batch)
+        .order_by("transaction__employee__emp_code")
+        .values(
+            "pf_wage", "employee_pf", "employer_pf", "employee_esic",
+            "employer_esic", "esic_eligible",
+            salary_amount=F("gross_salary"),
+            emp_code=F("transaction__employee__emp_code"),
+            name=F("transaction__employee__name"),
+            uan_number=F("transaction__employee__uan_number"),
+            esic_number=F("transaction__employee__esic_number"),
+        )
+    )
+    for row in rows:
+        row["total_pf"] = row["employee_pf"] + row["employer_pf"]
+        row["total_esic"] = row["employee_esic"] + row["employer_esic"]
+    return rows
+
+
+def batch_contribution_totals(batch):
+    """
+    SUMs of the recorded contributions (same keys as annotate_contributions),
+    or None when the batch has no records. Cached forever once COMPLETED.
+    """
+    key = _totals_key(batch.id)
+    if batch.status == "COMPLETED":
+        totals = cache.get(key)
+        if totals is not None:
+            return totals
+
+    sums = recorded_contributions(batch).aggregate(
+        count=Count("id"),
+        total_salary=Sum("gross_salary"),
+        pf_wage=Sum("pf_wage"),
+        **{field: Sum(field) for field in CONTRIBUTION_FIELDS},
+    )
+    if not sums["count"]:
+        return None
+
+    count = sums.pop("count")
+    totals = {name: (value or Decimal("0")).quantize(PAISA) for name, value in sums.items()}
+    totals["count"] = count
+    totals["total_pf"] = totals["employee_pf"] + totals["employer_pf"]
+    totals["total_esic"] = totals["employee_esic"] + totals["employer_esic"]
+
+    if batch.status == "COMPLETED":
+        cache.set(key, totals, None)
+    return totals
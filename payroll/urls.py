@@ -5,6 +5,7 @@ app_name = "payroll"
 
 urlpatterns = [
     path("upload/", views.upload_salary, name="salary_upload"),
+    path("generate/", views.generate_salary, name="generate_salary"),
     path(
         "template/<int:company_id>/",
         views.download_salary_template,
@@ -12,9 +13,15 @@ urlpatterns = [
     ),
 
     path("batch/<int:batch_id>/", views.salary_batch_detail, name="batch_detail"),
+    path(
+        "batch/<int:batch_id>/transactions/",
+        views.batch_transactions_json,
+        name="batch_transactions_json"
+    ),
     path("batch/<int:batch_id>/finalize/", views.finalize_batch, name="finalize_batch"),
     path("batch/<int:batch_id>/export/", views.export_batch, name="export_batch"),
     path("batches/", views.salary_batch_list, name="batch_list"),
+    path("month-close/", views.month_close, name="month_close"),
 
 
 ]
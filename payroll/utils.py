@@ -1,18 +1,46 @@
-from banking.models import EmployeeBankAccount, BankChangeRequest
-from employees.models import EmployeeChangeRequest
-from payroll.models import SalaryTransaction
+import base64
+import json
+from calendar import monthrange
+from collections import defaultdict
 from datetime import date
+from decimal import Decimal
 
+from django.db import transaction, IntegrityError
+from django.db.models import (
+    Case, Count, DecimalField, ExpressionWrapper, F, IntegerField, Q, Sum, Value, When, Window,
+)
 
-def should_hold_salary(employee, batch_month=None, batch_year=None):
+from api.utils import record_queryset_changes
+from banking.utils import account_as_of
+from dashboard.utils import invalidate_batch_kpis
+from payroll.models import SalaryBatch, SalaryTransaction, BatchStatusSummary
+from payroll.statutory import record_batch_contributions
+from reports.export import Column, Sheet, write_export
+from reports.utils import FACT_BATCH_STATUSES, refresh_salary_facts
+
+
+def should_hold_salary(employee, batch_month=None, batch_year=None, has_bank_account=None):
     """
-    Returns (True, reason) if salary must be put on HOLD
+    Returns (True, reason) if salary must be put on HOLD.
+    Reads only the employee row (see the denormalised flags on Employee).
+
+    Given the batch month, exit and joining are judged against the month
+    as a whole (an employee who worked part of it is paid for those days):
+    only an exit before the month starts or a joining after it ends holds
+    the salary. Without it any exit holds.
+
+    `has_bank_account` says whether an account pays the batch month (see
+    banking.utils.accounts_as_of); left out, the current account decides.
     """
+    month_start = month_end = None
+    if batch_month and batch_year:
+        month_start = date(batch_year, batch_month, 1)
+        month_end = date(batch_year, batch_month, monthrange(batch_year, batch_month)[1])
 
     # ------------------------------------------------
     # 1️⃣ Employee exited
     # ------------------------------------------------
-    if employee.exit_date:
+    if employee.exit_date and (month_start is None or employee.exit_date < month_start):
         return True, "Employee has exited"
 
     # ------------------------------------------------
@@ -25,39 +53,27 @@ def should_hold_salary(employee, batch_month=None, batch_year=None):
     # ------------------------------------------------
     # 3️⃣ Joined after payroll month
     # ------------------------------------------------
-    if batch_month and batch_year:
-        payroll_date = date(batch_year, batch_month, 1)
-
-        if employee.joining_date > payroll_date:
-            return True, "Employee joined after payroll month"
+    if month_end and employee.joining_date > month_end:
+        return True, "Employee joined after payroll month"
 
     # ------------------------------------------------
     # 4️⃣ Pending profile change
     # ------------------------------------------------
-    if EmployeeChangeRequest.objects.filter(
-        employee=employee,
-        status="PENDING"
-    ).exists():
+    if employee.pending_change_count:
         return True, "Pending profile change request"
 
     # ------------------------------------------------
     # 5️⃣ Pending bank change
     # ------------------------------------------------
-    if BankChangeRequest.objects.filter(
-        employee=employee,
-        status="PENDING"
-    ).exists():
+    if employee.pending_bank_change_count:
         return True, "Pending bank change request"
 
     # ------------------------------------------------
     # 6️⃣ No active bank account
     # ------------------------------------------------
-    active_bank = EmployeeBankAccount.objects.filter(
-        employee=employee,
-        is_active=True
-    ).first()
-
-    if not active_bank:
+    if has_bank_account is None:
+        has_bank_account = bool(employee.active_bank_account_id)
+    if not has_bank_account:
         return True, "No active bank account"
 
     return False, None
@@ -73,12 +89,641 @@ def release_salary_holds(employee):
         status="HOLD"
     )
 
-    for txn in qs:
-        txn.status = "PENDING"
-        txn.hold_reason = None
-        txn.save(update_fields=["status", "hold_reason"])
+    transition_transactions(qs, "PENDING", hold_reason=None)
 
 
 def assert_batch_not_reversed(batch):
     if batch.status == "REVERSED":
         raise Exception("Batch reversed")
+
+
+# =========================
+# BATCH STATUS SUMMARY
+# =========================
+# BatchStatusSummary holds (count, amount) per batch and status. Every code
+# path that creates transactions or changes their status goes through one
+# of the helpers below so the summary never needs a rescan of the batch.
+
+def bump_batch_version(batch_id):
+    """
+    Mark a batch's transactions as changed (invalidates cached reports).
+    """
+    SalaryBatch.objects.filter(id=batch_id).update(version=F("version") + 1)
+    invalidate_batch_kpis(batch_id)
+
+
+def apply_summary_delta(batch_id, deltas):
+    """
+    Add {status: [count, amount]} deltas to the summary rows of a batch.
+    """
+    bump_batch_version(batch_id)
+
+    for status, (count, amount) in deltas.items():
+        if not count and not amount:
+            continue
+
+        updated = BatchStatusSummary.objects.filter(
+            batch_id=batch_id,
+            status=status
+        ).update(
+            txn_count=F("txn_count") + count,
+            total_amount=F("total_amount") + amount,
+        )
+
+        if updated:
+            continue
+
+        try:
+            with transaction.atomic():
+                BatchStatusSummary.objects.create(
+                    batch_id=batch_id,
+                    status=status,
+                    txn_count=count,
+                    total_amount=amount,
+                )
+        except IntegrityError:
+            # Created concurrently — fall back to the increment
+            BatchStatusSummary.objects.filter(
+                batch_id=batch_id,
+                status=status
+            ).update(
+                txn_count=F("txn_count") + count,
+                total_amount=F("total_amount") + amount,
+            )
+
+
+def new_summary_delta():
+    return defaultdict(lambda: [0, Decimal("0")])
+
+
+def record_status_move(deltas, old_status, new_status, amount):
+    """
+    Accumulate one transaction moving from old_status to new_status.
+    Pass old_status=None for a newly created transaction.
+    """
+    if old_status == new_status:
+        return
+    if old_status is not None:
+        deltas[old_status][0] -= 1
+        deltas[old_status][1] -= amount
+    deltas[new_status][0] += 1
+    deltas[new_status][1] += amount
+
+
+def set_transaction_status(txn, status, **fields):
+    """
+    Change the status of a single transaction and keep the summary in step.
+    """
+    old_status = txn.status
+    txn.status = status
+    for name, value in fields.items():
+        setattr(txn, name, value)
+
+    with transaction.atomic():
+        txn.save(update_fields=["status", *fields])
+
+        deltas = new_summary_delta()
+        record_status_move(deltas, old_status, status, txn.salary_amount)
+        apply_summary_delta(txn.batch_id, deltas)
+
+
+def transition_transactions(queryset, status, **fields):
+    """
+    Move every transaction in `queryset` to `status` with one UPDATE,
+    shift the summary rows by the grouped amounts being moved and refresh
+    the salary facts of the exported / completed batches touched.
+    Returns the number of updated rows.
+    """
+    with transaction.atomic():
+        moving = (
+            queryset
+            .exclude(status=status)
+            .values("batch_id", "status")
+            .annotate(n=Count("id"), amount=Sum("salary_amount"))
+            .order_by()
+        )
+
+        deltas_by_batch = defaultdict(new_summary_delta)
+        for row in moving:
+            deltas = deltas_by_batch[row["batch_id"]]
+            deltas[row["status"]][0] -= row["n"]
+            deltas[row["status"]][1] -= row["amount"] or 0
+            deltas[status][0] += row["n"]
+            deltas[status][1] += row["amount"] or 0
+
+        record_queryset_changes(queryset, ["status", *fields])
+        updated = queryset.update(status=status, **fields)
+
+        for batch_id, deltas in deltas_by_batch.items():
+            apply_summary_delta(batch_id, deltas)
+
+        for batch in SalaryBatch.objects.filter(id__in=deltas_by_batch, status__in=FACT_BATCH_STATUSES):
+            refresh_salary_facts(batch)
+
+    return updated
+
+
+# Bulk status actions: action -> (statuses it may move from, target status)
+BULK_STATUS_ACTIONS = {
+    "hold": (("PENDING", "READY"), "HOLD"),
+    "unhold": (("HOLD",), "PENDING"),
+    "mark_ready": (("PENDING",), "READY"),
+}
+
+
+def bulk_status_action(batch, action, transaction_ids=None, status=None, emp_code=None,
+                       emp_codes=None, hold_reason=None):
+    """
+    Apply a BULK_STATUS_ACTIONS action to the batch's transactions selected
+    by id, by the grid filters (status / emp_code prefix) and / or by a list
+    of emp codes, as one guarded UPDATE through transition_transactions.
+    Returns (updated, skipped): skipped rows were selected but their status
+    does not allow the action.
+    """
+    sources, target = BULK_STATUS_ACTIONS[action]
+
+    selected = SalaryTransaction.objects.filter(batch=batch)
+    if transaction_ids is not None:
+        selected = selected.filter(id__in=transaction_ids)
+    if status:
+        selected = selected.filter(status=status)
+    if emp_code:
+        selected = selected.filter(employee__emp_code__startswith=emp_code)
+    if emp_codes:
+        selected = selected.filter(employee__emp_code__in=emp_codes)
+
+    fields = {}
+    if target == "HOLD":
+        fields["hold_reason"] = hold_reason
+    elif action == "unhold":
+        fields["hold_reason"] = None
+
+    with transaction.atomic():
+        total = selected.count()
+        updated = transition_transactions(selected.filter(status__in=sources), target, **fields)
+
+    return updated, total - updated
+
+
+def rebuild_batch_summary(batch):
+    """
+    Recompute the summary rows of one batch from its transactions.
+    """
+    rows = (
+        SalaryTransaction.objects
+        .filter(batch=batch)
+        .values("status")
+        .annotate(n=Count("id"), amount=Sum("salary_amount"))
+        .order_by()
+    )
+
+    bump_batch_version(batch.id)
+
+    with transaction.atomic():
+        BatchStatusSummary.objects.filter(batch=batch).delete()
+        BatchStatusSummary.objects.bulk_create([
+            BatchStatusSummary(
+                batch=batch,
+                status=row["status"],
+                txn_count=row["n"],
+                total_amount=row["amount"] or 0,
+            )
+            for row in rows
+        ])
+
+
+def _empty_summary():
+    return {"counts": defaultdict(int), "amounts": defaultdict(Decimal)}
+
+
+def _finish_summary(summary):
+    summary["total_count"] = sum(summary["counts"].values())
+    summary["total_amount"] = sum(summary["amounts"].values(), Decimal("0"))
+    return summary
+
+
+def get_batch_summary(batch):
+    """
+    Read the materialised summary of a batch with a single query.
+
+    Returns {"counts": {status: n}, "amounts": {status: amount},
+             "total_count": n, "total_amount": amount};
+    statuses without transactions read as 0.
+    """
+    return get_batch_summaries([batch.id])[batch.id]
+
+
+def get_batch_summaries(batch_ids):
+    """
+    Summaries (as get_batch_summary) of several batches with a single query,
+    keyed by batch id.
+    """
+    summaries = {batch_id: _empty_summary() for batch_id in batch_ids}
+
+    for row in BatchStatusSummary.objects.filter(batch_id__in=batch_ids).values(
+        "batch_id", "status", "txn_count", "total_amount"
+    ):
+        summary = summaries[row["batch_id"]]
+        summary["counts"][row["status"]] = row["txn_count"]
+        summary["amounts"][row["status"]] = row["total_amount"]
+
+    return {batch_id: _finish_summary(summary) for batch_id, summary in summaries.items()}
+
+
+# =========================
+# BANK SNAPSHOT REFRESH
+# =========================
+# Transactions carry a copy of the employee's account number / IFSC taken at
+# upload. Refreshing re-copies the account in force for the batch month
+# (banking.utils) into every transaction not yet sent to the bank with one
+# correlated-subquery UPDATE.
+
+SNAPSHOT_STATUSES = ("DRAFT", "PENDING", "HOLD", "READY", "FAILED")
+
+# Holds the refresh may lift once the bank details are in order;
+# manual holds are left alone
+BANK_HOLD_REASONS = ("No active bank account", "Pending bank change request")
+
+
+def refresh_bank_snapshot(batch, reevaluate_holds=False):
+    """
+    Copy the account number and IFSC in force for the batch month into
+    the batch's unsent transactions, touching only rows whose snapshot
+    differs.
+
+    With reevaluate_holds, the changed rows are re-checked against
+    should_hold_salary: PENDING / READY rows that now need a hold are held,
+    bank-related holds that no longer apply are released.
+
+    Returns {"updated", "missing", "held", "released"}; missing rows have no
+    account for the month and keep their old snapshot.
+    """
+    rows = (
+        SalaryTransaction.objects
+        .filter(batch=batch, status__in=SNAPSHOT_STATUSES)
+        .annotate(
+            month_account_number=account_as_of("account_number", batch.month, batch.year),
+            month_ifsc=account_as_of("ifsc", batch.month, batch.year),
+        )
+    )
+    stale = rows.filter(month_account_number__isnull=False).filter(
+        Q(account_number__isnull=True)
+        | Q(ifsc__isnull=True)
+        | ~Q(account_number=F("month_account_number"))
+        | ~Q(ifsc=F("month_ifsc"))
+    )
+
+    result = {"updated": 0, "missing": 0, "held": 0, "released": 0}
+
+    with transaction.atomic():
+        result["missing"] = rows.filter(month_account_number__isnull=True).count()
+
+        if reevaluate_holds:
+            changed = list(stale.values("id", "employee_id", "status", "hold_reason"))
+
+        record_queryset_changes(stale, ["account_number", "ifsc"])
+        result["updated"] = stale.update(
+            account_number=account_as_of("account_number", batch.month, batch.year),
+            ifsc=account_as_of("ifsc", batch.month, batch.year),
+        )
+        if not result["updated"]:
+            return result
+        bump_batch_version(batch.id)
+
+        if reevaluate_holds:
+            held, released = _reevaluate_holds(batch, changed)
+            result["held"], result["released"] = held, released
+
+    return result
+
+
+def reevaluate_batch_holds(batch):
+    """
+    Re-check every PENDING / READY / HOLD transaction of the batch against
+    should_hold_salary (as refresh_bank_snapshot does for changed rows).
+    Returns (held, released).
+    """
+    rows = list(
+        batch.transactions
+        .filter(status__in=("PENDING", "READY", "HOLD"))
+        .values("id", "employee_id", "status", "hold_reason")
+    )
+    return _reevaluate_holds(batch, rows)
+
+
+def _reevaluate_holds(batch, rows):
+    from employees.models import Employee
+
+    employees = Employee.objects.in_bulk({row["employee_id"] for row in rows})
+
+    to_hold = defaultdict(list)
+    to_release = []
+    for row in rows:
+        if row["status"] not in ("PENDING", "READY", "HOLD"):
+            continue
+        hold, reason = should_hold_salary(employees[row["employee_id"]], batch.month, batch.year)
+        if hold and row["status"] != "HOLD":
+            to_hold[reason].append(row["id"])
+        elif not hold and row["status"] == "HOLD" and row["hold_reason"] in BANK_HOLD_REASONS:
+            to_release.append(row["id"])
+
+    held = sum(
+        transition_transactions(SalaryTransaction.objects.filter(id__in=ids), "HOLD", hold_reason=reason)
+        for reason, ids in to_hold.items()
+    )
+    released = 0
+    if to_release:
+        released = transition_transactions(
+            SalaryTransaction.objects.filter(id__in=to_release), "PENDING", hold_reason=None
+        )
+    return held, released
+
+
+# =========================
+# KEYSET PAGINATION
+# =========================
+# Pages are addressed by an opaque cursor holding the (sort value, id) of
+# the last row served, so fetching any page is an index range scan of
+# page_size rows no matter how deep into the result set it is.
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(value, pk):
+    raw = json.dumps([value if value is None else str(value), pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return value, int(pk)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor.")
+
+
+def keyset_page(queryset, sort_field="id", cursor=None, page_size=50, descending=False):
+    """
+    One page of `queryset` ordered by (sort_field, id).
+
+    `queryset` may be a values() queryset; `sort_field` must be selected
+    by it when it is not "id". Returns (rows, next_cursor); next_cursor is
+    None on the last page.
+    """
+    direction = "lt" if descending else "gt"
+    prefix = "-" if descending else ""
+
+    if cursor:
+        value, pk = decode_cursor(cursor)
+        if sort_field == "id":
+            queryset = queryset.filter(**{f"id__{direction}": pk})
+        else:
+            queryset = queryset.filter(
+                Q(**{f"{sort_field}__{direction}": value})
+                | Q(**{sort_field: value, f"id__{direction}": pk})
+            )
+
+    ordering = [f"{prefix}id"] if sort_field == "id" else [f"{prefix}{sort_field}", f"{prefix}id"]
+    rows = list(queryset.order_by(*ordering)[:page_size + 1])
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        get = last.get if isinstance(last, dict) else lambda name: getattr(last, name)
+        next_cursor = encode_cursor(get(sort_field), get("id"))
+
+    return rows, next_cursor
+
+
+# =========================
+# BATCH TRANSACTION GRID
+# =========================
+
+TRANSACTION_GRID_PAGE_SIZE = 100
+
+# Sort keys accepted by the grid -> indexed column
+TRANSACTION_GRID_SORTS = {
+    "id": "id",
+    "emp_code": "employee__emp_code",
+    "amount": "salary_amount",
+}
+
+TRANSACTION_GRID_FIELDS = (
+    "id",
+    "employee_id",
+    "employee__emp_code",
+    "employee__name",
+    "salary_amount",
+    "account_number",
+    "ifsc",
+    "status",
+    "hold_reason",
+    "failure_reason",
+    "utr",
+)
+
+
+def batch_transaction_page(batch, status=None, emp_code=None, sort="id", cursor=None,
+                           page_size=TRANSACTION_GRID_PAGE_SIZE):
+    """
+    Filtered, keyset-paginated rows (dicts) of a batch's transactions.
+
+    `sort` is a key of TRANSACTION_GRID_SORTS, optionally prefixed with "-".
+    Raises InvalidCursor for a malformed cursor or unknown sort key.
+    """
+    descending = sort.startswith("-")
+    sort_field = TRANSACTION_GRID_SORTS.get(sort.lstrip("-"))
+    if sort_field is None:
+        raise InvalidCursor(f"Unknown sort: {sort}")
+
+    queryset = SalaryTransaction.objects.filter(batch=batch)
+    if status:
+        queryset = queryset.filter(status=status)
+    if emp_code:
+        queryset = queryset.filter(employee__emp_code__startswith=emp_code)
+
+    rows, next_cursor = keyset_page(
+        queryset.values(*TRANSACTION_GRID_FIELDS),
+        sort_field=sort_field,
+        cursor=cursor,
+        page_size=page_size,
+        descending=descending,
+    )
+
+    for row in rows:
+        row["emp_code"] = row.pop("employee__emp_code")
+        row["name"] = row.pop("employee__name")
+
+    return rows, next_cursor
+
+
+# =========================
+# EMPLOYEE SALARY LEDGER
+# =========================
+# An employee's transactions newest first, keyset-paginated by payroll
+# period, with the running total and the year-to-date total computed by
+# window functions. The page cursor only removes newer rows, so the windows
+# (which sum from the oldest row up) stay correct on every page.
+
+LEDGER_PAGE_SIZE = 24
+
+# Voided amounts are listed but not counted in the effective totals (running,
+# year-to-date, effective_total); `total` keeps every amount. Reversal marks
+# the batch, not its transactions, so both are checked.
+LEDGER_VOID_STATUSES = ("REVERSED", "CANCELLED")
+
+LEDGER_FIELDS = (
+    "id",
+    "period",
+    "batch__month",
+    "batch__year",
+    "salary_amount",
+    "status",
+    "account_number",
+    "utr",
+    "running_total",
+    "year_to_date",
+)
+
+
+def _counted_amount():
+    return Case(
+        When(
+            Q(status__in=LEDGER_VOID_STATUSES) | Q(batch__status="REVERSED"),
+            then=Value(Decimal("0")),
+        ),
+        default=F("salary_amount"),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def employee_ledger_page(employee, cursor=None, page_size=LEDGER_PAGE_SIZE):
+    """
+    One page of an employee's ledger rows (dicts), newest period first,
+    each with running_total and year_to_date. Returns (rows, next_cursor);
+    raises InvalidCursor for a malformed cursor.
+    """
+    queryset = (
+        SalaryTransaction.objects
+        .filter(employee=employee)
+        .annotate(
+            period=ExpressionWrapper(F("batch__year") * 100 + F("batch__month"), output_field=IntegerField()),
+            running_total=Window(
+                Sum(_counted_amount()),
+                order_by=[F("batch__year").asc(), F("batch__month").asc(), F("id").asc()],
+            ),
+            year_to_date=Window(
+                Sum(_counted_amount()),
+                partition_by=[F("batch__year")],
+                order_by=[F("batch__month").asc(), F("id").asc()],
+            ),
+        )
+        .values(*LEDGER_FIELDS)
+    )
+
+    rows, next_cursor = keyset_page(
+        queryset,
+        sort_field="period",
+        cursor=cursor,
+        page_size=page_size,
+        descending=True,
+    )
+
+    for row in rows:
+        row["month"] = row.pop("batch__month")
+        row["year"] = row.pop("batch__year")
+
+    return rows, next_cursor
+
+
+def employee_yearly_summary(employee):
+    """
+    Per-year totals of an employee's transactions, newest year first:
+    [{"year", "count", "total", "effective_total", "processed", "pending",
+    "hold", "failed"}]. `total` is every amount, `effective_total` leaves
+    out reversed / cancelled ones (including those of reversed batches).
+    """
+    rows = (
+        SalaryTransaction.objects
+        .filter(employee=employee)
+        .values(year=F("batch__year"))
+        .annotate(
+            count=Count("id"),
+            total=Sum("salary_amount"),
+            effective_total=Sum(_counted_amount()),
+            processed=Sum("salary_amount", filter=Q(status="PROCESSED")),
+            pending=Sum("salary_amount", filter=Q(status="PENDING")),
+            hold=Sum("salary_amount", filter=Q(status="HOLD")),
+            failed=Sum("salary_amount", filter=Q(status="FAILED")),
+        )
+        .order_by("-year")
+    )
+    rows = list(rows)
+    for row in rows:
+        for key in ("total", "effective_total", "processed", "pending", "hold", "failed"):
+            row[key] = row[key] or Decimal("0")
+    return rows
+
+
+# =========================
+# FINALIZE / BANK FILE
+# =========================
+# Shared by the batch views and the month-close pipeline (payroll.month_close).
+
+class BatchValidationError(Exception):
+    """The batch is not in a state that allows the requested step."""
+
+
+BANK_FILE_COLUMNS = [
+    Column("Emp Code"),
+    Column("Employee Name"),
+    Column("Account Number"),
+    Column("IFSC"),
+    Column("Salary", "money"),
+]
+
+
+def finalize_salary_batch(batch):
+    """
+    Validate a DRAFT batch and mark it exported: PENDING transactions move
+    to EXPORTED and their PF / ESIC is recorded.
+    Raises BatchValidationError when the batch is not ready.
+    """
+    if batch.status != "DRAFT":
+        raise BatchValidationError("Only draft batches can be finalized.")
+
+    if not batch.transactions.exists():
+        raise BatchValidationError("Cannot finalize an empty batch.")
+
+    if batch.transactions.filter(status="HOLD").exists():
+        raise BatchValidationError("Resolve all HOLD transactions before finalizing.")
+
+    if batch.transactions.filter(account_number__isnull=True).exists():
+        raise BatchValidationError("Some employees are missing bank account details.")
+
+    with transaction.atomic():
+        transition_transactions(batch.transactions.filter(status="PENDING"), "EXPORTED")
+        record_batch_contributions(batch, batch.transactions.filter(status="EXPORTED"))
+        batch.status = "EXPORTED"
+        batch.save(update_fields=["status"])
+        refresh_salary_facts(batch)
+
+
+def write_bank_file(out, batch, fmt="xlsx"):
+    """
+    Stream the bank payment file of an EXPORTED batch into the binary file
+    object `out`. Raises BatchValidationError for other batches.
+    """
+    if batch.status != "EXPORTED":
+        raise BatchValidationError("Only exported batches can generate a bank file.")
+
+    rows = (
+        batch.transactions
+        .filter(status="EXPORTED")
+        .order_by("employee__emp_code", "id")
+        .values_list("employee__emp_code", "employee__name", "account_number", "ifsc", "salary_amount")
+        .iterator(chunk_size=2000)
+    )
+    write_export(out, [Sheet("Bank File", BANK_FILE_COLUMNS, rows)], fmt)
@@ -1,22 +1,38 @@
 import pandas as pd
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.core.paginator import Paginator
 from django.db import transaction
 
+from accounts.permissions import perm_required
 from companies.models import Company
 from employees.models import Employee
 from banking.models import EmployeeBankAccount
+from banking.utils import accounts_as_of
 from payroll.models import SalaryBatch, SalaryTransaction
-from payroll.forms import SalaryUploadForm
-from payroll.utils import should_hold_salary
+from payroll.forms import MonthCloseForm, SalaryUploadForm
+from payroll.generate import generate_salary_batches
+from payroll.month_close import close_month
+from reports.export import CONTENT_TYPES
+from payroll.utils import (
+    should_hold_salary,
+    get_batch_summary,
+    get_batch_summaries,
+    rebuild_batch_summary,
+    batch_transaction_page,
+    finalize_salary_batch,
+    write_bank_file,
+    BatchValidationError,
+    InvalidCursor,
+)
 
 
 @login_required
 def upload_salary(request):
 
-    organisation = request.user.organisation_user.organisation
+    organisation = request.organisation
 
     companies = Company.objects.filter(
         organisation=organisation
@@ -93,6 +109,12 @@ def upload_salary(request):
         updated = 0
         skipped = 0
 
+        # One query for every employee of the company (hold flags come along
+        # with the row) and one for the accounts paying this month.
+        company_employees = Employee.objects.filter(company=company)
+        employees = {emp.emp_code: emp for emp in company_employees}
+        accounts = accounts_as_of(company_employees, int(month), int(year))
+
         # -----------------------------
         # Process Rows
         # -----------------------------
@@ -112,21 +134,17 @@ def upload_salary(request):
                     skipped += 1
                     continue
 
-                try:
-                    employee = Employee.objects.get(
-                        emp_code=emp_code,
-                        company=company
-                    )
-                except Employee.DoesNotExist:
+                employee = employees.get(emp_code)
+                if employee is None:
                     skipped += 1
                     continue
 
-                hold, reason = should_hold_salary(employee)
-
-                bank = EmployeeBankAccount.objects.filter(
-                    employee=employee,
-                    is_active=True
-                ).first()
+                # Holds are judged for the batch month, with the account
+                # that pays it rather than whichever is active today
+                bank = accounts.get(employee.id)
+                hold, reason = should_hold_salary(
+                    employee, int(month), int(year), has_bank_account=bank is not None
+                )
 
                 txn, created_flag = SalaryTransaction.objects.update_or_create(
                     batch=batch,
@@ -145,6 +163,9 @@ def upload_salary(request):
                 else:
                     updated += 1
 
+            # Amounts and statuses may both have changed — regroup once
+            rebuild_batch_summary(batch)
+
         messages.success(
             request,
             f"Upload completed successfully — "
@@ -161,15 +182,61 @@ def upload_salary(request):
         "payroll/upload.html",
         {
             "form": form,
+            "generate_form": MonthCloseForm(),
             "companies": companies,
         }
     )
 
 
+@perm_required("can_upload_payroll")
+def generate_salary(request):
+    """
+    Generate the month's batch from default salaries for one company, or
+    for every company when none is selected.
+    """
+    if request.method != "POST":
+        return redirect("payroll:salary_upload")
+
+    organisation = request.organisation
+    form = MonthCloseForm(request.POST)
+    if not form.is_valid():
+        messages.error(request, "Invalid form submission.")
+        return redirect("payroll:salary_upload")
+
+    company_id = request.POST.get("company_id")
+    if company_id:
+        company = get_object_or_404(Company, id=company_id, organisation=organisation)
+        company_ids = [company.id]
+    else:
+        company_ids = None
+
+    results = generate_salary_batches(
+        organisation,
+        form.cleaned_data["month"],
+        form.cleaned_data["year"],
+        company_ids=company_ids,
+    )
+
+    for result in results:
+        if "error" in result:
+            messages.error(request, f"{result['company'].name}: {result['error']}")
+        else:
+            messages.success(
+                request,
+                f"{result['company'].name}: Created: {result['created']}, "
+                f"On hold: {result['held']}, Already in batch: {result['existing']}, "
+                f"Skipped: {result['skipped']}"
+            )
+
+    if len(results) == 1 and results[0].get("batch"):
+        return redirect("payroll:batch_detail", batch_id=results[0]["batch"].id)
+    return redirect("payroll:batch_list")
+
+
 @login_required
 def download_salary_template(request, company_id):
 
-    organisation = request.user.organisation_user.organisation
+    organisation = request.organisation
     company = get_object_or_404(Company, id=company_id, organisation=organisation)
 
     employees = Employee.objects.filter(
@@ -202,34 +269,57 @@ def download_salary_template(request, company_id):
 
 
 
+BATCH_LIST_PAGE_SIZE = 25
+
+
 @login_required
 def salary_batch_list(request):
-    organisation = request.user.organisation_user.organisation
+    organisation = request.organisation
 
-    batches = SalaryBatch.objects.filter(
-        company__organisation=organisation
-    ).prefetch_related("transactions").order_by("-year", "-month")
+    batches = (
+        SalaryBatch.objects
+        .filter(company__organisation=organisation)
+        .select_related("company")
+        .order_by("-year", "-month", "company__name", "id")
+    )
+
+    paginator = Paginator(batches, BATCH_LIST_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get("page"))
+
+    # Per-status counts / amounts for the page only, from the summary table
+    summaries = get_batch_summaries([batch.id for batch in page_obj])
+    for batch in page_obj:
+        batch.summary = summaries[batch.id]
 
-    return render(request, "payroll/batch_list.html", {"batches": batches})
+    return render(request, "payroll/batch_list.html", {"batches": page_obj})
 
 
 @login_required
 def salary_batch_detail(request, batch_id):
-    organisation = request.user.organisation_user.organisation
+    organisation = request.organisation
     batch = get_object_or_404(
-        SalaryBatch,
+        SalaryBatch.objects.select_related("company"),
         id=batch_id,
         company__organisation=organisation
     )
 
-    transactions = batch.transactions.select_related("employee")
+    filters = _transaction_grid_filters(request)
+    try:
+        transactions, next_cursor = batch_transaction_page(batch, **filters)
+    except InvalidCursor:
+        messages.error(request, "Invalid page link, showing the first page.")
+        filters["cursor"] = None
+        transactions, next_cursor = batch_transaction_page(batch, **filters)
+
+    batch_summary = get_batch_summary(batch)
+    counts = batch_summary["counts"]
     summary = {
-        "total": transactions.count(),
-        "pending": transactions.filter(status="PENDING").count(),
-        "hold": transactions.filter(status="HOLD").count(),
-        "processed": transactions.filter(status="PROCESSED").count(),
-        "failed": transactions.filter(status="FAILED").count(),
-        "exported": transactions.filter(status="EXPORTED").count(),
+        "total": batch_summary["total_count"],
+        "pending": counts["PENDING"],
+        "hold": counts["HOLD"],
+        "processed": counts["PROCESSED"],
+        "failed": counts["FAILED"],
+        "exported": counts["EXPORTED"],
     }
 
     return render(
@@ -238,35 +328,53 @@ def salary_batch_detail(request, batch_id):
         {
             "batch": batch,
             "transactions": transactions,
+            "next_cursor": next_cursor,
+            "filters": filters,
+            "status_choices": SalaryTransaction.STATUS_CHOICES,
             "summary": summary,
         }
     )
 
 
-@perm_required("can_upload_payroll")
-def finalize_batch(request, batch_id):
-    batch = get_object_or_404(SalaryBatch, id=batch_id)
+def _transaction_grid_filters(request):
+    return {
+        "status": request.GET.get("status") or None,
+        "emp_code": request.GET.get("emp_code", "").strip() or None,
+        "sort": request.GET.get("sort") or "id",
+        "cursor": request.GET.get("cursor") or None,
+    }
 
-    if batch.status != "DRAFT":
-        messages.error(request, "Only draft batches can be finalized.")
-        return redirect("payroll:batch_detail", batch_id=batch.id)
 
-    if batch.transactions.count() == 0:
-        messages.error(request, "Cannot finalize an empty batch.")
-        return redirect("payroll:batch_detail", batch_id=batch.id)
+@login_required
+def batch_transactions_json(request, batch_id):
+    """
+    JSON page of a batch's transactions for the lazily loaded grid.
+    Accepts the same status / emp_code / sort / cursor parameters as the
+    batch detail page.
+    """
+    batch = get_object_or_404(
+        SalaryBatch,
+        id=batch_id,
+        company__organisation=request.organisation
+    )
 
-    if batch.transactions.filter(status="HOLD").exists():
-        messages.error(request, "Resolve all HOLD transactions before finalizing.")
-        return redirect("payroll:batch_detail", batch_id=batch.id)
+    try:
+        rows, next_cursor = batch_transaction_page(batch, **_transaction_grid_filters(request))
+    except InvalidCursor as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+
+    return JsonResponse({"results": rows, "next_cursor": next_cursor})
 
-    if batch.transactions.filter(account_number__isnull=True).exists():
-        messages.error(request, "Some employees are missing bank account details.")
-        return redirect("payroll:batch_detail", batch_id=batch.id)
 
-    with transaction.atomic():
-        batch.transactions.filter(status="PENDING").update(status="EXPORTED")
-        batch.status = "EXPORTED"
-        batch.save(update_fields=["status"])
+@perm_required("can_upload_payroll")
+def finalize_batch(request, batch_id):
+    batch = get_object_or_404(SalaryBatch, id=batch_id)
+
+    try:
+        finalize_salary_batch(batch)
+    except BatchValidationError as exc:
+        messages.error(request, str(exc))
+        return redirect("payroll:batch_detail", batch_id=batch.id)
 
     messages.success(request, "Batch finalized and marked as exported.")
     return redirect("payroll:batch_detail", batch_id=batch.id)
@@ -279,25 +387,34 @@ def export_batch(request, batch_id):
         messages.error(request, "Only exported batches can generate a bank file.")
         return redirect("payroll:batch_detail", batch_id=batch.id)
 
-    transactions = batch.transactions.filter(
-        status="EXPORTED"
-    ).select_related("employee")
+    response = HttpResponse(content_type=CONTENT_TYPES["xlsx"])
+    response["Content-Disposition"] = f'attachment; filename="bank_file_{batch.month}_{batch.year}.xlsx"'
+    write_bank_file(response, batch)
+    return response
 
-    rows = [
-        {
-            "Emp Code": txn.employee.emp_code,
-            "Employee Name": txn.employee.name,
-            "Account Number": txn.account_number,
-            "IFSC": txn.ifsc,
-            "Salary": txn.salary_amount,
-        }
-        for txn in transactions
-    ]
+@perm_required("can_upload_payroll")
+def month_close(request):
+    """
+    Run the month-close pipeline for every company of the organisation and
+    show the consolidated report. Bank responses are uploaded separately;
+    re-running picks them up.
+    """
+    organisation = request.organisation
+    report = None
 
-    df = pd.DataFrame(rows)
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response["Content-Disposition"] = f'attachment; filename="bank_file_{batch.month}_{batch.year}.xlsx"'
-    df.to_excel(response, index=False)
-    return response
\ No newline at end of file
+    if request.method == "POST":
+        form = MonthCloseForm(request.POST)
+        if form.is_valid():
+            report = close_month(
+                organisation,
+                form.cleaned_data["month"],
+                form.cleaned_data["year"],
+            )
+            if report["counts"]["failed"]:
+                messages.error(request, f"{report['counts']['failed']} companies could not be closed.")
+            else:
+                messages.success(request, "Month close ran for every company.")
+    else:
+        form = MonthCloseForm()
+
+    return render(request, "payroll/month_close.html", {"form": form, "report": report})
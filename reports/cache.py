@@ -0,0 +1,253 @@
+"""
+Report result cache.
+
+Entries are keyed by report name, request parameters and the version stamps
+of the data the report reads (batch version, change-feed sequence, ...), so
+they never need explicit invalidation: changed data produces a new key and
+the stale entry ages out of the LRU.
+
+Two per-process backends:
+  - summary_cache: in-memory LRU of small Python values (totals, counts)
+  - export_cache:  LRU of rendered export files on local disk, bounded in bytes
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse
+
+from api.utils import latest_change_sequence
+from reports.export import CONTENT_TYPES, write_export
+
+
+REPORT_CACHE_DIR = getattr(
+    settings, "REPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "salarycore_report_cache")
+)
+REPORT_CACHE_MAX_BYTES = getattr(settings, "REPORT_CACHE_MAX_BYTES", 200 * 1024 * 1024)
+REPORT_SUMMARY_CACHE_SIZE = getattr(settings, "REPORT_SUMMARY_CACHE_SIZE", 512)
+
+
+def report_key(report, params, versions):
+    raw = json.dumps([report, params, versions], sort_keys=True, cls=DjangoJSONEncoder)
+    return f"{report}-{hashlib.sha1(raw.encode()).hexdigest()}"
+
+
+class MemoryLRU:
+    """Bounded in-memory LRU with hit / miss / eviction counters."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class DiskLRU:
+    """
+    Files in `directory`, evicted least-recently-used first once their total
+    size exceeds `max_bytes`. Recency is the file mtime, refreshed on read,
+    so the order survives restarts.
+    """
+
+    def __init__(self, directory, max_bytes, suffix=".export"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def _files(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        files = []
+        for name in names:
+            if name.endswith(self.suffix):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, name))
+        return sorted(files)
+
+    def _open(self, key):
+        path = self._path(key)
+        try:
+            handle = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return handle
+
+    def open(self, key):
+        """Open file object of a cached entry, or None."""
+        handle = self._open(key)
+        with self._lock:
+            if handle is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return handle
+
+    @contextmanager
+    def writer(self, key):
+        """
+        Binary file to write the entry to. It is written to a temporary
+        file and renamed into place on success, so readers never see a
+        partial file.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                yield handle
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._evict(keep=key + self.suffix)
+
+    def _evict(self, keep=None):
+        with self._lock:
+            files = self._files()
+            total = sum(size for _, size, _ in files)
+            for _, size, name in files:
+                if total <= self.max_bytes:
+                    break
+                if name == keep:
+                    continue
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+                total -= size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            for _, _, name in self._files():
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def stats(self):
+        files = self._files()
+        return {
+            "entries": len(files),
+            "bytes": sum(size for _, size, _ in files),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+summary_cache = MemoryLRU(REPORT_SUMMARY_CACHE_SIZE)
+export_cache = DiskLRU(REPORT_CACHE_DIR, REPORT_CACHE_MAX_BYTES)
+
+
+# =========================
+# VERSION STAMPS
+# =========================
+
+def batch_versions(batch):
+    """Stamp of a batch's transactions; None when there is no batch."""
+    if batch is None:
+        return None
+    return [batch.id, batch.version, batch.status]
+
+
+def batches_versions(batches):
+    """batch_versions of every batch of a queryset, with one query."""
+    return [list(row) for row in batches.order_by("id").values_list("id", "version", "status")]
+
+
+def rate_version(rate):
+    """Stamp of a StatutoryRate's values; rows may be edited in place."""
+    return [
+        rate.effective_from, rate.employee_pf_rate, rate.employer_pf_rate, rate.pf_wage_ceiling,
+        rate.employee_esic_rate, rate.employer_esic_rate, rate.esic_wage_threshold,
+    ]
+
+
+def data_version(organisation_id, *entities):
+    """Latest change-feed sequence of the organisation for the given entities."""
+    return latest_change_sequence(organisation_id, entities or None)
+
+
+# =========================
+# HELPERS FOR VIEWS
+# =========================
+
+def cached_summary(report, params, versions, compute):
+    """Return compute() for these parameters / versions, from memory if possible."""
+    key = report_key(report, params, versions)
+    value = summary_cache.get(key)
+    if value is None:
+        value = compute()
+        summary_cache.set(key, value)
+    return value
+
+
+def cached_export(report, params, versions, filename, fmt, sheets):
+    """
+    Download of a report as `fmt` (xlsx / csv / tsv). `sheets()` returns
+    the reports.export.Sheet list and only runs on a cache miss; the file
+    is streamed straight into the disk cache.
+    """
+    key = report_key(report, [params, fmt], versions)
+    handle = export_cache.open(key)
+    if handle is None:
+        with export_cache.writer(key) as out:
+            write_export(out, sheets(), fmt)
+        handle = export_cache._open(key)
+
+    return FileResponse(
+        handle,
+        as_attachment=True,
+        filename=f"{filename}.{fmt}",
+        content_type=CONTENT_TYPES[fmt],
+    )
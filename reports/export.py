@@ -0,0 +1,147 @@
+"""
+Streaming report export.
+
+Rows are written one at a time, straight from a `values_list(...).iterator()`
+or any other iterable, into a write-only openpyxl workbook or a CSV / TSV
+file, so memory stays flat however long the report is. Columns carry a kind
+that sets the Excel number format, and totals rows are summed while the rows
+stream past.
+"""
+
+import csv
+import io
+from datetime import datetime
+
+from django.utils import timezone
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+
+# ?export= value -> file format
+EXPORT_FORMATS = {"excel": "xlsx", "xlsx": "xlsx", "csv": "csv", "tsv": "tsv"}
+
+CONTENT_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "tsv": "text/tab-separated-values",
+}
+
+NUMBER_FORMATS = {
+    "int": "0",
+    "money": "#,##0.00",
+    "percent": "0.00",
+    "date": "dd-mm-yyyy",
+    "datetime": "dd-mm-yyyy hh:mm",
+}
+
+BOLD = Font(bold=True)
+
+
+def export_format(value):
+    """File format for an ?export= value, or None when not exporting."""
+    return EXPORT_FORMATS.get(value)
+
+
+class Column:
+    """
+    A sheet column. `kind` is "text" or a key of NUMBER_FORMATS; columns
+    with total=True are summed into the sheet's totals row.
+    """
+
+    def __init__(self, header, kind="text", total=False):
+        self.header = header
+        self.kind = kind
+        self.total = total
+
+
+class Sheet:
+    """
+    `rows` is an iterable of sequences in column order, or a callable
+    returning one (called when the sheet is written, so it can use values
+    gathered while earlier sheets streamed). With `total_label` set, a
+    totals row follows the data.
+    """
+
+    def __init__(self, title, columns, rows, total_label=None):
+        self.title = title
+        self.columns = columns
+        self.rows = rows
+        self.total_label = total_label
+
+    def iter_rows(self):
+        rows = self.rows() if callable(self.rows) else self.rows
+        totals = [0 if column.total else None for column in self.columns]
+
+        for row in rows:
+            for index, column in enumerate(self.columns):
+                if column.total and row[index] is not None:
+                    totals[index] += row[index]
+            yield row
+
+        if self.total_label is not None:
+            totals[0] = self.total_label
+            yield totals
+
+
+def _excel_value(value, kind):
+    # Excel has no time zones
+    if kind == "datetime" and isinstance(value, datetime) and timezone.is_aware(value):
+        return timezone.localtime(value).replace(tzinfo=None)
+    return value
+
+
+def _write_xlsx(out, sheets):
+    wb = Workbook(write_only=True)
+
+    for sheet in sheets:
+        ws = wb.create_sheet(sheet.title[:31])
+
+        header = []
+        for column in sheet.columns:
+            cell = WriteOnlyCell(ws, value=column.header)
+            cell.font = BOLD
+            header.append(cell)
+        ws.append(header)
+
+        formats = [NUMBER_FORMATS.get(column.kind) for column in sheet.columns]
+        kinds = [column.kind for column in sheet.columns]
+
+        for row in sheet.iter_rows():
+            cells = []
+            for value, number_format, kind in zip(row, formats, kinds):
+                if number_format is None or value is None or value == "":
+                    cells.append(value)
+                    continue
+                cell = WriteOnlyCell(ws, value=_excel_value(value, kind))
+                cell.number_format = number_format
+                cells.append(cell)
+            ws.append(cells)
+
+    wb.save(out)
+
+
+def _write_delimited(out, sheets, delimiter):
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    writer = csv.writer(text, delimiter=delimiter)
+
+    for index, sheet in enumerate(sheets):
+        if len(sheets) > 1:
+            # one file: sheets follow each other under a title line
+            if index:
+                writer.writerow([])
+            writer.writerow([sheet.title])
+        writer.writerow([column.header for column in sheet.columns])
+        for row in sheet.iter_rows():
+            writer.writerow(["" if value is None else value for value in row])
+
+    text.flush()
+    text.detach()
+
+
+def write_export(out, sheets, fmt="xlsx"):
+    """Write `sheets` to the binary file object `out` as xlsx, csv or tsv."""
+    if fmt == "xlsx":
+        _write_xlsx(out, sheets)
+    else:
+        _write_delimited(out, sheets, "\t" if fmt == "tsv" else ",")
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from payroll.models import SalaryBatch
+from reports.utils import refresh_salary_facts
+
+
+class Command(BaseCommand):
+    help = "Rebuild MonthlySalaryFact rows from SalaryTransaction."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch",
+            type=int,
+            action="append",
+            dest="batch_ids",
+            help="Only rebuild this batch id (may be repeated).",
+        )
+        parser.add_argument("--year", type=int, help="Only rebuild batches of this year.")
+
+    def handle(self, *args, **options):
+        batches = SalaryBatch.objects.all()
+        if options["batch_ids"]:
+            batches = batches.filter(id__in=options["batch_ids"])
+        if options["year"]:
+            batches = batches.filter(year=options["year"])
+
+        rows = 0
+        for batch in batches.iterator():
+            rows += refresh_salary_facts(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} salary fact rows."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from reports.cache import export_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Show statistics of the on-disk report export cache, or clear it. "
+        "The in-memory summary cache lives inside each web process and is not "
+        "reachable from here; it expires on its own as report data changes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clear", action="store_true", help="Delete every cached export.")
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            export_cache.clear()
+            self.stdout.write(self.style.SUCCESS("Report export cache cleared."))
+            return
+
+        line = ", ".join(f"{key}={value}" for key, value in export_cache.stats().items())
+        self.stdout.write(f"export: {line}")
@@ -0,0 +1,69 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def build_facts(apps, schema_editor):
+    SalaryBatch = apps.get_model("payroll", "SalaryBatch")
+    SalaryTransaction = apps.get_model("payroll", "SalaryTransaction")
+    MonthlySalaryFact = apps.get_model("reports", "MonthlySalaryFact")
+
+    for batch in SalaryBatch.objects.filter(status__in=["EXPORTED", "COMPLETED"]).iterator():
+        rows = (
+            SalaryTransaction.objects
+            .filter(batch=batch)
+            .values("employee_id", "status")
+            .annotate(n=Count("id"), total=Sum("salary_amount"))
+            .order_by()
+        )
+        MonthlySalaryFact.objects.bulk_create(
+            [
+                MonthlySalaryFact(
+                    batch_id=batch.id,
+                    company_id=batch.company_id,
+                    employee_id=row["employee_id"],
+                    year=batch.year,
+                    month=batch.month,
+                    status=row["status"],
+                    txn_count=row["n"],
+                    amount=row["total"] or 0,
+                )
+                for row in rows
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('companies', '0004_organisationuser_notify_approval_request_and_more'),
+        ('employees', '0005_employee_active_bank_account_and_more'),
+        ('payroll', '0006_statutorycontribution'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlySalaryFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('month', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('DRAFT', 'Draft'), ('READY', 'Ready for Export'), ('EXPORTED', 'Exported to Bank'), ('COMPLETED', 'Completed'), ('REVERSED', 'Reversed'), ('PENDING', 'Pending'), ('HOLD', 'Hold'), ('PROCESSED', 'Processed'), ('FAILED', 'Failed'), ('CANCELLED', 'Cancelled')], max_length=20)),
+                ('txn_count', models.IntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='salary_facts', to='payroll.salarybatch')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='salary_facts', to='companies.company')),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='salary_facts', to='employees.employee')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company', 'year', 'month'], name='reports_mon_company_ef2eba_idx'), models.Index(fields=['year', 'month'], name='reports_mon_year_e8b0dd_idx'), models.Index(fields=['employee', 'year'], name='reports_mon_employe_c2f572_idx')],
+                'unique_together': {('batch', 'employee', 'status')},
+            },
+        ),
+        migrations.RunPython(build_facts, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,60 @@
 from django.db import models
 
-# Create your models here.
+from companies.models import Company
+from employees.models import Employee
+from payroll.models import SalaryBatch, SalaryTransaction
+
+
+# =========================
+# MONTHLY SALARY FACTS
+# =========================
+# One row per (batch, employee, status): transaction count and amount.
+# Maintained by reports.utils.refresh_salary_facts whenever a batch is
+# exported or completed (and removed if it is reversed), so yearly and
+# monthly reports are GROUP BYs over this table instead of scans of
+# SalaryTransaction. Rebuild with: python manage.py rebuild_salary_facts
+class MonthlySalaryFact(models.Model):
+    batch = models.ForeignKey(
+        SalaryBatch,
+        on_delete=models.CASCADE,
+        related_name="salary_facts"
+    )
+
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name="salary_facts"
+    )
+
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name="salary_facts"
+    )
+
+    year = models.PositiveIntegerField()
+    month = models.PositiveIntegerField()
+
+    status = models.CharField(
+        max_length=20,
+        choices=SalaryTransaction.STATUS_CHOICES
+    )
+
+    txn_count = models.IntegerField(default=0)
+
+    amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0
+    )
+
+    class Meta:
+        unique_together = ("batch", "employee", "status")
+        indexes = [
+            models.Index(fields=["company", "year", "month"]),
+            models.Index(fields=["year", "month"]),
+            models.Index(fields=["employee", "year"]),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} | {self.month}/{self.year} | {self.status}: {self.amount}"
@@ -0,0 +1,137 @@
+"""
+Headcount / attrition trend engine.
+
+Every (company, month) cell of a range is computed from one query over
+EmployeeHistory: each version of an employee's record becomes a +1 event
+when it starts being on a roster and a -1 event when it stops, the events
+are sorted once and swept month by month.
+
+A version starting on the joining date is a join, one ending on the exit
+date an exit; other boundaries are transfers between companies, which move
+headcount without counting as attrition.
+"""
+
+from datetime import date, timedelta
+
+from django.db.models import Q
+
+from employees.models import EmployeeHistory
+from reports.utils import month_end
+
+
+JOIN, EXIT, MOVE = "join", "exit", "move"
+
+
+def month_range(start, end):
+    """(year, month) tuples from start to end inclusive."""
+    first = start[0] * 12 + start[1] - 1
+    last = end[0] * 12 + end[1] - 1
+    return [(index // 12, index % 12 + 1) for index in range(first, last + 1)]
+
+
+def _events(organisation, opening_day, last_day, company_ids=None):
+    rows = (
+        EmployeeHistory.objects
+        .filter(company__organisation=organisation, valid_from__lte=last_day, joining_date__lte=last_day)
+        .filter(Q(valid_to__isnull=True) | Q(valid_to__gt=opening_day))
+        .filter(Q(exit_date__isnull=True) | Q(exit_date__gt=opening_day))
+    )
+    if company_ids:
+        rows = rows.filter(company_id__in=company_ids)
+
+    events = []
+    for company_id, valid_from, valid_to, joining_date, exit_date in rows.values_list(
+        "company_id", "valid_from", "valid_to", "joining_date", "exit_date"
+    ).iterator(chunk_size=2000):
+        start = max(valid_from, joining_date)
+        ends = [day for day in (valid_to, exit_date) if day is not None]
+        end = min(ends) if ends else None
+        if end is not None and end <= start:
+            continue
+
+        events.append((start, company_id, 1, JOIN if start == joining_date else MOVE))
+        if end is not None:
+            events.append((end, company_id, -1, EXIT if end == exit_date else MOVE))
+
+    events.sort(key=lambda event: event[0])
+    return events
+
+
+def attrition_trend(organisation, start, end, company_ids=None):
+    """
+    Opening / closing headcount, joins, exits and attrition rate for every
+    company and month from `start` to `end` ((year, month) tuples).
+
+    Returns a list of dicts ordered by month then company_id. Attrition is
+    exits as a percentage of the average of opening and closing headcount.
+    """
+    months = month_range(start, end)
+    if not months:
+        return []
+
+    opening_day = date(*months[0], 1) - timedelta(days=1)
+    last_day = month_end(*months[-1])
+
+    events = _events(organisation, opening_day, last_day, company_ids)
+
+    headcount = {}
+    companies = set(company_ids or ())
+    position = 0
+
+    # Everything up to the day before the range is opening headcount
+    while position < len(events) and events[position][0] <= opening_day:
+        _, company_id, delta, _ = events[position]
+        headcount[company_id] = headcount.get(company_id, 0) + delta
+        companies.add(company_id)
+        position += 1
+
+    cells = []
+    for year, month in months:
+        closing_day = month_end(year, month)
+        opening = dict(headcount)
+        joins, exits = {}, {}
+
+        while position < len(events) and events[position][0] <= closing_day:
+            _, company_id, delta, kind = events[position]
+            headcount[company_id] = headcount.get(company_id, 0) + delta
+            companies.add(company_id)
+            if kind == JOIN:
+                joins[company_id] = joins.get(company_id, 0) + 1
+            elif kind == EXIT:
+                exits[company_id] = exits.get(company_id, 0) + 1
+            position += 1
+
+        for company_id in sorted(companies):
+            cell = {
+                "company_id": company_id,
+                "year": year,
+                "month": month,
+                "opening": opening.get(company_id, 0),
+                "joins": joins.get(company_id, 0),
+                "exits": exits.get(company_id, 0),
+                "closing": headcount.get(company_id, 0),
+            }
+            cell["attrition_rate"] = attrition_rate(cell["exits"], cell["opening"], cell["closing"])
+            cells.append(cell)
+
+    return cells
+
+
+def attrition_rate(exits, opening, closing):
+    average = (opening + closing) / 2
+    return round(exits * 100 / average, 2) if average else 0.0
+
+
+def monthly_totals(cells):
+    """Cells of attrition_trend summed over companies, one per month."""
+    totals = {}
+    for cell in cells:
+        total = totals.setdefault(
+            (cell["year"], cell["month"]),
+            {"year": cell["year"], "month": cell["month"], "opening": 0, "joins": 0, "exits": 0, "closing": 0},
+        )
+        for key in ("opening", "joins", "exits", "closing"):
+            total[key] += cell[key]
+    for total in totals.values():
+        total["attrition_rate"] = attrition_rate(total["exits"], total["opening"], total["closing"])
+    return list(totals.values())
@@ -8,6 +8,7 @@ urlpatterns = [
     path("salary/", views.salary_report, name="salary_report"),
     path("headcount/", views.headcount_report, name="headcount_report"),
     path("joining-exit/", views.joining_exit_report, name="joining_exit_report"),
+    path("headcount/trend/", views.attrition_trend_report, name="attrition_trend_report"),
     path("bank-disbursement/", views.bank_disbursement_report, name="bank_disbursement_report"),
     path("pf-esic/", views.pf_esic_report, name="pf_esic_report"),
     path("bank-changes/", views.bank_change_report, name="bank_change_report"),
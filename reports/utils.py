@@ -0,0 +1,130 @@
+import calendar
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from employees.models import EmployeeHistory
+from payroll.models import SalaryTransaction
+from reports.models import MonthlySalaryFact
+
+
+# Batches whose transactions are reflected in MonthlySalaryFact
+FACT_BATCH_STATUSES = ("EXPORTED", "COMPLETED")
+
+
+def refresh_salary_facts(batch):
+    """
+    Rewrite the fact rows of one batch from its transactions with a single
+    GROUP BY (or drop them when the batch is not exported / completed).
+    Returns the number of fact rows written.
+    """
+    with transaction.atomic():
+        MonthlySalaryFact.objects.filter(batch=batch).delete()
+
+        if batch.status not in FACT_BATCH_STATUSES:
+            return 0
+
+        rows = (
+            SalaryTransaction.objects
+            .filter(batch=batch)
+            .values("employee_id", "status")
+            .annotate(n=Count("id"), total=Sum("salary_amount"))
+            .order_by()
+        )
+
+        facts = MonthlySalaryFact.objects.bulk_create(
+            [
+                MonthlySalaryFact(
+                    batch_id=batch.id,
+                    company_id=batch.company_id,
+                    employee_id=row["employee_id"],
+                    year=batch.year,
+                    month=batch.month,
+                    status=row["status"],
+                    txn_count=row["n"],
+                    amount=row["total"] or 0,
+                )
+                for row in rows
+            ],
+            batch_size=1000,
+        )
+
+    return len(facts)
+
+
+# =========================
+# POINT-IN-TIME HEADCOUNT
+# =========================
+# Read from EmployeeHistory: an employee is on a company's roster on day D
+# when the version of their record in force on D belongs to that company
+# and D falls inside their employment (joining_date <= D < exit_date).
+
+def month_end(year, month):
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def active_on(day):
+    """Q for history rows on the roster on `day`."""
+    return (
+        Q(valid_from__lte=day, joining_date__lte=day)
+        & (Q(valid_to__isnull=True) | Q(valid_to__gt=day))
+        & (Q(exit_date__isnull=True) | Q(exit_date__gt=day))
+    )
+
+
+def roster_as_of(organisation, day, company=None):
+    """History rows (one per employee) on the roster on `day`."""
+    rows = EmployeeHistory.objects.filter(company__organisation=organisation)
+    if company is not None:
+        rows = rows.filter(company=company)
+    return rows.filter(active_on(day))
+
+
+def headcount_totals(company, year, month):
+    """
+    Active headcount at month end, joiners / leavers in the month and exits
+    to date for one company, in a single query.
+    """
+    first, last = date(year, month, 1), month_end(year, month)
+    # the version in force on the joining day / the last working day
+    at_joining = Q(valid_from__lte=F("joining_date")) & (
+        Q(valid_to__isnull=True) | Q(valid_to__gt=F("joining_date"))
+    )
+    at_exit = Q(exit_date__isnull=False, valid_from__lt=F("exit_date")) & (
+        Q(valid_to__isnull=True) | Q(valid_to__gte=F("exit_date"))
+    )
+    return EmployeeHistory.objects.filter(company=company).aggregate(
+        active=Count("id", filter=active_on(last)),
+        joined=Count("id", filter=at_joining & Q(joining_date__range=(first, last))),
+        left=Count("id", filter=at_exit & Q(exit_date__range=(first, last))),
+        exited=Count("id", filter=at_exit & Q(exit_date__lte=last)),
+    )
+
+
+def headcount_trend(organisation, year, month, months=12):
+    """
+    Month-end headcount of every company for the `months` months ending at
+    year / month, as (month_ends, {company_id: [count, ...]}), from a single
+    range query over EmployeeHistory.
+    """
+    month_ends = []
+    for offset in range(months - 1, -1, -1):
+        y, m = divmod(year * 12 + month - 1 - offset, 12)
+        month_ends.append(month_end(y, m + 1))
+
+    first, last = month_ends[0], month_ends[-1]
+    rows = (
+        EmployeeHistory.objects
+        .filter(company__organisation=organisation, valid_from__lte=last, joining_date__lte=last)
+        .filter(Q(valid_to__isnull=True) | Q(valid_to__gt=first))
+        .filter(Q(exit_date__isnull=True) | Q(exit_date__gt=first))
+        .values("company_id")
+        .annotate(**{f"m{i}": Count("id", filter=active_on(day)) for i, day in enumerate(month_ends)})
+        .order_by()
+    )
+    trend = {
+        row["company_id"]: [row[f"m{i}"] for i in range(len(month_ends))]
+        for row in rows
+    }
+    return month_ends, trend
@@ -1,36 +1,52 @@
 from datetime import date
-import calendar
+import re
 
-import pandas as pd
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
-from django.db.models import Sum, Count, Q
+from django.db.models import Sum, Count, Q, F, Value, DecimalField
+from django.db.models.functions import Coalesce
 from django.urls import reverse
 
 from companies.models import Company
 from employees.models import Employee
-from payroll.models import SalaryBatch, SalaryTransaction
-from banking.models import BankChangeRequest, EmployeeBankAccount
+from payroll.models import SalaryBatch, SalaryTransaction, StatutoryRate
+from banking.models import BankChangeRequest
+from payroll.utils import (
+    BULK_STATUS_ACTIONS, InvalidCursor, batch_transaction_page, bulk_status_action, get_batch_summary,
+    refresh_bank_snapshot,
+)
+from reports.cache import (
+    batch_versions, batches_versions, cached_export, cached_summary, data_version, rate_version,
+)
+from reports.export import Column, Sheet, export_format
+from reports.models import MonthlySalaryFact
+from reports.trends import attrition_trend, month_range, monthly_totals
+from reports.utils import headcount_totals, headcount_trend, month_end, roster_as_of
+from payroll.statutory import (
+    REPORT_STATUSES, annotate_contributions, batch_contribution_totals,
+    rates_for_period, recorded_contributions, recorded_contribution_rows,
+)
 
 MONTH_NAMES = {
     1:"January",2:"February",3:"March",4:"April",5:"May",6:"June",
     7:"July",8:"August",9:"September",10:"October",11:"November",12:"December",
 }
 
+# Rows fetched per round trip when streaming an export
+EXPORT_CHUNK_SIZE = 2000
+
 # ──────────────────────────────────────────────────────────────────────────────
 # HELPER FUNCTIONS
 # ──────────────────────────────────────────────────────────────────────────────
 def get_org(request):
     """Return organisation of logged-in user."""
-    return request.user.organisation_user.organisation
+    return request.organisation
 
-def excel_response(filename):
-    """Create an Excel file download response."""
-    r = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    r["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return r
+def pct(rate):
+    """0.0075 -> "0.75%"."""
+    return f"{(rate * 100).normalize():f}%"
 
 # ── DASHBOARD ──────────────────────────────────────────────────────────────────
 @login_required
@@ -38,6 +54,13 @@ def reports_dashboard(request):
     return render(request, "reports/dashboard.html")
 
 # ── 1. SALARY REGISTER ─────────────────────────────────────────────────────────
+SALARY_REGISTER_COLUMNS = [
+    Column("Site Code"),Column("Company"),Column("Emp Code"),Column("Employee Name"),Column("Father Name"),
+    Column("UAN"),Column("ESIC"),Column("Salary","money",total=True),Column("Account Number"),Column("IFSC"),
+    Column("Status"),Column("UTR"),Column("Hold Reason"),
+]
+STATUS_SUMMARY_COLUMNS = [Column("Status"),Column("Count","int",total=True),Column("Total","money",total=True)]
+
 @login_required
 def salary_report(request):
     today = date.today()
@@ -46,7 +69,7 @@ def salary_report(request):
     month      = int(request.GET.get("month", today.month))
     year       = int(request.GET.get("year",  today.year))
     company_id = request.GET.get("company")
-    export     = request.GET.get("export")
+    fmt        = export_format(request.GET.get("export"))
 
     companies        = Company.objects.filter(organisation=org)
 
@@ -61,28 +84,24 @@ def salary_report(request):
 
         if batch:
             transactions = batch.transactions.select_related("employee","employee__company").order_by("employee__emp_code")
-            totals = transactions.aggregate(total_salary=Sum("salary_amount"), total_count=Count("id"))
-
-    if export == "excel" and selected_company and transactions.exists():
-
-        rows = [{"Site Code":selected_company.site_code,
-                 "Company":selected_company.name,
-                 "Emp Code":t.employee.emp_code,"Employee Name":t.employee.name,
-                 "Father Name":t.employee.father_name,"UAN":t.employee.uan_number or "",
-                 "ESIC":t.employee.esic_number or "","Salary":t.salary_amount,
-                 "Account Number":t.account_number or "","IFSC":t.ifsc or "",
-                 "Status":t.status,"UTR":t.utr or "","Hold Reason":t.hold_reason or "",
-        }
-                for t in transactions
-                ]
-        df = pd.DataFrame(rows)
-        summary = df.groupby("Status")["Salary"].agg(Count="count",Total="sum").reset_index()
-        summary.loc[len(summary)] = {"Status":"GRAND TOTAL","Count":summary["Count"].sum(),"Total":summary["Total"].sum()}
-        resp = excel_response(f"{selected_company.name}_{month}_{year}_salary_register.xlsx")
-        with pd.ExcelWriter(resp, engine="openpyxl") as w:
-            df.to_excel(w, sheet_name="Salary Register", index=False)
-            summary.to_excel(w, sheet_name="Summary", index=False)
-        return resp
+            versions = [batch_versions(batch), data_version(org.id, "employees.employee")]
+            totals = cached_summary("salary_register", [batch.id], versions,
+                lambda: transactions.aggregate(total_salary=Sum("salary_amount"), total_count=Count("id")))
+
+    if fmt and selected_company and totals.get("total_count"):
+        def sheets():
+            site, name = selected_company.site_code, selected_company.name
+            rows = transactions.values_list("employee__emp_code","employee__name","employee__father_name",
+                "employee__uan_number","employee__esic_number","salary_amount","account_number","ifsc",
+                "status","utr","hold_reason").iterator(chunk_size=EXPORT_CHUNK_SIZE)
+            summary = get_batch_summary(batch)
+            return [
+                Sheet("Salary Register", SALARY_REGISTER_COLUMNS, ((site, name, *r) for r in rows)),
+                Sheet("Summary", STATUS_SUMMARY_COLUMNS, [(status, count, summary["amounts"][status])
+                    for status, count in summary["counts"].items() if count], total_label="GRAND TOTAL"),
+            ]
+        return cached_export("salary_register", [batch.id], versions,
+            f"{selected_company.name}_{month}_{year}_salary_register", fmt, sheets)
     return render(request, "reports/salary_report.html", {
         "companies":companies,"selected_company":selected_company,"transactions":transactions,
         "batch":batch,"totals":totals,"month":month,"year":year,"month_name":MONTH_NAMES[month],
@@ -90,6 +109,12 @@ def salary_report(request):
     })
 
 # ── 2. MONTHLY HEADCOUNT ───────────────────────────────────────────────────────
+HEADCOUNT_COLUMNS = [
+    Column("Emp Code"),Column("Name"),Column("Father Name"),Column("Company"),Column("Joining Date","date"),
+    Column("Exit Date","date"),Column("Status"),Column("UAN"),Column("ESIC"),
+]
+HEADCOUNT_SUMMARY_COLUMNS = [Column("Active Employees","int"),Column("Joined This Month","int"),Column("Left This Month","int")]
+
 @login_required
 def headcount_report(request):
     today = date.today()
@@ -97,39 +122,45 @@ def headcount_report(request):
     month      = int(request.GET.get("month", today.month))
     year       = int(request.GET.get("year",  today.year))
     company_id = request.GET.get("company")
-    export     = request.GET.get("export")
+    fmt        = export_format(request.GET.get("export"))
     companies        = Company.objects.filter(organisation=org)
     selected_company = None
     rows             = []
     totals           = {}
-    last_day = date(year, month, calendar.monthrange(year, month)[1])
+    versions = [data_version(org.id, "employees.employee")]
     if company_id:
         selected_company = get_object_or_404(Company, id=company_id, organisation=org)
-        employees = Employee.objects.filter(company=selected_company, joining_date__lte=last_day).select_related("company")
-        active = employees.filter(Q(exit_date__isnull=True)|Q(exit_date__gt=last_day))
-        exited = employees.filter(exit_date__lte=last_day)
-        joined = employees.filter(joining_date__year=year, joining_date__month=month)
-        left   = employees.filter(exit_date__year=year, exit_date__month=month)
-        rows   = active.order_by("emp_code")
-        totals = {"active":active.count(),"exited":exited.count(),"joined":joined.count(),"left":left.count()}
-    if export == "excel" and selected_company and rows:
-        df = pd.DataFrame([{"Emp Code":e.emp_code,"Name":e.name,"Father Name":e.father_name,
-            "Company":e.company.name,"Joining Date":e.joining_date,"Exit Date":e.exit_date or "",
-            "Status":"Active" if not e.exit_date else "Exited","UAN":e.uan_number or "","ESIC":e.esic_number or "",
-        } for e in rows])
-        summary = pd.DataFrame([{"Active Employees":totals["active"],"Joined This Month":totals["joined"],"Left This Month":totals["left"]}])
-        resp = excel_response(f"{selected_company.name}_{MONTH_NAMES[month]}_{year}_headcount.xlsx")
-        with pd.ExcelWriter(resp, engine="openpyxl") as w:
-            df.to_excel(w, sheet_name="Headcount", index=False)
-            summary.to_excel(w, sheet_name="Summary", index=False)
-        return resp
+        # As recorded in the effective-dated history, not today's employee rows
+        rows = roster_as_of(org, month_end(year, month), selected_company).order_by("emp_code").values(
+            "emp_code","name","joining_date","exit_date",company_name=F("company__name"),
+            father_name=F("employee__father_name"),uan_number=F("employee__uan_number"),esic_number=F("employee__esic_number"))
+        params = [selected_company.id, year, month]
+        totals = cached_summary("headcount", params, versions,
+            lambda: headcount_totals(selected_company, year, month))
+    if fmt and selected_company and totals.get("active"):
+        def sheets():
+            roster = rows.values_list("emp_code","name","father_name","company_name","joining_date","exit_date",
+                "uan_number","esic_number").iterator(chunk_size=EXPORT_CHUNK_SIZE)
+            return [
+                Sheet("Headcount", HEADCOUNT_COLUMNS, ((*r[:6], "Active", *r[6:]) for r in roster)),
+                Sheet("Summary", HEADCOUNT_SUMMARY_COLUMNS, [(totals["active"], totals["joined"], totals["left"])]),
+            ]
+        return cached_export("headcount", params, versions,
+            f"{selected_company.name}_{MONTH_NAMES[month]}_{year}_headcount", fmt, sheets)
+    month_ends, counts = cached_summary("headcount_trend", [org.id, year, month], versions,
+        lambda: headcount_trend(org, year, month))
+    trend = [(c.name, counts.get(c.id, [0]*len(month_ends))) for c in companies]
     return render(request, "reports/headcount_report.html", {
         "companies":companies,"selected_company":selected_company,"rows":rows,"totals":totals,
+        "trend":trend,"trend_months":month_ends,
         "month":month,"year":year,"month_name":MONTH_NAMES[month],
         "months":range(1,13),"month_names":MONTH_NAMES,"years":range(today.year-3,today.year+2),
     })
 
 # ── 3. JOINING & EXIT REPORT ───────────────────────────────────────────────────
+JOINING_COLUMNS = [Column("Emp Code"),Column("Name"),Column("Father Name"),Column("Joining Date","date"),Column("UAN"),Column("ESIC")]
+EXIT_COLUMNS = [*JOINING_COLUMNS[:4],Column("Exit Date","date"),*JOINING_COLUMNS[4:]]
+
 @login_required
 def joining_exit_report(request):
     org         = get_org(request)
@@ -137,7 +168,7 @@ def joining_exit_report(request):
     from_date   = request.GET.get("from_date")
     to_date     = request.GET.get("to_date")
     report_type = request.GET.get("report_type", "both")
-    export      = request.GET.get("export")
+    fmt         = export_format(request.GET.get("export"))
     companies        = Company.objects.filter(organisation=org)
     selected_company = None
     joined_qs        = Employee.objects.none()
@@ -149,31 +180,89 @@ def joining_exit_report(request):
             joined_qs = base.filter(joining_date__range=[from_date,to_date]).order_by("joining_date")
         if report_type in ("exit","both"):
             exited_qs = base.filter(exit_date__range=[from_date,to_date]).order_by("exit_date")
-    if export == "excel" and selected_company:
-        dfs = {}
-        if joined_qs.exists():
-            dfs["Joinings"] = pd.DataFrame([{"Emp Code":e.emp_code,"Name":e.name,
-                "Father Name":e.father_name,"Joining Date":e.joining_date,
-                "UAN":e.uan_number or "","ESIC":e.esic_number or ""} for e in joined_qs])
-        if exited_qs.exists():
-            dfs["Exits"] = pd.DataFrame([{"Emp Code":e.emp_code,"Name":e.name,
-                "Father Name":e.father_name,"Joining Date":e.joining_date,"Exit Date":e.exit_date,
-                "UAN":e.uan_number or "","ESIC":e.esic_number or ""} for e in exited_qs])
-        if not dfs:
+    if fmt and selected_company:
+        has_joined, has_exited = joined_qs.exists(), exited_qs.exists()
+        if not (has_joined or has_exited):
             messages.warning(request, "No data found for selected filters.")
             return redirect(request.path+f"?company={company_id}&from_date={from_date}&to_date={to_date}&report_type={report_type}")
-        resp = excel_response(f"{selected_company.name}_{from_date}_{to_date}_joining_exit.xlsx")
-        with pd.ExcelWriter(resp, engine="openpyxl") as w:
-            for name, df in dfs.items():
-                df.to_excel(w, sheet_name=name, index=False)
-        return resp
+        def sheets():
+            fields = ("emp_code","name","father_name","joining_date","exit_date","uan_number","esic_number")
+            result = []
+            if has_joined:
+                result.append(Sheet("Joinings", JOINING_COLUMNS, ((*r[:4], *r[5:]) for r in
+                    joined_qs.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE))))
+            if has_exited:
+                result.append(Sheet("Exits", EXIT_COLUMNS, exited_qs.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)))
+            return result
+        return cached_export("joining_exit", [selected_company.id, from_date, to_date, report_type],
+            [data_version(org.id, "employees.employee")],
+            f"{selected_company.name}_{from_date}_{to_date}_joining_exit", fmt, sheets)
     return render(request, "reports/joining_exit_report.html", {
         "companies":companies,"selected_company":selected_company,
         "joined_qs":joined_qs,"exited_qs":exited_qs,
         "from_date":from_date or "","to_date":to_date or "","report_type":report_type,
     })
 
+# ── 3b. HEADCOUNT & ATTRITION TREND ───────────────────────────────────────────
+TREND_DEFAULT_MONTHS = 24
+TREND_COLUMNS = [
+    Column("Company"),Column("Year","int"),Column("Month"),Column("Opening","int"),Column("Joins","int"),
+    Column("Exits","int"),Column("Closing","int"),Column("Attrition %","percent"),
+]
+
+@login_required
+def attrition_trend_report(request):
+    today = date.today()
+    org   = get_org(request)
+    y, m = divmod(today.year*12 + today.month - TREND_DEFAULT_MONTHS, 12)
+    start = (int(request.GET.get("from_year", y)), int(request.GET.get("from_month", m+1)))
+    end   = (int(request.GET.get("to_year", today.year)), int(request.GET.get("to_month", today.month)))
+    fmt       = export_format(request.GET.get("export"))
+    companies = Company.objects.filter(organisation=org).order_by("name")
+    selected  = [int(c) for c in request.GET.getlist("company") if c.isdigit()]
+    if selected: companies_shown = [c for c in companies if c.id in selected]
+    else:        companies_shown = list(companies)
+    if start > end:
+        messages.error(request, "The start month must not be after the end month.")
+        start = end
+    company_ids = [c.id for c in companies_shown]
+    params   = [company_ids, start, end]
+    versions = [data_version(org.id, "employees.employee")]
+    cells  = cached_summary("attrition_trend", params, versions,
+        lambda: attrition_trend(org, start, end, company_ids))
+    months = month_range(start, end)
+    by_cell = {(c["company_id"], c["year"], c["month"]): c for c in cells}
+    pivot  = [(c.name, [by_cell[(c.id, y, m)] for y, m in months]) for c in companies_shown]
+    totals = monthly_totals(cells)
+    if fmt and company_ids:
+        def sheets():
+            named = [(name, c) for name, row in pivot for c in row] + [("All Companies", c) for c in totals]
+            pivot_columns = [Column("Company"),*[Column(f"{MONTH_NAMES[m][:3]} {y}","int") for y, m in months]]
+            return [
+                Sheet("Trend", TREND_COLUMNS, [(name,c["year"],MONTH_NAMES[c["month"]],c["opening"],c["joins"],
+                    c["exits"],c["closing"],c["attrition_rate"]) for name, c in named]),
+                Sheet("Headcount", pivot_columns, [(name,*[c["closing"] for c in row])
+                    for name, row in pivot + [("All Companies", totals)]]),
+                Sheet("Attrition %", [pivot_columns[0],*[Column(c.header,"percent") for c in pivot_columns[1:]]],
+                    [(name,*[c["attrition_rate"] for c in row]) for name, row in pivot + [("All Companies", totals)]]),
+            ]
+        return cached_export("attrition_trend", params, versions,
+            f"headcount_trend_{start[0]}_{start[1]:02d}_{end[0]}_{end[1]:02d}", fmt, sheets)
+    return render(request, "reports/attrition_trend_report.html", {
+        "companies":companies,"selected":selected,"pivot":pivot,"totals":totals,
+        "trend_months":[date(y, m, 1) for y, m in months],
+        "from_year":start[0],"from_month":start[1],"to_year":end[0],"to_month":end[1],
+        "month_names":MONTH_NAMES,"years":range(today.year-5,today.year+2),
+    })
+
 # ── 4. BANK DISBURSEMENT ───────────────────────────────────────────────────────
+DISBURSEMENT_COLUMNS = [
+    Column("Emp Code"),Column("Employee Name"),Column("Account Number"),Column("IFSC"),
+    Column("Salary Amount","money"),Column("Status"),Column("UTR"),Column("Bank Response","datetime"),
+    Column("Hold Reason"),Column("Failure Reason"),
+]
+DISBURSEMENT_SUMMARY_COLUMNS = [Column("Status"),Column("Employees","int"),Column("Total","money")]
+
 @login_required
 def bank_disbursement_report(request):
     today = date.today()
@@ -181,7 +270,7 @@ def bank_disbursement_report(request):
     month      = int(request.GET.get("month", today.month))
     year       = int(request.GET.get("year",  today.year))
     company_id = request.GET.get("company")
-    export     = request.GET.get("export")
+    fmt        = export_format(request.GET.get("export"))
     companies        = Company.objects.filter(organisation=org)
     selected_company = None
     transactions     = SalaryTransaction.objects.none()
@@ -192,27 +281,27 @@ def bank_disbursement_report(request):
         batch = SalaryBatch.objects.filter(company=selected_company, month=month, year=year).first()
         if batch:
             transactions = batch.transactions.select_related("employee").order_by("employee__emp_code")
+            versions = [batch_versions(batch), data_version(org.id, "employees.employee")]
+            summary = get_batch_summary(batch); amounts = summary["amounts"]
             totals = {
-                "total":     transactions.aggregate(s=Sum("salary_amount"))["s"] or 0,
-                "completed": transactions.filter(status="COMPLETED").aggregate(s=Sum("salary_amount"))["s"] or 0,
-                "pending":   transactions.filter(status__in=["PENDING","READY"]).aggregate(s=Sum("salary_amount"))["s"] or 0,
-                "hold":      transactions.filter(status="HOLD").aggregate(s=Sum("salary_amount"))["s"] or 0,
-                "failed":    transactions.filter(status="FAILED").aggregate(s=Sum("salary_amount"))["s"] or 0,
-                "count":     transactions.count(),
+                "total":     summary["total_amount"],
+                "completed": amounts["COMPLETED"],
+                "pending":   amounts["PENDING"] + amounts["READY"],
+                "hold":      amounts["HOLD"],
+                "failed":    amounts["FAILED"],
+                "count":     summary["total_count"],
             }
-    if export == "excel" and selected_company and transactions.exists():
-        df = pd.DataFrame([{"Emp Code":t.employee.emp_code,"Employee Name":t.employee.name,
-            "Account Number":t.account_number or "","IFSC":t.ifsc or "",
-            "Salary Amount":t.salary_amount,"Status":t.status,"UTR":t.utr or "",
-            "Bank Response":t.bank_response_at.strftime("%d-%m-%Y %H:%M") if t.bank_response_at else "",
-            "Hold Reason":t.hold_reason or "","Failure Reason":t.failure_reason or "",
-        } for t in transactions])
-        summary = df.groupby("Status")["Salary Amount"].agg(Employees="count",Total="sum").reset_index()
-        resp = excel_response(f"{selected_company.name}_{month}_{year}_bank_disbursement.xlsx")
-        with pd.ExcelWriter(resp, engine="openpyxl") as w:
-            df.to_excel(w, sheet_name="Disbursement", index=False)
-            summary.to_excel(w, sheet_name="Status Summary", index=False)
-        return resp
+    if fmt and selected_company and totals.get("count"):
+        def sheets():
+            rows = transactions.values_list("employee__emp_code","employee__name","account_number","ifsc",
+                "salary_amount","status","utr","bank_response_at","hold_reason","failure_reason").iterator(chunk_size=EXPORT_CHUNK_SIZE)
+            return [
+                Sheet("Disbursement", DISBURSEMENT_COLUMNS, rows),
+                Sheet("Status Summary", DISBURSEMENT_SUMMARY_COLUMNS, [(status, count, summary["amounts"][status])
+                    for status, count in summary["counts"].items() if count]),
+            ]
+        return cached_export("bank_disbursement", [batch.id], versions,
+            f"{selected_company.name}_{month}_{year}_bank_disbursement", fmt, sheets)
     return render(request, "reports/bank_disbursement_report.html", {
         "companies":companies,"selected_company":selected_company,"transactions":transactions,
         "batch":batch,"totals":totals,"month":month,"year":year,"month_name":MONTH_NAMES[month],
@@ -227,92 +316,130 @@ def pf_esic_report(request):
     month      = int(request.GET.get("month", today.month))
     year       = int(request.GET.get("year",  today.year))
     company_id = request.GET.get("company")
-    export     = request.GET.get("export")
-    PF_RATE    = 0.12
-    ESIC_RATE  = 0.0075
-    ER_ESIC    = 0.0325
+    fmt        = export_format(request.GET.get("export"))
     companies        = Company.objects.filter(organisation=org)
     selected_company = None
-    transactions     = SalaryTransaction.objects.none()
+    batch            = None
+    transactions     = []
     totals           = {}
+    rates            = rates_for_period(month, year)
     if company_id:
         selected_company = get_object_or_404(Company, id=company_id, organisation=org)
         batch = SalaryBatch.objects.filter(company=selected_company, month=month, year=year).first()
-        if batch:
-            qs = batch.transactions.select_related("employee").filter(
-                status__in=["COMPLETED","PROCESSED","EXPORTED","READY"]
-            ).order_by("employee__emp_code")
-            # Annotate each transaction with calculated PF/ESIC for template display
-            annotated = []
-            for t in qs:
-                s = float(t.salary_amount)
-                t.employee_pf   = round(s * PF_RATE,   2)
-                t.employer_pf   = round(s * PF_RATE,   2)
-                t.total_pf      = round(s * PF_RATE * 2, 2)
-                t.employee_esic = round(s * ESIC_RATE, 2)
-                t.employer_esic = round(s * ER_ESIC,   2)
-                t.total_esic    = round(s * (ESIC_RATE + ER_ESIC), 2)
-                annotated.append(t)
-            transactions = annotated
-            total_salary = float(qs.aggregate(s=Sum("salary_amount"))["s"] or 0)
-            totals = {
-                "total_salary":   total_salary,
-                "employee_pf":    round(total_salary * PF_RATE, 2),
-                "employer_pf":    round(total_salary * PF_RATE, 2),
-                "employee_esic":  round(total_salary * ESIC_RATE, 2),
-                "employer_esic":  round(total_salary * ER_ESIC, 2),
-                "count":          len(annotated),
-            }
-    if export == "excel" and selected_company and transactions:
-        rows = []
-        for t in transactions:
-            s = float(t.salary_amount)
-            rows.append({"Emp Code":t.employee.emp_code,"Employee Name":t.employee.name,
-                "UAN":t.employee.uan_number or "","ESIC Number":t.employee.esic_number or "",
-                "Gross Salary":s,
-                "Employee PF (12%)":round(s*PF_RATE,2),"Employer PF (12%)":round(s*PF_RATE,2),
-                "Employee ESIC (0.75%)":round(s*ESIC_RATE,2),"Employer ESIC (3.25%)":round(s*ER_ESIC,2),
-                "Total PF":round(s*PF_RATE*2,2),"Total ESIC":round(s*(ESIC_RATE+ER_ESIC),2),
-            })
-        df = pd.DataFrame(rows)
-        total_row = {c: df[c].sum() if df[c].dtype != object else ("TOTAL" if c=="Emp Code" else "") for c in df.columns}
-        df = pd.concat([df, pd.DataFrame([total_row])], ignore_index=True)
-        resp = excel_response(f"{selected_company.name}_{month}_{year}_pf_esic.xlsx")
-        with pd.ExcelWriter(resp, engine="openpyxl") as w:
-            df.to_excel(w, sheet_name="PF ESIC Report", index=False)
-        return resp
+    if fmt and batch and batch.transactions.filter(status__in=REPORT_STATUSES).exists():
+        # Recorded figures carry the labels of the rate they were computed with
+        recorded_rates = StatutoryRate.objects.filter(id__in=recorded_contributions(batch).values("rate_id"))
+        versions = [batch_versions(batch), data_version(org.id, "employees.employee"),
+                    rate_version(rates), [rate_version(rate) for rate in recorded_rates.order_by("id")]]
+        return cached_export("pf_esic", [batch.id], versions,
+            f"{selected_company.name}_{month}_{year}_pf_esic", fmt,
+            lambda: pf_esic_sheets(*pf_esic_rows(batch, rates)[:2]))
+    if batch:
+        rates, transactions, totals = pf_esic_rows(batch, rates)
     return render(request, "reports/pf_esic_report.html", {
         "companies":companies,"selected_company":selected_company,"transactions":transactions,
         "totals":totals,"month":month,"year":year,"month_name":MONTH_NAMES[month],
         "months":range(1,13),"month_names":MONTH_NAMES,"years":range(today.year-3,today.year+2),
-        "PF_RATE":PF_RATE,"ESIC_RATE":ESIC_RATE,"ER_ESIC":ER_ESIC,
+        "rates":rates,
     })
 
+def pf_esic_rows(batch, rates):
+    """(rates, rows, totals) of a batch — shared by the page and the export."""
+    totals = batch_contribution_totals(batch)
+    if totals:
+        # Recorded at finalize: rows and SUMs straight from the records
+        rates = recorded_contributions(batch).select_related("rate").first().rate
+        return rates, recorded_contribution_rows(batch), totals
+    rows = list(
+        batch.transactions.filter(
+            status__in=REPORT_STATUSES
+        ).order_by("employee__emp_code").values(
+            "salary_amount", emp_code=F("employee__emp_code"), name=F("employee__name"),
+            uan_number=F("employee__uan_number"), esic_number=F("employee__esic_number"),
+        )
+    )
+    # Not finalized yet: one vectorised pass
+    return rates, rows, annotate_contributions(rows, rates)
+
+def pf_esic_sheets(rates, rows):
+    emp_pf, er_pf   = pct(rates.employee_pf_rate), pct(rates.employer_pf_rate)
+    emp_esic, er_esic = pct(rates.employee_esic_rate), pct(rates.employer_esic_rate)
+    columns = {
+        "emp_code":Column("Emp Code"),"name":Column("Employee Name"),"uan_number":Column("UAN"),
+        "esic_number":Column("ESIC Number"),"salary_amount":Column("Gross Salary","money",total=True),
+        "employee_pf":Column(f"Employee PF ({emp_pf})","money",total=True),
+        "employer_pf":Column(f"Employer PF ({er_pf})","money",total=True),
+        "employee_esic":Column(f"Employee ESIC ({emp_esic})","money",total=True),
+        "employer_esic":Column(f"Employer ESIC ({er_esic})","money",total=True),
+        "total_pf":Column("Total PF","money",total=True),"total_esic":Column("Total ESIC","money",total=True),
+    }
+    return [Sheet("PF ESIC Report", list(columns.values()),
+        ([r[k] for k in columns] for r in rows), total_label="TOTAL")]
+
 # ── EXISTING VIEWS ─────────────────────────────────────────────────────────────
+YEAR_SUMMARY_COLUMNS = [Column("Total Transactions","int"),Column("Total Salary","money"),Column("Processed Salary","money"),
+                        Column("Hold Salary","money"),Column("Failed Salary","money")]
+EMPLOYEE_SUMMARY_COLUMNS = [Column("Site Code"),Column("Emp Code"),Column("Employee Name"),Column("Months Paid","int"),
+                            Column("Transactions","int",total=True),Column("Total Salary","money",total=True),
+                            Column("Processed Salary","money",total=True)]
+YEARLY_DETAIL_COLUMNS = [Column("Month","int"),Column("Site Code"),Column("Emp Code"),Column("Employee Name"),
+                         Column("Salary","money"),Column("Status")]
+
 @login_required
 def yearly_salary_report(request):
     year=request.GET.get("year"); company_id=request.GET.get("company")
-    if not year or not company_id: return HttpResponse("Year and Company required")
-    org=get_org(request); company=get_object_or_404(Company,id=company_id,organisation=org)
-    batches=SalaryBatch.objects.filter(company=company,year=year)
-    transactions=SalaryTransaction.objects.filter(batch__in=batches).select_related("employee","batch")
-    if not transactions.exists(): return HttpResponse("No salary data for selected year")
-    detail_rows=[{"Month":t.batch.month,"Emp Code":t.employee.emp_code,"Employee Name":t.employee.name,"Salary":t.salary_amount,"Status":t.status} for t in transactions]
-    df_detail=pd.DataFrame(detail_rows)
-    monthly_summary=df_detail.groupby(["Month","Status"])["Salary"].agg(["count","sum"]).reset_index()
-    monthly_pivot=monthly_summary.pivot_table(index="Month",columns="Status",values="sum",fill_value=0).reset_index()
-    monthly_total=df_detail.groupby("Month")["Salary"].sum().reset_index(name="Total Salary")
-    df_monthly=monthly_total.merge(monthly_pivot,on="Month",how="left")
-    df_year=pd.DataFrame([{"Total Transactions":len(df_detail),"Total Salary":df_detail["Salary"].sum(),
-        "Processed Salary":df_detail[df_detail["Status"]=="PROCESSED"]["Salary"].sum(),
-        "Hold Salary":df_detail[df_detail["Status"]=="HOLD"]["Salary"].sum(),
-        "Failed Salary":df_detail[df_detail["Status"]=="FAILED"]["Salary"].sum()}])
-    resp=excel_response(f"{company.name}_{year}_yearly_salary_report.xlsx")
-    with pd.ExcelWriter(resp,engine="openpyxl") as w:
-        df_detail.to_excel(w,sheet_name="Transactions",index=False)
-        df_monthly.to_excel(w,sheet_name="Monthly Summary",index=False)
-        df_year.to_excel(w,sheet_name="Year Summary",index=False)
-    return resp
+    if not year: return HttpResponse("Year required")
+    org=get_org(request)
+    facts=MonthlySalaryFact.objects.filter(company__organisation=org,year=year)
+    batches=SalaryBatch.objects.filter(company__organisation=org,year=year)
+    if company_id:
+        company=get_object_or_404(Company,id=company_id,organisation=org)
+        facts=facts.filter(company=company); batches=batches.filter(company=company); title=company.name
+    else:
+        title=org.name
+    if not facts.exists(): return HttpResponse("No salary data for selected year")
+    detail=request.GET.get("detail") == "1"
+    fmt=export_format(request.GET.get("export")) or "xlsx"
+    # Facts are rewritten whenever a batch changes status (export, completion,
+    # reversal), which the batch stamps capture
+    versions = [batches_versions(batches), data_version(org.id, "employees.employee")]
+    def sheets():
+        # Everything below is a GROUP BY over the monthly fact table
+        by_month_status=facts.values("month","status").annotate(amount=Sum("amount"),n=Sum("txn_count")).order_by("month","status")
+        statuses=sorted({r["status"] for r in by_month_status})
+        monthly={}
+        for r in by_month_status:
+            row=monthly.setdefault(r["month"],{"Month":r["month"],"Transactions":0,"Total Salary":0,**{s:0 for s in statuses}})
+            row[r["status"]]=r["amount"]; row["Transactions"]+=r["n"]; row["Total Salary"]+=r["amount"]
+        year_totals=facts.aggregate(n=Sum("txn_count"),total=Sum("amount"),
+            processed=Sum("amount",filter=Q(status="PROCESSED")),hold=Sum("amount",filter=Q(status="HOLD")),
+            failed=Sum("amount",filter=Q(status="FAILED")))
+        by_employee=(facts.values_list("company__site_code","employee__emp_code","employee__name")
+            .annotate(months=Count("month",distinct=True),n=Sum("txn_count"),total=Sum("amount"),
+                      processed=Coalesce(Sum("amount",filter=Q(status="PROCESSED")),Value(0,output_field=DecimalField())))
+            .order_by("company__site_code","employee__emp_code"))
+        monthly_columns=[Column("Month","int"),Column("Transactions","int",total=True),Column("Total Salary","money",total=True),
+                         *[Column(s,"money",total=True) for s in statuses]]
+        result=[
+            Sheet("Monthly Summary",monthly_columns,
+                  [[monthly[m][c.header] for c in monthly_columns] for m in sorted(monthly)],total_label="TOTAL"),
+            Sheet("Year Summary",YEAR_SUMMARY_COLUMNS,[(year_totals["n"],year_totals["total"],
+                  year_totals["processed"] or 0,year_totals["hold"] or 0,year_totals["failed"] or 0)]),
+            Sheet("Employee Summary",EMPLOYEE_SUMMARY_COLUMNS,by_employee.iterator(chunk_size=EXPORT_CHUNK_SIZE),total_label="TOTAL"),
+        ]
+        if detail:
+            # Optional, streamed row by row
+            result.append(Sheet("Transactions",YEARLY_DETAIL_COLUMNS,
+                facts.order_by("month","company__site_code","employee__emp_code").values_list(
+                "month","company__site_code","employee__emp_code","employee__name","amount","status").iterator(chunk_size=EXPORT_CHUNK_SIZE)))
+        return result
+    return cached_export("yearly_salary",[year,company_id,detail],versions,f"{title}_{year}_yearly_salary_report",fmt,sheets)
+
+BANK_CHANGE_COLUMNS = [
+    Column("Company"), Column("Emp Code"), Column("Employee Name"), Column("New Bank"), Column("New Account"),
+    Column("IFSC"), Column("Effective Month", "int"), Column("Effective Year", "int"), Column("Status"),
+    Column("Submitted By"), Column("Approved By"),
+]
 
 @login_required
 def bank_change_report(request):
@@ -322,7 +449,7 @@ def bank_change_report(request):
     year       = request.GET.get("year", str(today.year))
     status     = request.GET.get("status", "ALL")
     company_id = request.GET.get("company", "")
-    export     = request.GET.get("export")
+    fmt        = export_format(request.GET.get("export"))
 
     companies = Company.objects.filter(organisation=org)
 
@@ -339,18 +466,14 @@ def bank_change_report(request):
     if status and status != "ALL":
         qs = qs.filter(status=status)
 
-    if export == "excel":
-        cols = ["Company","Emp Code","Employee Name","New Bank","New Account","IFSC","Effective Month","Effective Year","Status","Submitted By","Approved By"]
-        rows = [{"Company":r.employee.company.name,"Emp Code":r.employee.emp_code,
-            "Employee Name":r.employee.name,"New Bank":r.new_bank_name,
-            "New Account":r.new_account_number,"IFSC":r.new_ifsc,
-            "Effective Month":r.effective_month,"Effective Year":r.effective_year,
-            "Status":r.status,"Submitted By":r.submitted_by.username,
-            "Approved By":r.approved_by.username if r.approved_by else ""} for r in qs]
-        df   = pd.DataFrame(rows) if rows else pd.DataFrame(columns=cols)
-        resp = excel_response("bank_change_report.xlsx")
-        df.to_excel(resp, index=False)
-        return resp
+    if fmt:
+        versions = [data_version(org.id, "banking.bankchangerequest", "employees.employee")]
+        params   = [company_id, month, year, status]
+        rows     = qs.values_list("employee__company__name", "employee__emp_code", "employee__name",
+                                  "new_bank_name", "new_account_number", "new_ifsc", "effective_month",
+                                  "effective_year", "status", "submitted_by__username", "approved_by__username")
+        return cached_export("bank_change", params, versions, "bank_change_report", fmt,
+                             lambda: [Sheet("Bank Changes", BANK_CHANGE_COLUMNS, rows.iterator(chunk_size=EXPORT_CHUNK_SIZE))])
 
     return render(request, "reports/bank_change_report.html", {
         "companies":      companies,
@@ -368,36 +491,48 @@ def transaction_status_manager(request):
     today=date.today(); org=get_org(request)
     month=int(request.GET.get("month",today.month)); year=int(request.GET.get("year",today.year))
     company_id=request.GET.get("company"); status_filter=request.GET.get("status","ALL")
+    emp_code=request.GET.get("emp_code","").strip(); cursor=request.GET.get("cursor") or None
     companies=Company.objects.filter(organisation=org)
-    selected_company=None; transactions=SalaryTransaction.objects.none(); batch=None; summary={}
-    if request.method=="POST":
-        action=request.POST.get("action"); transaction_id=request.POST.get("transaction_id")
-        hold_reason=request.POST.get("hold_reason","").strip()
-        txn=get_object_or_404(SalaryTransaction,id=transaction_id)
-        if action=="hold":
-            if not hold_reason: messages.error(request,"Please provide a reason for holding.")
-            else:
-                txn.status="HOLD"; txn.hold_reason=hold_reason; txn.save()
-                messages.success(request,f"{txn.employee.name} salary placed on hold.")
-        elif action=="unhold":
-            txn.status="PENDING"; txn.hold_reason=None; txn.save()
-            messages.success(request,f"Hold removed for {txn.employee.name}.")
-        elif action=="mark_ready":
-            if txn.status=="PENDING":
-                txn.status="READY"; txn.save()
-                messages.success(request,f"{txn.employee.name} marked as Ready for Export.")
-        return redirect(request.path+f"?month={month}&year={year}&company={company_id or ''}&status={status_filter}")
+    selected_company=None; transactions=[]; next_cursor=None; batch=None; summary={}
     if company_id:
         selected_company=get_object_or_404(Company,id=company_id,organisation=org)
         batch=SalaryBatch.objects.filter(company=selected_company,month=month,year=year).first()
-        if batch:
-            all_txns=batch.transactions.select_related("employee")
-            transactions=all_txns.filter(status=status_filter) if status_filter!="ALL" else all_txns
-            summary={"PENDING":all_txns.filter(status="PENDING").count(),"HOLD":all_txns.filter(status="HOLD").count(),
-                "READY":all_txns.filter(status="READY").count(),"EXPORTED":all_txns.filter(status="EXPORTED").count(),
-                "COMPLETED":all_txns.filter(status="COMPLETED").count()}
+    status=status_filter if status_filter!="ALL" else None
+    if request.method=="POST":
+        action=request.POST.get("action"); scope=request.POST.get("scope","selected")
+        hold_reason=request.POST.get("hold_reason","").strip()
+        if not batch or action not in BULK_STATUS_ACTIONS:
+            messages.error(request,"Select a batch and a valid action.")
+        elif batch.status=="REVERSED":
+            messages.error(request,"This batch has been reversed.")
+        elif action=="hold" and not hold_reason:
+            messages.error(request,"Please provide a reason for holding.")
+        else:
+            # selected rows, every row matching the current filters, or an emp code list
+            selection={}
+            if scope=="filter":
+                selection={"status":status,"emp_code":emp_code or None}
+            elif scope=="emp_codes":
+                selection={"emp_codes":[c for c in re.split(r"[\s,]+",request.POST.get("emp_codes","")) if c]}
+            else:
+                ids=request.POST.getlist("transaction_ids") or request.POST.getlist("transaction_id")
+                selection={"transaction_ids":[i for i in ids if i.isdigit()]}
+            if not any(selection.values()) and scope!="filter":
+                messages.error(request,"No transactions selected.")
+            else:
+                updated,skipped=bulk_status_action(batch,action,hold_reason=hold_reason or None,**selection)
+                messages.success(request,f"{updated} transaction(s) updated."+(f" {skipped} skipped (status does not allow this action)." if skipped else ""))
+        return redirect(request.get_full_path())
+    if batch:
+        try:
+            transactions,next_cursor=batch_transaction_page(batch,status=status,emp_code=emp_code or None,sort="emp_code",cursor=cursor)
+        except InvalidCursor:
+            transactions,next_cursor=batch_transaction_page(batch,status=status,emp_code=emp_code or None,sort="emp_code")
+        counts=get_batch_summary(batch)["counts"]
+        summary={s:counts[s] for s in ("PENDING","HOLD","READY","EXPORTED","COMPLETED")}
     return render(request,"reports/transaction_status_manager.html",{
         "companies":companies,"selected_company":selected_company,"transactions":transactions,
+        "next_cursor":next_cursor,"cursor":cursor,"emp_code":emp_code,"batch":batch,
         "month":month,"year":year,"months":range(1,13),"years":range(today.year-3,today.year+2),
         "status_filter":status_filter,"summary":summary,
     })
@@ -408,12 +543,8 @@ def reprocess_bank_snapshot(request):
     company_id=request.POST.get("company"); month=request.POST.get("month"); year=request.POST.get("year")
     org=get_org(request); company=get_object_or_404(Company,id=company_id,organisation=org)
     batch=get_object_or_404(SalaryBatch,company=company,month=month,year=year)
-    updated=skipped=0
-    for txn in SalaryTransaction.objects.filter(batch=batch).select_related("employee"):
-        active_bank=EmployeeBankAccount.objects.filter(employee=txn.employee,is_active=True).first()
-        if active_bank:
-            txn.account_number=active_bank.account_number; txn.ifsc=active_bank.ifsc
-            txn.save(update_fields=["account_number","ifsc"]); updated+=1
-        else: skipped+=1
-    messages.success(request,f"Reprocessed {updated} transactions. {skipped} skipped (no active bank).")
+    result=refresh_bank_snapshot(batch,reevaluate_holds=request.POST.get("reevaluate_holds")=="1")
+    msg=f"Refreshed bank details on {result['updated']} transactions. {result['missing']} without an active bank account."
+    if result["held"] or result["released"]: msg+=f" {result['held']} put on hold, {result['released']} released."
+    messages.success(request,msg)
     return redirect(f"{reverse('reports:salary_report')}?company={company_id}&month={month}&year={year}")
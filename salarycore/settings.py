@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     'dashboard',
     'home',
     'reports',
+    'api',
 
 ]
 
@@ -40,4 +40,7 @@ urlpatterns = [
     path("payroll/", include("payroll.urls")),
     path("banking/", include("banking.urls")),
     path("reports/", include("reports.urls")),
+
+    # 📡 READ-ONLY JSON API
+    path("api/", include("api.urls")),
 ]
\ No newline at end of file